@@ -0,0 +1,435 @@
+"""
+Record and replay the OpenStack API traffic of a discovery run.
+
+``record`` runs discovery against a real cloud and captures every HTTP
+response the SDK session receives (Keystone authentication, version
+discovery, catalog and service calls) into a recording file. ``ReplayServer``
+serves a recording from a local ``http.server``: the recorded endpoint
+origins are rewritten to the server, so the replayed Keystone catalog sends
+compute, network, volume, load-balancer, image, DNS and orchestration calls
+back to it. Latency, page sizes and injected errors (429/503/403) are
+configurable, which makes throughput and latency of discovery measurable
+offline and reproducibly::
+
+    python -m benchmarks.replay record --cloud mycloud --out recording.json.gz
+    python -m benchmarks.replay serve recording.json.gz --port 8775 --latency 0.05 \\
+        --page-size 100 --error-rate 0.02 --clouds-yaml replay-clouds.yaml
+    OS_CLIENT_CONFIG_FILE=replay-clouds.yaml os-explorer discover --cloud replay --no-cache
+
+``benchmark`` (``python -m benchmarks.run --replay recording.json.gz``) times
+discovery against an in-process server on each backend.
+
+Recordings contain the recorded project's resources and Keystone token
+response bodies (catalog, user and project); tokens themselves are not kept.
+"""
+import argparse
+import gzip
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import openstack
+from openstack.config.loader import OpenStackConfig
+
+from os_explorer.cli import discover_graph, run_discovery
+from os_explorer.config import load_config
+
+RECORDING_VERSION = 1
+
+# Response headers worth replaying; everything else is regenerated
+KEPT_HEADERS = ("Content-Type", "OpenStack-API-Version", "X-OpenStack-Nova-API-Version", "Retry-After")
+TOKEN_HEADER = "X-Subject-Token"
+REPLAY_TOKEN = "replay-token"
+
+ERROR_CODES = (429, 503, 403)
+# Query parameters that select a page rather than the resources
+PAGE_PARAMS = ("marker", "limit")
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def _open(path: Path, mode: str):
+    return gzip.open(path, mode + "t", encoding="utf-8") if str(path).endswith(".gz") else open(path, mode, encoding="utf-8")
+
+class Recorder:
+    """``requests`` response hook collecting responses for a recording."""
+
+    def __init__(self):
+        self.origins: List[str] = []
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, response, *args, **kwargs):
+        request = response.request
+        parts = urlsplit(request.url)
+        headers = {k: v for k, v in response.headers.items() if k in KEPT_HEADERS}
+        if TOKEN_HEADER in response.headers:
+            headers[TOKEN_HEADER] = REPLAY_TOKEN
+        with self._lock:
+            origin = _origin(request.url)
+            if origin not in self.origins:
+                self.origins.append(origin)
+            self.entries.append({
+                "method": request.method,
+                "origin": self.origins.index(origin),
+                "path": parts.path,
+                "query": parts.query,
+                "status": response.status_code,
+                "headers": headers,
+                "body": response.text,
+            })
+        return response
+
+    def save(self, path: Path) -> None:
+        with _open(path, "w") as f:
+            json.dump({"version": RECORDING_VERSION, "origins": self.origins, "entries": self.entries}, f)
+
+def record(cloud: str, out: Path, region: Optional[str] = None, config_file: Optional[str] = None, project_id: Optional[str] = None) -> Dict[str, Any]:
+    """Discover ``cloud`` on the sdk backend and save its HTTP responses to ``out``; returns the graph dict."""
+    # A fresh connection so authentication is captured too
+    conn = load_config(cloud, region, config_file, project_id).connect()
+    recorder = Recorder()
+    conn.session.session.hooks.setdefault("response", []).append(recorder)
+    try:
+        graph = run_discovery(cloud, region, config_file, project_id, use_cache=False, conn=conn)
+    finally:
+        conn.close()
+    recorder.save(out)
+    return graph
+
+def load_recording(path: Path) -> Dict[str, Any]:
+    with _open(path, "r") as f:
+        recording = json.load(f)
+    if recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version: {recording.get('version')}")
+    return recording
+
+def _query(query: str, drop: Sequence[str] = ()) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in drop))
+
+def _collection_key(body: Any) -> Optional[str]:
+    """The key of the resource list in a collection response, if it is one."""
+    if not isinstance(body, dict):
+        return None
+    keys = [k for k, v in body.items() if isinstance(v, list) and not k.endswith("_links")]
+    return keys[0] if len(keys) == 1 else None
+
+class Collection:
+    """All recorded pages of one list call, merged for re-pagination."""
+
+    def __init__(self, key: str, glance_style: bool):
+        self.key = key
+        # Glance returns the next page as a top-level "next" link
+        self.glance_style = glance_style
+        self.items: List[Dict[str, Any]] = []
+        self._ids = set()
+
+    def extend(self, items: List[Any]) -> None:
+        for item in items:
+            item_id = item.get("id") if isinstance(item, dict) else None
+            if item_id is None or item_id not in self._ids:
+                self._ids.add(item_id)
+                self.items.append(item)
+
+    def page(self, marker: Optional[str], limit: Optional[int]) -> Tuple[List[Any], bool]:
+        """Items after ``marker`` (up to ``limit``) and whether more follow."""
+        start = 0
+        if marker:
+            ids = [item.get("id") if isinstance(item, dict) else None for item in self.items]
+            start = ids.index(marker) + 1 if marker in ids else len(self.items)
+        end = len(self.items) if limit is None else start + limit
+        return self.items[start:end], end < len(self.items)
+
+class Replay:
+    """Recorded responses indexed for lookup, independent of the HTTP server."""
+
+    def __init__(self, recording: Dict[str, Any]):
+        self.origins: List[str] = recording["origins"]
+        self.exact: Dict[Tuple, Dict[str, Any]] = {}
+        self.by_path: Dict[Tuple, Dict[str, Any]] = {}
+        self.collections: Dict[Tuple, Collection] = {}
+        for entry in recording["entries"]:
+            key = (entry["method"], entry["origin"], entry["path"])
+            self.exact.setdefault(key + (_query(entry["query"]),), entry)
+            # Without a marker: the first page, served when the query differs (other backend)
+            if "marker" not in dict(parse_qsl(entry["query"])):
+                self.by_path.setdefault(key, entry)
+            self._collect(key, entry)
+
+    def _collect(self, key: Tuple, entry: Dict[str, Any]) -> None:
+        if entry["method"] != "GET" or entry["status"] != 200:
+            return
+        try:
+            body = json.loads(entry["body"])
+        except ValueError:
+            return
+        resources_key = _collection_key(body)
+        if resources_key is None:
+            return
+        collection = self.collections.get(key)
+        if collection is None:
+            collection = self.collections[key] = Collection(resources_key, "next" in body)
+        collection.extend(body[resources_key])
+
+    def lookup(self, method: str, origin: int, path: str, query: str) -> Optional[Dict[str, Any]]:
+        key = (method, origin, path)
+        return self.exact.get(key + (_query(query),)) or self.by_path.get(key)
+
+class ReplayServer:
+    """
+    Serve a recording on ``host:port`` (0 picks a free port).
+
+    Requests go to ``/<origin number>/<recorded path>``. ``latency`` (plus up
+    to ``jitter``) seconds are slept before every response. With ``page_size``
+    list calls are re-paginated from all recorded pages, honouring the
+    client's ``limit`` and ``marker``; otherwise recorded pages are served as
+    they were. ``error_rate`` of the service calls (never authentication)
+    fail with a random status from ``error_codes``, reproducibly for a given
+    ``seed``.
+    """
+
+    def __init__(self, recording: Dict[str, Any], host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, page_size: Optional[int] = None, error_rate: float = 0.0,
+                 error_codes: Sequence[int] = ERROR_CODES, seed: int = 0):
+        self.replay = Replay(recording)
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def auth_url(self) -> str:
+        """Keystone URL of the recording, as seen through the server."""
+        for entry in self.replay.exact.values():
+            if entry["method"] == "POST" and entry["path"].endswith("/auth/tokens"):
+                return f"{self.url}/{entry['origin']}{entry['path'][:-len('/auth/tokens')]}"
+        raise ValueError("The recording has no Keystone authentication")
+
+    def clouds_yaml(self, cloud: str = "replay") -> str:
+        """A ``clouds.yaml`` pointing ``cloud`` at this server (any credentials are accepted)."""
+        return (f"clouds:\n  {cloud}:\n    auth:\n      auth_url: {self.auth_url()}\n"
+                f"      username: replay\n      password: replay\n      project_name: replay\n"
+                f"      user_domain_name: Default\n      project_domain_name: Default\n")
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def rewrite(self, text: str) -> str:
+        """Point recorded absolute URLs at this server."""
+        for number, origin in enumerate(self.replay.origins):
+            text = text.replace(origin, f"{self.url}/{number}")
+        return text
+
+    def _delay(self) -> float:
+        with self._random_lock:
+            return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _inject_error(self) -> Optional[int]:
+        if not self.error_rate:
+            return None
+        with self._random_lock:
+            if self._random.random() < self.error_rate:
+                return self._random.choice(self.error_codes)
+        return None
+
+    def respond(self, method: str, raw_path: str) -> Tuple[int, Dict[str, str], bytes]:
+        """Status, headers and body for one request."""
+        parts = urlsplit(raw_path)
+        origin, _, path = parts.path.lstrip("/").partition("/")
+        path = "/" + path
+        if not origin.isdigit():
+            return _error(404, "Unknown origin")
+        entry = self.replay.lookup(method, int(origin), path, parts.query)
+        is_auth = method == "POST" and path.endswith("/auth/tokens")
+
+        if not is_auth:
+            status = self._inject_error()
+            if status is not None:
+                with self._random_lock:
+                    self.errors += 1
+                headers = {"Retry-After": "1"} if status == 429 else {}
+                return _error(status, "Injected error", headers)
+        if entry is None:
+            return _error(404, "Not recorded")
+
+        headers = dict(entry["headers"])
+        body = self.rewrite(entry["body"])
+        if is_auth:
+            body = _extend_token(body)
+        elif self.page_size and method == "GET" and entry["status"] == 200:
+            collection = self.replay.collections.get((method, int(origin), path))
+            if collection is not None:
+                body = self._page(collection, parts.path, parts.query, body)
+        return entry["status"], headers, body.encode()
+
+    def _page(self, collection: Collection, request_path: str, query: str, recorded: str) -> str:
+        params = dict(parse_qsl(query, keep_blank_values=True))
+        limit = min(int(params["limit"]), self.page_size) if params.get("limit", "").isdigit() else self.page_size
+        items, more = collection.page(params.get("marker"), limit)
+        body = {k: v for k, v in json.loads(recorded).items() if not k.endswith("_links") and k != "next"}
+        body[collection.key] = items
+        if more and items:
+            next_query = urlencode([(k, v) for k, v in _query(query, PAGE_PARAMS)] + [("limit", limit), ("marker", items[-1]["id"])])
+            href = f"{self.url}{request_path}?{next_query}"
+            if collection.glance_style:
+                body["next"] = href
+            else:
+                body[f"{collection.key}_links"] = [{"rel": "next", "href": href}]
+        return json.dumps(body)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                delay = server._delay()
+                if delay:
+                    time.sleep(delay)
+                with server._random_lock:
+                    server.requests += 1
+                status, headers, body = server.respond(self.command, self.path)
+                self.send_response(status)
+                headers.setdefault("Content-Type", "application/json")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+    return status, dict(headers or {}), json.dumps({"error": {"code": status, "message": message}}).encode()
+
+def _extend_token(body: str) -> str:
+    """Keep replayed tokens valid so clients don't re-authenticate."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    token = data.get("token") if isinstance(data, dict) else None
+    if isinstance(token, dict):
+        token["expires_at"] = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S.000000Z")
+        return json.dumps(data)
+    return body
+
+def connect(server: ReplayServer, cloud: str = "replay"):
+    """A fresh SDK connection to ``server``, authenticating on first use."""
+    with tempfile.TemporaryDirectory() as tmp:
+        clouds_yaml = Path(tmp) / "clouds.yaml"
+        clouds_yaml.write_text(server.clouds_yaml(cloud))
+        region = OpenStackConfig(config_files=[str(clouds_yaml)], load_envvars=False).get_one(cloud=cloud)
+    return openstack.connection.Connection(config=region)
+
+def benchmark(recording: Dict[str, Any], backends: Sequence[str] = ("sdk", "async"), repeat: int = 1,
+              concurrency: Optional[int] = None, **server_options) -> Dict[str, Dict[str, float]]:
+    """Best discovery time per backend against a ``ReplayServer``, with node, request and error counts."""
+    results: Dict[str, Dict[str, float]] = {}
+    with ReplayServer(recording, **server_options) as server:
+        for backend in backends:
+            for _ in range(repeat):
+                conn = connect(server)
+                requests, errors = server.requests, server.errors
+                started = time.perf_counter()
+                try:
+                    graph = discover_graph("replay", backend=backend, concurrency=concurrency, use_cache=False, conn=conn)
+                finally:
+                    conn.close()
+                elapsed = time.perf_counter() - started
+                entry = {"seconds": elapsed, "nodes": len(graph.nodes), "requests": server.requests - requests, "errors": server.errors - errors}
+                entry["requests_per_second"] = entry["requests"] / elapsed if elapsed else 0.0
+                if backend not in results or elapsed < results[backend]["seconds"]:
+                    results[backend] = entry
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record OpenStack API responses and replay them locally")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="Discover a cloud and record its HTTP responses")
+    rec.add_argument("--cloud", required=True)
+    rec.add_argument("--region")
+    rec.add_argument("--project-id")
+    rec.add_argument("--config-file")
+    rec.add_argument("--out", type=Path, required=True, help="Recording file (.json or .json.gz)")
+
+    serve = commands.add_parser("serve", help="Serve a recording")
+    serve.add_argument("recording", type=Path)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8775)
+    serve.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    serve.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra random seconds")
+    serve.add_argument("--page-size", type=int, help="Re-paginate list responses to this many items")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="Fraction of service calls that fail")
+    serve.add_argument("--error-codes", default=",".join(map(str, ERROR_CODES)), help="Statuses to inject")
+    serve.add_argument("--seed", type=int, default=0)
+    serve.add_argument("--clouds-yaml", type=Path, help="Write a clouds.yaml for the 'replay' cloud here")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        graph = record(args.cloud, args.out, args.region, args.config_file, args.project_id)
+        print(f"Recorded {len(graph['nodes'])} resources to {args.out}")
+        return 0
+
+    server = ReplayServer(load_recording(args.recording), args.host, args.port, latency=args.latency, jitter=args.jitter,
+                          page_size=args.page_size, error_rate=args.error_rate,
+                          error_codes=[int(c) for c in args.error_codes.split(",")], seed=args.seed)
+    if args.clouds_yaml:
+        args.clouds_yaml.write_text(server.clouds_yaml())
+    print(f"Replaying {args.recording} on {server.url} (auth_url {server.auth_url()})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
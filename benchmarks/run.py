@@ -0,0 +1,157 @@
+"""
+Synthetic-scale benchmarks.
+
+Times the discovery pipeline against ``FakeConnection`` projects of several
+sizes, stage by stage:
+
+* ``discovery``: ``discover_graph`` end to end (list calls, nodes and edges).
+* ``build``: ``GraphBuilder.add_resources`` for every result set.
+* ``link``: ``GraphBuilder.link_resources``.
+* ``to_dict``: ``Graph.to_dict``.
+* ``json``: ``write_graph`` to a JSON file.
+* ``tree``: ``render_tree`` to a discarded terminal.
+
+Usage::
+
+    python -m benchmarks.run --sizes 1000,10000,100000 --json results.json
+    python -m benchmarks.run --baseline results.json --threshold 1.25
+
+``--replay`` also times discovery on each backend against a recording
+served by ``benchmarks.replay`` with the given latency, page size and
+error rate. With ``--baseline`` the run fails when a stage is slower than
+the baseline by more than ``--threshold`` times.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from os_explorer.cli import discover_graph
+from os_explorer.graph.builder import GraphBuilder
+from os_explorer.graph.serialize import write_graph
+from os_explorer.ui.tree import render_tree
+
+from . import replay
+from .synthetic import FakeConnection, ProjectSpec, flatten, generate
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# stage -> {"seconds": best of the repeats, "peak_bytes": tracemalloc peak}
+Results = Dict[str, Dict[str, float]]
+
+def _stages(resources, workdir: Path) -> List[Tuple[str, Callable[[Dict[str, Any]], Any]]]:
+    """Stages in pipeline order; each gets the state left by the previous ones."""
+    flat = flatten(resources)
+
+    def discovery(state):
+        state["graph"] = discover_graph("bench", conn=FakeConnection(resources), use_cache=False)
+
+    def build(state):
+        builder = GraphBuilder("bench-project", "bench")
+        for key, items in flat.items():
+            builder.add_resources(key, items)
+        state["builder"] = builder
+
+    def link(state):
+        state["builder"].link_resources()
+
+    def to_dict(state):
+        state["graph_json"] = state["graph"].to_dict()
+
+    def write_json(state):
+        write_graph(state["graph"], workdir / "graph.json")
+
+    def tree(state):
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            render_tree(state["graph_json"])
+
+    return [("discovery", discovery), ("build", build), ("link", link), ("to_dict", to_dict), ("json", write_json), ("tree", tree)]
+
+def run_size(size: int, repeat: int, memory: bool) -> Results:
+    resources = generate(ProjectSpec.scaled(size))
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        stages = _stages(resources, Path(tmp))
+        for _ in range(repeat):
+            state: Dict[str, Any] = {}
+            for name, stage in stages:
+                gc.collect()
+                started = time.perf_counter()
+                stage(state)
+                elapsed = time.perf_counter() - started
+                entry = results.setdefault(name, {"seconds": elapsed})
+                entry["seconds"] = min(entry["seconds"], elapsed)
+        if memory:
+            # Separate pass: tracing allocations slows everything down
+            state = {}
+            for name, stage in stages:
+                gc.collect()
+                tracemalloc.start()
+                stage(state)
+                results[name]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+    return results
+
+def compare(results: Dict[str, Results], baseline: Dict[str, Results], threshold: float) -> List[str]:
+    """Stages slower than ``threshold`` times their baseline."""
+    regressions = []
+    for size, stages in results.items():
+        for name, entry in stages.items():
+            before = baseline.get(size, {}).get(name)
+            if before and entry["seconds"] > before["seconds"] * threshold:
+                regressions.append(f"{size} {name}: {entry['seconds']:.3f}s vs {before['seconds']:.3f}s")
+    return regressions
+
+def _print(size: int, results: Results) -> None:
+    print(f"{size} resources")
+    for name, entry in results.items():
+        peak = entry.get("peak_bytes")
+        memory = f"  peak {peak / 2 ** 20:8.1f} MiB" if peak is not None else ""
+        print(f"  {name:<10} {entry['seconds']:8.3f} s{memory}")
+    sys.stdout.flush()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark discovery, graph building and output on synthetic projects")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma separated resource counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the best time is kept")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory pass")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed slowdown against the baseline")
+    parser.add_argument("--replay", type=Path, help="Recording to time discovery against (see benchmarks.replay)")
+    parser.add_argument("--backends", default="sdk,async", help="Discovery backends for --replay")
+    parser.add_argument("--latency", type=float, default=0.0, help="Replay latency per request, seconds")
+    parser.add_argument("--page-size", type=int, help="Replay page size")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Replay injected error rate")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Results] = {}
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        results[str(size)] = run_size(size, args.repeat, not args.no_memory)
+        _print(size, results[str(size)])
+    if args.replay:
+        results["replay"] = replay.benchmark(replay.load_recording(args.replay), args.backends.split(","), args.repeat,
+                                             latency=args.latency, page_size=args.page_size, error_rate=args.error_rate)
+        print(f"replay {args.replay}")
+        for backend, entry in results["replay"].items():
+            print(f"  {backend:<10} {entry['seconds']:8.3f} s  {entry['requests']:.0f} requests "
+                  f"({entry['requests_per_second']:.1f}/s, {entry['errors']:.0f} errors)")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Synthetic OpenStack projects for benchmarks.
+
+``generate`` builds the discovery results of a project of any size as plain
+dicts shaped like the SDK resources ``GraphBuilder`` reads, with every
+foreign key pointing at an existing resource. ``FakeConnection`` serves them
+through the same ``conn.compute/network/...`` proxy methods the
+``discovery`` classes call, so ``run_discovery(conn=...)`` runs the real
+pipeline without a cloud.
+"""
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterator, List, Optional
+
+Resources = Dict[str, List[Dict[str, Any]]]
+
+@dataclass
+class ProjectSpec:
+    servers: int = 100
+    ports_per_server: int = 2
+    volumes_per_server: int = 1
+    # One snapshot for every n-th volume
+    snapshot_every: int = 4
+    networks: int = 4
+    subnets_per_network: int = 2
+    security_groups: int = 8
+    sg_rules_per_group: int = 6
+    routers: int = 2
+    floating_ips: int = 25
+    load_balancers: int = 5
+    listeners_per_lb: int = 2
+    pools_per_lb: int = 2
+    members_per_pool: int = 4
+    l7_policies_per_listener: int = 1
+    l7_rules_per_policy: int = 2
+    images: int = 20
+    flavors: int = 10
+
+    @classmethod
+    def scaled(cls, total: int) -> "ProjectSpec":
+        """A project with roughly ``total`` resources (nodes) in realistic proportions."""
+        base = cls()
+        factor = total / base.resource_count()
+        spec = cls(**{f.name: getattr(base, f.name) for f in fields(cls)})
+        for name in ("servers", "networks", "security_groups", "routers", "floating_ips", "load_balancers", "images"):
+            setattr(spec, name, max(1, round(getattr(base, name) * factor)))
+        return spec
+
+    def resource_count(self) -> int:
+        volumes = self.servers * self.volumes_per_server
+        listeners = self.load_balancers * self.listeners_per_lb
+        pools = self.load_balancers * self.pools_per_lb
+        policies = listeners * self.l7_policies_per_listener
+        return (self.servers + self.servers * self.ports_per_server + volumes + -(-volumes // self.snapshot_every)
+                + self.networks * (1 + self.subnets_per_network) + self.security_groups + self.routers
+                + self.floating_ips + self.load_balancers + listeners + pools + pools * self.members_per_pool
+                + pools + policies + policies * self.l7_rules_per_policy)
+
+# Distinct first UUID group per resource type
+_PREFIXES: Dict[str, int] = {}
+
+def _id(kind: str, number: int) -> str:
+    prefix = _PREFIXES.setdefault(kind, 0x10000000 + len(_PREFIXES))
+    return f"{prefix:08x}-0000-4000-8000-{number:012x}"
+
+def _stamp(number: int) -> str:
+    return f"2024-{1 + number % 12:02d}-{1 + number % 28:02d}T{number % 24:02d}:00:00Z"
+
+def generate(spec: ProjectSpec, project_id: str = "bench-project") -> Resources:
+    """Discovery results by result key; members and L7 rules are keyed by parent ID."""
+    common = lambda kind, i: {"id": _id(kind, i), "project_id": project_id, "created_at": _stamp(i), "updated_at": _stamp(i + 1)}
+    flavors = [{"id": _id("flavor", i), "name": f"m1.size{i}", "vcpus": 1 + i % 8, "ram": 1024 * (1 + i % 16)} for i in range(spec.flavors)]
+    images = [{**common("image", i), "name": f"image-{i}", "status": "active", "size": 2 ** 30} for i in range(spec.images)]
+    networks = [{**common("network", i), "name": f"net-{i}", "status": "ACTIVE", "mtu": 1450} for i in range(spec.networks)]
+    subnets = [{**common("subnet", i), "name": f"subnet-{i}", "network_id": networks[i % spec.networks]["id"],
+                "cidr": f"10.{i // 256 % 256}.{i % 256}.0/24", "gateway_ip": f"10.{i // 256 % 256}.{i % 256}.1", "ip_version": 4}
+               for i in range(spec.networks * spec.subnets_per_network)]
+    security_groups = [{**common("security_group", i), "name": f"sg-{i}", "security_group_rules": [
+        {"id": _id("sg_rule", i * spec.sg_rules_per_group + r), "direction": "ingress", "ethertype": "IPv4",
+         "protocol": "tcp", "port_range_min": 1000 + r, "port_range_max": 1000 + r, "remote_ip_prefix": "0.0.0.0/0"}
+        for r in range(spec.sg_rules_per_group)]} for i in range(spec.security_groups)]
+
+    servers, ports, volumes, snapshots = [], [], [], []
+    for i in range(spec.servers):
+        server_id = _id("server", i)
+        servers.append({**common("server", i), "name": f"server-{i}", "status": "ACTIVE" if i % 10 else "SHUTOFF",
+                        "flavor": {"id": flavors[i % spec.flavors]["id"]}, "image": {"id": images[i % spec.images]["id"]},
+                        "availability_zone": f"az-{i % 3}", "key_name": "bench", "addresses": {}})
+        for p in range(spec.ports_per_server):
+            n = i * spec.ports_per_server + p
+            subnet = subnets[n % len(subnets)]
+            ports.append({**common("port", n), "name": "", "device_id": server_id, "device_owner": "compute:nova",
+                          "network_id": subnet["network_id"], "status": "ACTIVE", "mac_address": f"fa:16:3e:{n >> 16 & 255:02x}:{n >> 8 & 255:02x}:{n & 255:02x}",
+                          "fixed_ips": [{"subnet_id": subnet["id"], "ip_address": f"10.0.{n // 250 % 256}.{n % 250 + 2}"}],
+                          "security_group_ids": [security_groups[n % spec.security_groups]["id"]]})
+        for v in range(spec.volumes_per_server):
+            n = i * spec.volumes_per_server + v
+            volumes.append({**common("volume", n), "name": f"volume-{n}", "size": 10 + n % 90, "status": "in-use",
+                            "volume_type": "ssd", "attachments": [{"server_id": server_id, "device": f"/dev/vd{chr(98 + v % 24)}"}]})
+            if n % spec.snapshot_every == 0:
+                snapshots.append({**common("snapshot", n), "name": f"snap-{n}", "volume_id": volumes[-1]["id"], "size": volumes[-1]["size"], "status": "available"})
+
+    routers = [{**common("router", i), "name": f"router-{i}", "status": "ACTIVE",
+                "external_gateway_info": {"network_id": networks[0]["id"]}} for i in range(spec.routers)]
+    floating_ips = [{**common("floating_ip", i), "floating_ip_address": f"203.0.{i // 250 % 256}.{i % 250 + 1}",
+                     "port_id": ports[i % len(ports)]["id"] if ports else None, "fixed_ip_address": None, "status": "ACTIVE"}
+                    for i in range(spec.floating_ips)]
+
+    load_balancers, listeners, pools, health_monitors, l7_policies = [], [], [], [], []
+    members: Dict[str, List[Dict[str, Any]]] = {}
+    l7_rules: Dict[str, List[Dict[str, Any]]] = {}
+    for i in range(spec.load_balancers):
+        lb_id = _id("load_balancer", i)
+        load_balancers.append({**common("load_balancer", i), "name": f"lb-{i}", "vip_address": f"10.1.{i // 250 % 256}.{i % 250 + 1}",
+                               "provisioning_status": "ACTIVE", "operating_status": "ONLINE"})
+        lb_pools = []
+        for p in range(spec.pools_per_lb):
+            n = i * spec.pools_per_lb + p
+            pool = {**common("pool", n), "name": f"pool-{n}", "protocol": "HTTP", "lb_algorithm": "ROUND_ROBIN",
+                    "loadbalancers": [{"id": lb_id}]}
+            pools.append(pool)
+            lb_pools.append(pool)
+            members[pool["id"]] = [{**common("member", n * spec.members_per_pool + m), "name": "", "address": f"10.0.0.{m + 2}",
+                                    "protocol_port": 8080, "operating_status": "ONLINE"} for m in range(spec.members_per_pool)]
+            health_monitors.append({**common("health_monitor", n), "name": "", "type": "HTTP", "delay": 5, "max_retries": 3,
+                                    "pools": [{"id": pool["id"]}]})
+        for l in range(spec.listeners_per_lb):
+            n = i * spec.listeners_per_lb + l
+            listener = {**common("listener", n), "name": f"listener-{n}", "protocol": "HTTP", "protocol_port": 80 + l,
+                        "load_balancers": [{"id": lb_id}], "default_pool_id": lb_pools[l % len(lb_pools)]["id"] if lb_pools else None}
+            listeners.append(listener)
+            for k in range(spec.l7_policies_per_listener):
+                number = n * spec.l7_policies_per_listener + k
+                policy = {**common("l7_policy", number), "name": "", "action": "REJECT", "position": k + 1, "listener_id": listener["id"]}
+                l7_policies.append(policy)
+                l7_rules[policy["id"]] = [{**common("l7_rule", number * spec.l7_rules_per_policy + r), "type": "PATH",
+                                           "compare_type": "STARTS_WITH", "value": f"/api/{r}", "key": None}
+                                          for r in range(spec.l7_rules_per_policy)]
+
+    return {
+        "servers": servers, "flavors": flavors, "images": images, "volumes": volumes, "snapshots": snapshots,
+        "ports": ports, "networks": networks, "subnets": subnets, "security_groups": security_groups,
+        "routers": routers, "floating_ips": floating_ips, "load_balancers": load_balancers, "listeners": listeners,
+        "pools": pools, "members": members, "health_monitors": health_monitors, "l7_policies": l7_policies,
+        "l7_rules": l7_rules,
+    }
+
+def flatten(resources: Resources) -> Resources:
+    """Discovery results as ``GraphBuilder.add_resources`` receives them (children annotated with their parent)."""
+    flat = dict(resources)
+    flat["members"] = [{**m, "pool_id": pool_id} for pool_id, items in resources["members"].items() for m in items]
+    flat["l7_rules"] = [{**r, "l7_policy_id": policy_id} for policy_id, items in resources["l7_rules"].items() for r in items]
+    return flat
+
+class _Proxy:
+    def __init__(self, resources: Resources, latency: float):
+        self._resources = resources
+        self._latency = latency
+
+    def _list(self, key: str, parent: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        if self._latency:
+            time.sleep(self._latency)
+        items = self._resources.get(key, [])
+        if parent is not None:
+            items = items.get(parent, [])
+        # Copies, like the fresh resource objects the SDK returns per call
+        return iter([dict(item) for item in items])
+
+class FakeCompute(_Proxy):
+    def servers(self, details: bool = True, **query):
+        return self._list("servers")
+
+    def flavors(self, **query):
+        return self._list("flavors")
+
+    def keypairs(self, **query):
+        return self._list("keypairs")
+
+    def server_groups(self, **query):
+        return self._list("server_groups")
+
+class FakeNetwork(_Proxy):
+    def networks(self, **query):
+        return self._list("networks")
+
+    def subnets(self, **query):
+        return self._list("subnets")
+
+    def ports(self, **query):
+        return self._list("ports")
+
+    def routers(self, **query):
+        return self._list("routers")
+
+    def security_groups(self, **query):
+        return self._list("security_groups")
+
+    def ips(self, **query):
+        return self._list("floating_ips")
+
+class FakeBlockStorage(_Proxy):
+    def volumes(self, details: bool = True, **query):
+        return self._list("volumes")
+
+    def snapshots(self, **query):
+        return self._list("snapshots")
+
+    def backups(self, **query):
+        return self._list("backups")
+
+class FakeLoadBalancer(_Proxy):
+    def load_balancers(self, **query):
+        return self._list("load_balancers")
+
+    def listeners(self, **query):
+        return self._list("listeners")
+
+    def pools(self, **query):
+        return self._list("pools")
+
+    def members(self, pool, **query):
+        return self._list("members", pool)
+
+    def health_monitors(self, **query):
+        return self._list("health_monitors")
+
+    def l7_policies(self, **query):
+        return self._list("l7_policies")
+
+    def l7_rules(self, l7_policy, **query):
+        return self._list("l7_rules", l7_policy)
+
+class FakeImage(_Proxy):
+    def images(self, **query):
+        return self._list("images")
+
+class FakeDNS(_Proxy):
+    def zones(self, **query):
+        return self._list("zones")
+
+    def recordsets(self, zone, **query):
+        return self._list("recordsets", zone)
+
+class FakeOrchestration(_Proxy):
+    def stacks(self, **query):
+        return self._list("stacks")
+
+    def resources(self, stack, **query):
+        return self._list("stack_resources", stack)
+
+class _Project:
+    def __init__(self, project_id: str, name: str):
+        self.id = project_id
+        self.name = name
+
+class FakeConnection:
+    """Stand-in for ``openstack.connection.Connection`` serving ``generate`` output.
+
+    ``latency`` adds a sleep per list call to mimic API round trips.
+    """
+
+    session = None
+
+    def __init__(self, resources: Resources, project_id: str = "bench-project", project_name: str = "bench", latency: float = 0.0):
+        self.current_project_id = project_id
+        self.current_project = _Project(project_id, project_name)
+        self.compute = FakeCompute(resources, latency)
+        self.network = FakeNetwork(resources, latency)
+        self.block_storage = FakeBlockStorage(resources, latency)
+        self.load_balancer = FakeLoadBalancer(resources, latency)
+        self.image = FakeImage(resources, latency)
+        self.dns = FakeDNS(resources, latency)
+        self.orchestration = FakeOrchestration(resources, latency)
@@ -0,0 +1,176 @@
+"""
+On-disk discovery cache.
+
+Each discovery result set (``servers``, ``flavors``, ...) is stored as one
+JSON file per cloud, region and project, and served back while it is younger
+than the per-type TTL (and ``max_age`` when given). Slow-changing catalog
+data such as flavors and images lives for hours; ports only for seconds.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .discovery.executor import DiscoveryTask
+from .discovery.scheduler import listing_incomplete
+from .utils.resource import to_plain
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("OS_EXPLORER_CACHE_DIR", Path.home() / ".cache" / "os-explorer"))
+
+# Seconds a discovery result set may be served from the cache
+DEFAULT_TTLS: Dict[str, float] = {
+    "flavors": 6 * 3600,
+    "images": 3600,
+    "networks": 300,
+    "subnets": 300,
+    "routers": 300,
+    "security_groups": 300,
+    "load_balancers": 120,
+    "listeners": 120,
+    "pools": 120,
+    "members": 60,
+    "health_monitors": 120,
+    "l7_policies": 120,
+    "l7_rules": 120,
+    "volumes": 60,
+    "snapshots": 60,
+    "servers": 30,
+    "floating_ips": 30,
+    "ports": 15,
+}
+DEFAULT_TTL = 60.0
+
+logger = logging.getLogger(__name__)
+
+class DiscoveryCache:
+    def __init__(self, cloud: str, region: Optional[str], project_id: str, directory: Optional[Path] = None,
+                 ttls: Optional[Dict[str, float]] = None, max_age: Optional[float] = None, variant: str = ""):
+        # ``variant`` separates results of different queries (field selection, filters)
+        scope = json.dumps([cloud, region, project_id] + ([variant] if variant else []))
+        self.directory = Path(directory or DEFAULT_CACHE_DIR) / hashlib.sha1(scope.encode()).hexdigest()
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, key: str) -> float:
+        # Variants of one result set (``images@<digest>``) share its TTL
+        ttl = self.ttls.get(key.partition("@")[0], DEFAULT_TTL)
+        return ttl if self.max_age is None else min(ttl, self.max_age)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached items for ``key``, or None when missing or expired."""
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if time.time() - entry.get("stored_at", 0) > self.ttl(key):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["items"]
+
+    def put(self, key: str, items: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Store items (converted to plain dicts) and return the stored form."""
+        plain = [to_plain(item) for item in items]
+        entry = {"stored_at": time.time(), "items": plain}
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file and rename so readers never see partial JSON
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not write discovery cache for {key}: {e}")
+        return plain
+
+    def stream(self, key: str, items: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield ``items`` as plain dicts while writing them to the cache.
+
+        The entry is written incrementally and only replaces the old one
+        once ``items`` is exhausted; a listing abandoned halfway or one that
+        ended early after errors (``discovery.scheduler``) is not stored.
+        """
+        stored_at = time.time()
+        f = tmp = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            f = os.fdopen(fd, "w")
+            f.write(f'{{"stored_at": {stored_at!r}, "items": [')
+        except OSError as e:
+            logger.warning(f"Could not write discovery cache for {key}: {e}")
+        separator = ""
+        completed = False
+        try:
+            for item in items:
+                plain = to_plain(item)
+                if f is not None:
+                    try:
+                        f.write(separator + json.dumps(plain, default=str))
+                        separator = ", "
+                    except OSError as e:
+                        logger.warning(f"Could not write discovery cache for {key}: {e}")
+                        f.close()
+                        f = None
+                yield plain
+            completed = not listing_incomplete()
+        finally:
+            try:
+                if f is not None:
+                    if completed:
+                        f.write("]}")
+                    f.close()
+                    if completed:
+                        os.replace(tmp, self._path(key))
+            except OSError as e:
+                logger.warning(f"Could not write discovery cache for {key}: {e}")
+            if tmp is not None:
+                # Left over unless renamed into place above
+                Path(tmp).unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def wrap(self, task: DiscoveryTask) -> DiscoveryTask:
+        """Return a task that serves ``task`` from the cache and stores fresh results."""
+        func = task.func
+
+        def key(args) -> str:
+            return task.cache_key(*args) if task.cache_key else task.name
+
+        if asyncio.iscoroutinefunction(func):
+            async def cached(*args):
+                items = self.get(key(args))
+                if items is None:
+                    items = await func(*args)
+                    # Incomplete results are served once but not cached
+                    if not listing_incomplete():
+                        items = self.put(key(args), items)
+                return items
+        else:
+            def cached(*args):
+                items = self.get(key(args))
+                if items is None:
+                    # Streamed through to the caller, written as it goes
+                    return self.stream(key(args), func(*args))
+                return items
+
+        return replace(task, func=cached)
+
+    def wrap_tasks(self, tasks: Sequence[DiscoveryTask]) -> List[DiscoveryTask]:
+        return [self.wrap(task) for task in tasks]
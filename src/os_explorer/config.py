@@ -1,8 +1,19 @@
 import os
-import openstack
-from typing import Optional
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    # openstacksdk takes a third of a second to import; commands that never
+    # connect (e.g. rendering a graph file) should not pay for it
+    import openstack
+
+# Connections kept per host by the shared HTTP pool; sized for the discovery
+# executor and fan-out workers all talking to the same endpoints at once.
+DEFAULT_HTTP_POOL_SIZE = 64
+
+ConnectionKey = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
 @dataclass
 class Config:
     cloud_name: str
@@ -10,16 +21,31 @@ class Config:
     config_file: Optional[str] = None
     project_id: Optional[str] = None
     debug: bool = False
-    
+
+    @property
+    def key(self) -> ConnectionKey:
+        return (self.cloud_name, self.region_name, self.project_id, self.config_file)
+
+    @property
+    def connection(self) -> "openstack.connection.Connection":
+        """A pooled connection; see ``ConnectionPool``."""
+        return CONNECTIONS.get(self)
+
     @property
-    def connection(self) -> openstack.connection.Connection:
+    def project_name(self) -> Optional[str]:
+        return CONNECTIONS.project_name(self)
+
+    def connect(self) -> "openstack.connection.Connection":
+        """A new, unpooled connection."""
+        import openstack
+
         kwargs = {}
         if self.config_file:
             kwargs["config_files"] = [self.config_file]
-        
+
         # If project_id is provided, we might need to override the auth parameters
         # However, openstack.connect usually takes project_id as an argument to scope the connection
-        # But it depends on how the cloud is configured. 
+        # But it depends on how the cloud is configured.
         # If we want to switch project, we usually pass project_id to connect().
         if self.project_id:
             kwargs["project_id"] = self.project_id
@@ -30,12 +56,105 @@ class Config:
             **kwargs
         )
 
+@dataclass
+class _Pooled:
+    connection: Any
+    project_name: Optional[str] = None
+    project_name_loaded: bool = False
+
+class ConnectionPool:
+    """
+    Connections shared per (cloud, region, project, config file).
+
+    A connection keeps its Keystone token and service catalog; keystoneauth
+    re-authenticates on its own shortly before the token expires (or on a
+    401), so reusing one connection means no auth round trips until then.
+    All discovery workers use the connection's single HTTP session, whose
+    per-host pool is enlarged to ``http_pool_size`` so concurrent requests
+    reuse sockets instead of opening (and discarding) extra ones.
+    """
+
+    def __init__(self, connect: Optional[Callable[[Config], Any]] = None, http_pool_size: int = DEFAULT_HTTP_POOL_SIZE):
+        self._connect = connect or Config.connect
+        self.http_pool_size = http_pool_size
+        self._entries: Dict[ConnectionKey, _Pooled] = {}
+        self._locks: Dict[ConnectionKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key_lock(self, key: ConnectionKey) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _entry(self, config: Config) -> _Pooled:
+        key = config.key
+        entry = self._entries.get(key)
+        if entry is None:
+            # One connect per key even when several threads ask at once
+            with self._key_lock(key):
+                entry = self._entries.get(key)
+                if entry is None:
+                    connection = self._connect(config)
+                    self._share_http_pool(connection)
+                    entry = self._entries[key] = _Pooled(connection)
+                    with self._lock:
+                        self.misses += 1
+                    return entry
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def get(self, config: Config) -> "openstack.connection.Connection":
+        return self._entry(config).connection
+
+    def project_name(self, config: Config) -> Optional[str]:
+        """Name of the connection's project, looked up once per connection."""
+        entry = self._entry(config)
+        if not entry.project_name_loaded:
+            conn = entry.connection
+            project = conn.current_project
+            entry.project_name = project.name if project else conn.current_project_id
+            entry.project_name_loaded = True
+        return entry.project_name
+
+    def _share_http_pool(self, connection: Any) -> None:
+        session = getattr(getattr(connection, "session", None), "session", None)
+        if session is None or not hasattr(session, "mount"):
+            return
+        try:
+            from keystoneauth1.session import TCPKeepAliveAdapter as HTTPAdapter
+        except ImportError:  # pragma: no cover - keystoneauth always ships with openstacksdk
+            from requests.adapters import HTTPAdapter
+        adapter = HTTPAdapter(pool_maxsize=self.http_pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def invalidate(self, config: Optional[Config] = None) -> None:
+        """Drop one pooled connection (or all); the next ``get`` connects again."""
+        with self._lock:
+            entries = list(self._entries) if config is None else [config.key]
+            for key in entries:
+                entry = self._entries.pop(key, None)
+                if entry is not None and hasattr(entry.connection, "close"):
+                    entry.connection.close()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"connections": len(self._entries), "hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate, 3)}
+
+CONNECTIONS = ConnectionPool()
+
 def load_config(cloud: str, region: Optional[str] = None, config_file: Optional[str] = None, project_id: Optional[str] = None, debug: bool = False) -> Config:
     """Load configuration from arguments and environment."""
     # If cloud is not provided, try to get from env
     if not cloud:
         cloud = os.environ.get("OS_CLOUD")
-        
+
     if not cloud:
         # Fallback or error handling could go here, but for now we expect cloud name
         pass
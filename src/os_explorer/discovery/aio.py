@@ -0,0 +1,404 @@
+"""
+Asyncio discovery backend.
+
+Talks to the service endpoints from the Keystone catalog directly with one
+pooled HTTP client instead of going through the blocking openstacksdk
+proxies, so a single event loop can keep many list calls in flight.
+Authentication and endpoint lookup still use the SDK connection, once, in a
+worker thread. Resources are returned as plain dicts using the same field
+names the SDK backend exposes to ``GraphBuilder``.
+
+openstacksdk is imported once a discovery runs, so ``is_available`` is a
+cheap check.
+"""
+import asyncio
+import logging
+from abc import ABC
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from .pushdown import DiscoveryQuery, IMAGE_ID_BATCH, image_ids
+from .scheduler import Scheduler, record_incomplete, track_incomplete
+from ..metrics import METRICS, record_page
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+if TYPE_CHECKING:
+    import openstack
+
+DEFAULT_MAX_IN_FLIGHT = 100
+
+# Connection attribute used to resolve each service's versioned endpoint
+SERVICE_PROXIES = {
+    "compute": "compute",
+    "network": "network",
+    "block-storage": "block_storage",
+    "load-balancer": "load_balancer",
+    "image": "image",
+    "dns": "dns",
+    "orchestration": "orchestration",
+}
+
+def is_available() -> bool:
+    return httpx is not None
+
+class AsyncApiClient:
+    """Pooled async HTTP client bound to one authenticated SDK connection."""
+
+    def __init__(self, conn: "openstack.connection.Connection", max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, timeout: float = 60.0, scheduler: Optional[Scheduler] = None):
+        if httpx is None:
+            raise RuntimeError("The async backend requires httpx: pip install 'os-explorer[async]'")
+        self.conn = conn
+        self.max_in_flight = max(1, max_in_flight)
+        # Per-service limits and retries of every request (page)
+        self.scheduler = scheduler or Scheduler(self.max_in_flight)
+        self._endpoints: Dict[str, Optional[str]] = {}
+        self._auth_headers: Dict[str, str] = {}
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight),
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"Accept": "application/json"},
+        )
+
+    async def __aenter__(self) -> "AsyncApiClient":
+        await self.authenticate()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client.aclose()
+
+    async def authenticate(self) -> None:
+        """Fetch a token and resolve all service endpoints (blocking SDK calls run in a thread)."""
+        def resolve():
+            headers = self.conn.session.get_auth_headers() or {}
+            endpoints = {}
+            for service_type, attr in SERVICE_PROXIES.items():
+                try:
+                    endpoints[service_type] = getattr(self.conn, attr).get_endpoint()
+                except Exception:
+                    # Missing from the catalog; discovery for it returns nothing
+                    endpoints[service_type] = None
+            return headers, endpoints
+
+        self._auth_headers, self._endpoints = await asyncio.to_thread(resolve)
+
+    def endpoint(self, service_type: str) -> Optional[str]:
+        return self._endpoints.get(service_type)
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, service_type: str = "") -> Dict[str, Any]:
+        async def get() -> Dict[str, Any]:
+            async with self._semaphore:
+                response = await self._client.get(url, params=params, headers=self._auth_headers)
+            record_page(len(response.content))
+            response.raise_for_status()
+            return response.json()
+
+        return await self.scheduler.acall(service_type, get)
+
+    async def list(self, service_type: str, path: str, resources_key: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """List a collection, following pagination links until exhausted."""
+        import openstack
+        from .base import next_page_url
+
+        endpoint = self.endpoint(service_type)
+        if not endpoint:
+            raise openstack.exceptions.EndpointNotFound(f"No endpoint for {service_type}")
+
+        url = f"{endpoint.rstrip('/')}/{path.lstrip('/')}"
+        items: List[Dict[str, Any]] = []
+        while url:
+            body = await self.get_json(url, params=params, service_type=service_type)
+            items.extend(body.get(resources_key) or [])
+            # The next link already carries the query string
+            params = None
+            url = next_page_url(body, resources_key, endpoint)
+        return items
+
+class AsyncDiscoveryBase(ABC):
+    """Async counterpart of ``DiscoveryBase``."""
+
+    service_type: str = ""
+
+    def __init__(self, client: AsyncApiClient, project_id: str, logger: logging.Logger, query: Optional[DiscoveryQuery] = None):
+        self.client = client
+        self.project_id = project_id
+        self.logger = logger
+        self.query = query or DiscoveryQuery()
+
+    async def list_resources(self) -> Dict[str, Iterable[Any]]:
+        """
+        Return per-service lists.
+        Must not raise on missing service, returns empty list instead.
+        """
+        return {}
+
+    async def _safe_list(self, path: str, resources_key: str, params: Optional[Dict[str, Any]] = None, renames: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """Safely list a collection, handling missing services or permissions."""
+        import openstack
+
+        with METRICS.call(self.service_type, resources_key) as call:
+            try:
+                items = await self.client.list(self.service_type, path, resources_key, params=params)
+            except openstack.exceptions.EndpointNotFound as e:
+                call.error = e
+                self.logger.warning(f"Service unavailable for {path}")
+                return []
+            except httpx.HTTPStatusError as e:
+                call.error = e
+                if e.response.status_code == 404:
+                    self.logger.warning(f"Service unavailable for {path}")
+                    return []
+                if e.response.status_code == 403:
+                    self.logger.warning(f"Permission denied for {path}")
+                else:
+                    self.logger.error(f"Error in {path}: {e}")
+                record_incomplete()
+                return []
+            except Exception as e:
+                call.error = e
+                self.logger.error(f"Error in {path}: {e}")
+                record_incomplete()
+                return []
+            call.items = len(items)
+        if renames:
+            # Align raw API field names with the SDK attribute names
+            for item in items:
+                for raw, name in renames.items():
+                    if raw in item:
+                        item[name] = item.pop(raw)
+        return items
+
+    async def _fan_out(self, list_func, parents: Iterable[Any], parent_key: str) -> List[Any]:
+        """Await ``list_func(parent_id)`` for every parent and annotate children with the parent ID.
+
+        Parents whose children could not all be listed are recorded as incomplete.
+        """
+        parent_ids = [p["id"] for p in parents]
+
+        async def fetch(parent_id: str) -> Tuple[List[Any], bool]:
+            with track_incomplete() as incomplete:
+                children = await list_func(parent_id)
+            for child in children:
+                child[parent_key] = parent_id
+            return children, bool(incomplete)
+
+        batches = await asyncio.gather(*(fetch(pid) for pid in parent_ids))
+        for parent_id, (_, incomplete) in zip(parent_ids, batches):
+            if incomplete:
+                record_incomplete(parent_id)
+        return [child for batch, _ in batches for child in batch]
+
+class AsyncComputeDiscovery(AsyncDiscoveryBase):
+    service_type = "compute"
+
+    async def list_servers(self) -> List[Any]:
+        self.logger.info("Discovering servers...")
+        return await self._safe_list("servers/detail", "servers", {"project_id": self.project_id, **self.query.params("servers")},
+                                     renames={"OS-EXT-AZ:availability_zone": "availability_zone"})
+
+    async def list_flavors(self) -> List[Any]:
+        self.logger.info("Discovering flavors...")
+        return await self._safe_list("flavors/detail", "flavors")
+
+    async def list_keypairs(self) -> List[Any]:
+        self.logger.info("Discovering keypairs...")
+        # Nova wraps each entry as {"keypair": {...}}
+        return [k.get("keypair", k) for k in await self._safe_list("os-keypairs", "keypairs")]
+
+    async def list_server_groups(self) -> List[Any]:
+        self.logger.info("Discovering server groups...")
+        return await self._safe_list("os-server-groups", "server_groups")
+
+    async def list_resources(self) -> Dict[str, Iterable[Any]]:
+        servers, flavors, keypairs, server_groups = await asyncio.gather(
+            self.list_servers(), self.list_flavors(), self.list_keypairs(), self.list_server_groups())
+        return {
+            "servers": servers,
+            "flavors": flavors,
+            "keypairs": keypairs,
+            "server_groups": server_groups
+        }
+
+class AsyncNetworkDiscovery(AsyncDiscoveryBase):
+    service_type = "network"
+
+    async def list_networks(self) -> List[Any]:
+        self.logger.info("Discovering networks...")
+        return await self._safe_list("networks", "networks", {"project_id": self.project_id, **self.query.params("networks")})
+
+    async def list_subnets(self) -> List[Any]:
+        self.logger.info("Discovering subnets...")
+        return await self._safe_list("subnets", "subnets", {"project_id": self.project_id, **self.query.params("subnets")})
+
+    async def list_ports(self) -> List[Any]:
+        self.logger.info("Discovering ports...")
+        return await self._safe_list("ports", "ports", {"project_id": self.project_id, **self.query.params("ports")})
+
+    async def list_routers(self) -> List[Any]:
+        self.logger.info("Discovering routers...")
+        return await self._safe_list("routers", "routers", {"project_id": self.project_id, **self.query.params("routers")})
+
+    async def list_security_groups(self) -> List[Any]:
+        self.logger.info("Discovering security groups...")
+        return await self._safe_list("security-groups", "security_groups", {"project_id": self.project_id, **self.query.params("security_groups")})
+
+    async def list_floating_ips(self) -> List[Any]:
+        self.logger.info("Discovering floating IPs...")
+        return await self._safe_list("floatingips", "floatingips", {"project_id": self.project_id, **self.query.params("floating_ips")})
+
+    async def list_resources(self) -> Dict[str, Iterable[Any]]:
+        networks, subnets, ports, routers, sgs, fips = await asyncio.gather(
+            self.list_networks(), self.list_subnets(), self.list_ports(),
+            self.list_routers(), self.list_security_groups(), self.list_floating_ips())
+        return {
+            "networks": networks,
+            "subnets": subnets,
+            "ports": ports,
+            "routers": routers,
+            "security_groups": sgs,
+            "floating_ips": fips
+        }
+
+class AsyncBlockStorageDiscovery(AsyncDiscoveryBase):
+    service_type = "block-storage"
+
+    async def list_volumes(self) -> List[Any]:
+        self.logger.info("Discovering volumes...")
+        return await self._safe_list("volumes/detail", "volumes", {"project_id": self.project_id, **self.query.params("volumes")})
+
+    async def list_snapshots(self) -> List[Any]:
+        self.logger.info("Discovering snapshots...")
+        return await self._safe_list("snapshots/detail", "snapshots", {"project_id": self.project_id, **self.query.params("snapshots")})
+
+    async def list_backups(self) -> List[Any]:
+        self.logger.info("Discovering backups...")
+        return await self._safe_list("backups/detail", "backups", {"project_id": self.project_id})
+
+    async def list_resources(self) -> Dict[str, Iterable[Any]]:
+        volumes, snapshots, backups = await asyncio.gather(
+            self.list_volumes(), self.list_snapshots(), self.list_backups())
+        return {
+            "volumes": volumes,
+            "snapshots": snapshots,
+            "backups": backups
+        }
+
+class AsyncLoadBalancerDiscovery(AsyncDiscoveryBase):
+    service_type = "load-balancer"
+
+    async def list_load_balancers(self) -> List[Any]:
+        self.logger.info("Discovering load balancers...")
+        return await self._safe_list("lbaas/loadbalancers", "loadbalancers", {"project_id": self.project_id, **self.query.params("load_balancers")})
+
+    async def list_listeners(self) -> List[Any]:
+        self.logger.info("Discovering listeners...")
+        return await self._safe_list("lbaas/listeners", "listeners", {"project_id": self.project_id, **self.query.params("listeners")},
+                                     renames={"loadbalancers": "load_balancers"})
+
+    async def list_pools(self) -> List[Any]:
+        self.logger.info("Discovering pools...")
+        return await self._safe_list("lbaas/pools", "pools", {"project_id": self.project_id, **self.query.params("pools")},
+                                     renames={"loadbalancers": "load_balancers"})
+
+    async def list_members(self, pool_id: str) -> List[Any]:
+        self.logger.info(f"Discovering members for pool {pool_id}...")
+        return await self._safe_list(f"lbaas/pools/{pool_id}/members", "members", self.query.params("members"))
+
+    async def list_all_members(self, pools: Iterable[Any]) -> List[Any]:
+        return await self._fan_out(self.list_members, pools, "pool_id")
+
+    async def list_l7_policies(self) -> List[Any]:
+        self.logger.info("Discovering L7 policies...")
+        return await self._safe_list("lbaas/l7policies", "l7policies", {"project_id": self.project_id, **self.query.params("l7_policies")})
+
+    async def list_l7_rules(self, policy_id: str) -> List[Any]:
+        self.logger.info(f"Discovering rules for policy {policy_id}...")
+        return await self._safe_list(f"lbaas/l7policies/{policy_id}/rules", "rules", self.query.params("l7_rules"))
+
+    async def list_all_l7_rules(self, policies: Iterable[Any]) -> List[Any]:
+        return await self._fan_out(self.list_l7_rules, policies, "l7_policy_id")
+
+    async def list_health_monitors(self) -> List[Any]:
+        self.logger.info("Discovering health monitors...")
+        return await self._safe_list("lbaas/healthmonitors", "healthmonitors", {"project_id": self.project_id, **self.query.params("health_monitors")})
+
+    async def list_resources(self) -> Dict[str, Iterable[Any]]:
+        lbs, listeners, pools, monitors, policies = await asyncio.gather(
+            self.list_load_balancers(), self.list_listeners(), self.list_pools(),
+            self.list_health_monitors(), self.list_l7_policies())
+        members, rules = await asyncio.gather(self.list_all_members(pools), self.list_all_l7_rules(policies))
+        return {
+            "load_balancers": lbs,
+            "listeners": listeners,
+            "pools": pools,
+            "members": members,
+            "health_monitors": monitors,
+            "l7_policies": policies,
+            "l7_rules": rules
+        }
+
+class AsyncImageDiscovery(AsyncDiscoveryBase):
+    service_type = "image"
+
+    async def list_images(self, servers: Optional[List[Any]] = None) -> List[Any]:
+        """All visible images, or with ``servers`` only the ones they were booted from."""
+        self.logger.info("Discovering images...")
+        if servers is None:
+            return await self._safe_list("images", "images")
+        ids = image_ids(servers)
+        batches = await asyncio.gather(*(
+            self._safe_list("images", "images", {"id": f"in:{','.join(ids[start:start + IMAGE_ID_BATCH])}"})
+            for start in range(0, len(ids), IMAGE_ID_BATCH)))
+        return [image for batch in batches for image in batch]
+
+    async def list_resources(self) -> Dict[str, Iterable[Any]]:
+        return {
+            "images": await self.list_images()
+        }
+
+class AsyncDNSDiscovery(AsyncDiscoveryBase):
+    service_type = "dns"
+
+    async def list_zones(self) -> List[Any]:
+        self.logger.info("Discovering zones...")
+        return await self._safe_list("zones", "zones")
+
+    async def list_recordsets(self, zone_id: str) -> List[Any]:
+        self.logger.info(f"Discovering recordsets for zone {zone_id}...")
+        return await self._safe_list(f"zones/{zone_id}/recordsets", "recordsets")
+
+    async def list_all_recordsets(self, zones: Iterable[Any]) -> List[Any]:
+        return await self._fan_out(self.list_recordsets, zones, "zone_id")
+
+    async def list_resources(self) -> Dict[str, Iterable[Any]]:
+        zones = await self.list_zones()
+        return {
+            "zones": zones,
+            "recordsets": await self.list_all_recordsets(zones)
+        }
+
+class AsyncHeatDiscovery(AsyncDiscoveryBase):
+    service_type = "orchestration"
+
+    async def list_stacks(self) -> List[Any]:
+        self.logger.info("Discovering stacks...")
+        return await self._safe_list("stacks", "stacks")
+
+    async def list_stack_resources(self, stack_id: str) -> List[Any]:
+        self.logger.info(f"Discovering resources for stack {stack_id}...")
+        # Heat redirects /stacks/<id> to /stacks/<name>/<id>
+        return await self._safe_list(f"stacks/{stack_id}/resources", "resources")
+
+    async def list_all_stack_resources(self, stacks: Iterable[Any]) -> List[Any]:
+        return await self._fan_out(self.list_stack_resources, stacks, "stack_id")
+
+    async def list_resources(self) -> Dict[str, Iterable[Any]]:
+        stacks = await self.list_stacks()
+        return {
+            "stacks": stacks,
+            "stack_resources": await self.list_all_stack_resources(stacks)
+        }
@@ -1,13 +1,54 @@
 import logging
 import openstack
-from typing import Dict, Iterable, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Any, List, Optional, Tuple
+from urllib.parse import urljoin
 from abc import ABC
 
+from .pushdown import DiscoveryQuery
+from .scheduler import Scheduler, record_incomplete, track_incomplete
+from ..metrics import METRICS
+from ..utils.resource import get_field, set_field
+
+DEFAULT_FANOUT_WORKERS = 8
+
+def next_page_url(body: Dict[str, Any], resources_key: str, endpoint: str) -> Optional[str]:
+    """Next-page link of a raw list response, for every pagination style in use."""
+    # Nova, Neutron, Cinder and Octavia: "<resources>_links": [{"rel": "next", ...}]
+    for link in body.get(f"{resources_key}_links") or []:
+        if link.get("rel") == "next":
+            return link.get("href")
+    # Glance: "next": "/v2/images?marker=..."
+    if isinstance(body.get("next"), str):
+        return urljoin(endpoint, body["next"])
+    # Designate and Heat: "links": {"next": "..."} or [{"rel": "next", ...}]
+    links = body.get("links")
+    if isinstance(links, dict):
+        return links.get("next")
+    for link in links or []:
+        if isinstance(link, dict) and link.get("rel") == "next":
+            return link.get("href")
+    return None
+
+def _call_name(list_func: Callable, args: tuple) -> str:
+    """Metrics label of a ``_safe_list`` call: the SDK method name, or the resources key of raw lists."""
+    if getattr(list_func, "__func__", None) is DiscoveryBase._raw_list:
+        return args[2]
+    return getattr(list_func, "__name__", "call")
+
 class DiscoveryBase(ABC):
-    def __init__(self, conn: openstack.connection.Connection, project_id: str, logger: logging.Logger):
+    # Label of this service's calls in metrics
+    service_type: str = ""
+
+    def __init__(self, conn: openstack.connection.Connection, project_id: str, logger: logging.Logger, max_workers: int = DEFAULT_FANOUT_WORKERS, query: Optional[DiscoveryQuery] = None, scheduler: Optional[Scheduler] = None):
         self.conn = conn
         self.project_id = project_id
         self.logger = logger
+        self.max_workers = max(1, max_workers)
+        # Field selection and user filters pushed into list calls
+        self.query = query or DiscoveryQuery()
+        # Per-service concurrency limits and retries; share one across discoverers
+        self.scheduler = scheduler or Scheduler(self.max_workers)
 
     def list_resources(self) -> Dict[str, Iterable[Any]]:
         """
@@ -16,16 +57,100 @@ class DiscoveryBase(ABC):
         """
         return {}
 
-    def _safe_list(self, list_func, *args, **kwargs) -> Iterable[Any]:
-        """Helper to safely list resources, handling missing services or permissions."""
-        try:
-            return list_func(*args, **kwargs)
-        except (openstack.exceptions.EndpointNotFound, openstack.exceptions.ServiceDiscoveryException):
+    def _safe_list(self, list_func, *args, **kwargs) -> List[Any]:
+        """
+        Helper to safely list resources, handling missing services or permissions.
+
+        Runs through the scheduler, so throttling and transient errors are
+        retried; a listing that still fails is recorded as incomplete.
+        """
+        with METRICS.call(self.service_type, _call_name(list_func, args)) as call:
+            try:
+                # SDK list calls are lazy generators; materialize them here so
+                # errors raised while paging are handled below.
+                items = self.scheduler.call(self.service_type, lambda: list(list_func(*args, **kwargs)))
+            except Exception as e:
+                self._list_failed(list_func, call, e)
+                return []
+            call.items = len(items)
+            return items
+
+    def _iter_list(self, list_func, *args, **kwargs) -> Iterator[Any]:
+        """
+        Streaming ``_safe_list``: yield items as the pages arrive.
+
+        Nothing is listed until iteration starts. A retried listing starts
+        over, skipping the items (by ID) already yielded. An error that is
+        not retried ends the listing (the items already yielded stay valid)
+        and is handled like in ``_safe_list``. The call's recorded time
+        includes the time the consumer spends between items.
+        """
+        with METRICS.call(self.service_type, _call_name(list_func, args)) as call:
+            try:
+                for item in self.scheduler.iterate(self.service_type, lambda: list_func(*args, **kwargs), lambda item: get_field(item, 'id')):
+                    call.items += 1
+                    yield item
+            except Exception as e:
+                self._list_failed(list_func, call, e)
+
+    def _list_failed(self, list_func, call, error: Exception) -> None:
+        call.error = error
+        if isinstance(error, (openstack.exceptions.EndpointNotFound, openstack.exceptions.ServiceDiscoveryException)):
+            # Nothing to list, the graph is complete without it
             self.logger.warning(f"Service unavailable for {list_func.__name__}")
-            return []
-        except openstack.exceptions.ForbiddenException:
+            return
+        if isinstance(error, openstack.exceptions.ForbiddenException):
             self.logger.warning(f"Permission denied for {list_func.__name__}")
+        else:
+            self.logger.error(f"Error in {list_func.__name__}: {error}")
+        record_incomplete()
+
+    def _raw_list(self, proxy: Any, path: str, resources_key: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        List a collection through the proxy's HTTP interface, following pagination.
+
+        Used for query parameters the SDK resource classes do not forward
+        (e.g. Neutron ``changed_since``, Octavia ``fields``). Items are raw API
+        dicts, yielded page by page. Wrap in ``_safe_list`` or ``_iter_list``
+        for error isolation.
+        """
+        endpoint = proxy.get_endpoint()
+        url = path
+        while url:
+            response = proxy.get(url, params=params)
+            openstack.exceptions.raise_from_response(response)
+            body = response.json()
+            yield from body.get(resources_key) or []
+            # The next link already carries the query string
+            params = None
+            url = next_page_url(body, resources_key, endpoint)
+
+    def _fan_out(self, list_func: Callable[[str], Iterable[Any]], parents: Iterable[Any], parent_key: Optional[str]) -> List[Any]:
+        """
+        Call ``list_func(parent_id)`` for every parent with bounded concurrency.
+
+        Each child is annotated with ``parent_key`` (unless None) set to its
+        parent's ID so parent/child edges can be built from the flattened list. ``list_func``
+        is expected to go through ``_safe_list`` so a failing parent only loses
+        its own children; such parents are recorded as incomplete. Results
+        keep the order of ``parents``.
+        """
+        parent_ids = [get_field(p, 'id') for p in parents]
+        if not parent_ids:
             return []
-        except Exception as e:
-            self.logger.error(f"Error in {list_func.__name__}: {e}")
-            return []
+
+        def fetch(parent_id: str) -> Tuple[List[Any], bool]:
+            with track_incomplete() as incomplete:
+                children = list(list_func(parent_id))
+            if parent_key:
+                for child in children:
+                    set_field(child, parent_key, parent_id)
+            return children, bool(incomplete)
+
+        workers = min(self.max_workers, len(parent_ids))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fanout") as pool:
+            batches = list(pool.map(fetch, parent_ids))
+        for parent_id, (_, incomplete) in zip(parent_ids, batches):
+            if incomplete:
+                record_incomplete(parent_id)
+        return [child for batch, _ in batches for child in batch]
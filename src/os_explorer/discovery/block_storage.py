@@ -2,17 +2,29 @@ from typing import Iterable, Dict, Any
 from .base import DiscoveryBase
 
 class BlockStorageDiscovery(DiscoveryBase):
+    service_type = "block-storage"
+
     def list_volumes(self) -> Iterable[Any]:
         self.logger.info("Discovering volumes...")
-        return self._safe_list(self.conn.block_storage.volumes, project_id=self.project_id)
+        return self._iter_list(self.conn.block_storage.volumes, project_id=self.project_id, **self.query.params("volumes"))
+
+    def list_volumes_changed_since(self, since: str) -> Iterable[Any]:
+        """Volumes updated since ``since``; the filter needs Cinder microversion 3.60."""
+        self.logger.info(f"Discovering volumes changed since {since}...")
+        return self._safe_list(self.conn.block_storage.volumes, project_id=self.project_id, updated_at=f"gte:{since}", **self.query.filters("volumes"))
+
+    def list_volume_ids(self) -> Iterable[str]:
+        """IDs of all volumes, from the summary (non-detailed) listing."""
+        volumes = self._safe_list(self.conn.block_storage.volumes, details=False, project_id=self.project_id)
+        return [v.id for v in volumes]
 
     def list_snapshots(self) -> Iterable[Any]:
         self.logger.info("Discovering snapshots...")
-        return self._safe_list(self.conn.block_storage.snapshots, project_id=self.project_id)
+        return self._iter_list(self.conn.block_storage.snapshots, project_id=self.project_id, **self.query.params("snapshots"))
 
     def list_backups(self) -> Iterable[Any]:
         self.logger.info("Discovering backups...")
-        return self._safe_list(self.conn.block_storage.backups, project_id=self.project_id)
+        return self._iter_list(self.conn.block_storage.backups, project_id=self.project_id)
 
     def list_resources(self) -> Dict[str, Iterable[Any]]:
         return {
@@ -2,14 +2,21 @@ from typing import Iterable, Dict, Any
 from .base import DiscoveryBase
 
 class ComputeDiscovery(DiscoveryBase):
+    service_type = "compute"
+
     def list_servers(self) -> Iterable[Any]:
         self.logger.info("Discovering servers...")
-        # Use details=True to get addresses and other metadata
-        return self._safe_list(self.conn.compute.servers, details=True, project_id=self.project_id)
+        # Use details=True to get addresses and other metadata (Nova has no field selection)
+        return self._iter_list(self.conn.compute.servers, details=True, project_id=self.project_id, **self.query.params("servers"))
+
+    def list_servers_changed_since(self, since: str) -> Iterable[Any]:
+        """Servers changed since ``since`` (ISO 8601); deleted ones are included with status DELETED."""
+        self.logger.info(f"Discovering servers changed since {since}...")
+        return self._safe_list(self.conn.compute.servers, details=True, project_id=self.project_id, changes_since=since, **self.query.filters("servers"))
 
     def list_flavors(self) -> Iterable[Any]:
         self.logger.info("Discovering flavors...")
-        return self._safe_list(self.conn.compute.flavors)
+        return self._iter_list(self.conn.compute.flavors)
 
     def list_keypairs(self) -> Iterable[Any]:
         self.logger.info("Discovering keypairs...")
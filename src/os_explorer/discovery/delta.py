@@ -0,0 +1,250 @@
+"""
+Incremental refresh of a previously discovered graph.
+
+Instead of listing every resource again, each service is asked only for what
+changed since the snapshot's ``generated_at``:
+
+* Nova: ``changes-since`` (deleted servers come back with status DELETED).
+* Neutron: ``changed_since`` plus an ``id``-only listing to spot deletions.
+* Cinder: ``updated_at`` filter plus the summary listing for deletions;
+  snapshots are small and simply re-listed.
+* Octavia: an ``id``/``updated_at``-only listing, then a GET per changed
+  resource. Members and L7 rules are re-listed under changed parents and
+  under unchanged ones whose ``id``/``updated_at`` child listing differs.
+
+The graph is patched in place: deleted nodes go away with their edges,
+changed nodes are replaced and the edges they own are rebuilt from the
+relationship registry.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from ..cache import DiscoveryCache
+from ..graph.builder import GraphBuilder, RESOURCE_TYPES
+from ..graph.index import IN, OUT
+from ..graph.model import Graph
+from ..graph.projection import DEFAULT_PROFILE
+from ..graph.relations import RELATIONS
+from ..utils.resource import get_field
+from .block_storage import BlockStorageDiscovery
+from .compute import ComputeDiscovery
+from .executor import DEFAULT_CONCURRENCY
+from .image import ImageDiscovery
+from .loadbalancer import COLLECTIONS as LB_COLLECTIONS, LoadBalancerDiscovery
+from .network import COLLECTIONS as NETWORK_COLLECTIONS, NetworkDiscovery
+from .pushdown import images_cache_key
+
+# Subtracted from the snapshot time to absorb clock skew between us and the APIs
+SKEW_SECONDS = 60
+
+# Child result key -> (parent result key, parent -> child edge type)
+CHILDREN = {
+    "members": ("pools", "has_member"),
+    "l7_rules": ("l7_policies", "has_rule"),
+}
+
+@dataclass
+class Delta:
+    """Changes for one result key: new or updated items and deleted IDs."""
+    changed: List[Any] = field(default_factory=list)
+    deleted: Set[str] = field(default_factory=set)
+
+def since_timestamp(generated_at: str, skew: float = SKEW_SECONDS) -> str:
+    """ISO 8601 UTC timestamp to query changes from, given a graph's ``generated_at``."""
+    snapshot = datetime.fromisoformat(generated_at.replace("Z", ""))
+    return (snapshot - timedelta(seconds=skew)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class DeltaRefresher:
+    def __init__(self, graph: Graph, compute: ComputeDiscovery, network: NetworkDiscovery,
+                 storage: BlockStorageDiscovery, lb: LoadBalancerDiscovery, image: ImageDiscovery,
+                 logger: logging.Logger, cache: Optional[DiscoveryCache] = None, max_workers: int = DEFAULT_CONCURRENCY,
+                 meta_profile: str = DEFAULT_PROFILE):
+        self.graph = graph
+        self.compute = compute
+        self.network = network
+        self.storage = storage
+        self.lb = lb
+        self.image = image
+        self.logger = logger
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+        self.meta_profile = meta_profile
+
+    def _known_ids(self, key: str) -> Set[str]:
+        return set(self.graph.index.node_ids(RESOURCE_TYPES[key]))
+
+    def _is_newer(self, key: str, item_id: str, updated_at: Any) -> bool:
+        node = self.graph.get_node(item_id)
+        return node is None or node.type != RESOURCE_TYPES[key] or get_field(node.meta, 'updated_at') != updated_at
+
+    # Per-service change queries
+
+    def servers_delta(self, since: str) -> Delta:
+        delta = Delta()
+        for server in self.compute.list_servers_changed_since(since):
+            if get_field(server, 'status') == "DELETED":
+                delta.deleted.add(get_field(server, 'id'))
+            else:
+                delta.changed.append(server)
+        return delta
+
+    def network_delta(self, key: str, since: str) -> Delta:
+        changed = list(self.network.list_changed_since(key, since))
+        ids = set(self.network.list_ids(key))
+        if not ids and self._known_ids(key):
+            # An empty listing is more likely an error than a mass deletion
+            return Delta(changed=changed)
+        return Delta(changed=changed, deleted=self._known_ids(key) - ids)
+
+    def volumes_delta(self, since: str) -> Delta:
+        changed = list(self.storage.list_volumes_changed_since(since))
+        ids = set(self.storage.list_volume_ids())
+        if not ids and self._known_ids("volumes"):
+            return Delta(changed=changed)
+        return Delta(changed=changed, deleted=self._known_ids("volumes") - ids)
+
+    def snapshots_delta(self) -> Delta:
+        snapshots = list(self.storage.list_snapshots())
+        if not snapshots:
+            return Delta()
+        changed = [s for s in snapshots if self._is_newer("snapshots", get_field(s, 'id'), get_field(s, 'updated_at'))]
+        current = {get_field(s, 'id') for s in snapshots}
+        return Delta(changed=changed, deleted=self._known_ids("snapshots") - current)
+
+    def load_balancer_delta(self, key: str) -> Delta:
+        times = self.lb.list_update_times(key)
+        if not times:
+            return Delta()
+        stale = [item_id for item_id, updated_at in times.items() if self._is_newer(key, item_id, updated_at)]
+        return Delta(changed=list(self.lb.get_resources(key, stale)), deleted=self._known_ids(key) - set(times))
+
+    def _dirty_parents(self, key: str, parent_ids: List[str]) -> List[str]:
+        """Parents whose children were added, removed or updated, from a cheap per-parent listing."""
+        edge_type = CHILDREN[key][1]
+
+        def is_dirty(parent_id: str) -> bool:
+            times = self.lb.list_child_update_times(key, parent_id)
+            if set(times) != set(self.graph.neighbor_ids(parent_id, edge_type)):
+                return True
+            return any(self._is_newer(key, child_id, updated_at) for child_id, updated_at in times.items())
+
+        if not parent_ids:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(parent_ids)), thread_name_prefix="children") as pool:
+            return [p for p, dirty in zip(parent_ids, pool.map(is_dirty, parent_ids)) if dirty]
+
+    def children_delta(self, key: str, parents: Delta) -> Delta:
+        """Re-list members/L7 rules under changed or dirty parents; children of deleted parents go too."""
+        parent_key, edge_type = CHILDREN[key]
+        list_children = self.lb.list_all_members if key == "members" else self.lb.list_all_l7_rules
+        changed_ids = [get_field(p, 'id') for p in parents.changed]
+        unchanged = sorted(self._known_ids(parent_key) - parents.deleted - set(changed_ids))
+        relist = changed_ids + self._dirty_parents(key, unchanged)
+        changed = list(list_children([{"id": parent_id} for parent_id in relist]))
+
+        old = set()
+        for parent_id in list(parents.deleted) + relist:
+            old.update(self.graph.neighbor_ids(parent_id, edge_type))
+        return Delta(changed=changed, deleted=old - {get_field(c, 'id') for c in changed})
+
+    def collect(self, since: str) -> Dict[str, Delta]:
+        """Run all change queries concurrently."""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="delta") as pool:
+            futures = {
+                "servers": pool.submit(self.servers_delta, since),
+                "volumes": pool.submit(self.volumes_delta, since),
+                "snapshots": pool.submit(self.snapshots_delta),
+            }
+            for key in NETWORK_COLLECTIONS:
+                futures[key] = pool.submit(self.network_delta, key, since)
+            for key in LB_COLLECTIONS:
+                futures[key] = pool.submit(self.load_balancer_delta, key)
+            deltas = {key: future.result() for key, future in futures.items()}
+
+            children = {key: pool.submit(self.children_delta, key, deltas[parent_key])
+                        for key, (parent_key, _) in CHILDREN.items()}
+            deltas.update({key: future.result() for key, future in children.items()})
+        return deltas
+
+    def _server_lookups(self, servers: List[Any]) -> Dict[str, List[Any]]:
+        """Flavors and the images of ``servers`` for enriching them, from the cache when fresh."""
+        lookups = {}
+        # Keyed like the full discovery's tasks so both share cache entries
+        for key, cache_key, list_func in (("flavors", "flavors", self.compute.list_flavors),
+                                          ("images", images_cache_key(servers), lambda: self.image.list_images(servers))):
+            items = self.cache.get(cache_key) if self.cache else None
+            if items is None:
+                items = list(list_func())
+                if self.cache:
+                    items = self.cache.put(cache_key, items)
+            lookups[key] = items
+        return lookups
+
+    # Patching
+
+    def apply(self, deltas: Dict[str, Delta]) -> Dict[str, int]:
+        """Patch the graph with ``deltas`` and return per-change counts."""
+        graph = self.graph
+        deleted = set().union(*(d.deleted for d in deltas.values()))
+        graph.remove_nodes(deleted)
+
+        # Edges owned by a changed resource are rebuilt from its new body
+        owned = []
+        for key, delta in deltas.items():
+            node_type = RESOURCE_TYPES[key]
+            relations = [r for r in RELATIONS if r.source == node_type]
+            for item in delta.changed:
+                item_id = get_field(item, 'id')
+                for relation in relations:
+                    owned.extend(graph.edges_of(item_id, relation.edge_type, IN if relation.inverse else OUT))
+        graph.remove_edges(owned)
+
+        new_ids: Dict[str, Set[str]] = {}
+        for key, delta in deltas.items():
+            node_type = RESOURCE_TYPES[key]
+            new_ids[node_type] = {get_field(i, 'id') for i in delta.changed} - set(graph.index.node_ids(node_type))
+
+        builder = GraphBuilder(graph.project_id, graph.project_name, graph=graph, meta_profile=self.meta_profile)
+        if deltas.get("servers") and deltas["servers"].changed:
+            for key, items in self._server_lookups(deltas["servers"].changed).items():
+                builder.add_resources(key, items)
+        for key, delta in deltas.items():
+            if delta.changed:
+                builder.add_resources(key, delta.changed)
+        builder.link_resources()
+
+        self._link_unchanged_to_new(deltas, new_ids)
+
+        return {
+            "changed": sum(len(d.changed) for d in deltas.values()),
+            "deleted": len(deleted),
+            "edges_rebuilt": len(owned),
+        }
+
+    def _link_unchanged_to_new(self, deltas: Dict[str, Delta], new_ids: Dict[str, Set[str]]):
+        """Add edges from unchanged resources to newly created targets."""
+        graph = self.graph
+        changed_ids = {get_field(i, 'id') for d in deltas.values() for i in d.changed}
+        for relation in RELATIONS:
+            targets = new_ids.get(relation.target)
+            if not targets:
+                continue
+            for node in graph.nodes_of_type(relation.source):
+                if node.id in changed_ids:
+                    continue
+                for ref, meta in relation.references(node.meta):
+                    if ref in targets:
+                        graph.add_edge(relation.edge(node.id, ref, meta))
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the graph up to date and move its ``generated_at`` to the start of this refresh."""
+        started = datetime.utcnow().isoformat()
+        since = since_timestamp(self.graph.generated_at)
+        self.logger.info(f"Refreshing graph with changes since {since}...")
+        stats = self.apply(self.collect(since))
+        self.graph.generated_at = started
+        self.logger.info(f"Refresh done: {stats['changed']} changed, {stats['deleted']} deleted")
+        return stats
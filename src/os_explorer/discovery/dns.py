@@ -2,6 +2,8 @@ from typing import Iterable, Dict, Any
 from .base import DiscoveryBase
 
 class DNSDiscovery(DiscoveryBase):
+    service_type = "dns"
+
     def list_zones(self) -> Iterable[Any]:
         self.logger.info("Discovering zones...")
         return self._safe_list(self.conn.dns.zones, project_id=self.project_id)
@@ -11,10 +13,7 @@ class DNSDiscovery(DiscoveryBase):
         return self._safe_list(self.conn.dns.recordsets, zone_id)
     
     def list_all_recordsets(self, zones: Iterable[Any]) -> Iterable[Any]:
-        recordsets = []
-        for zone in zones:
-            recordsets.extend(self.list_recordsets(zone.id))
-        return recordsets
+        return self._fan_out(self.list_recordsets, zones, "zone_id")
 
     def list_resources(self) -> Dict[str, Iterable[Any]]:
         zones = list(self.list_zones())
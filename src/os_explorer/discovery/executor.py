@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .scheduler import track_incomplete
+
+DEFAULT_CONCURRENCY = 8
+# Items per chunk handed from a streaming task to the consumer
+DEFAULT_CHUNK_SIZE = 500
+
+@dataclass
+class DiscoveryTask:
+    """A single discovery call.
+
+    ``func`` is called with the results of ``depends_on`` (in order) as
+    positional arguments once all of them have completed. With
+    ``AsyncDiscoveryExecutor`` it must be a coroutine function.
+    ``cache_key`` names the cache entry for given dependency results when
+    they change what ``func`` lists (default: ``name``).
+    """
+    name: str
+    func: Callable[..., Iterable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    cache_key: Optional[Callable[..., str]] = None
+
+def check_dependencies(tasks: Sequence[DiscoveryTask]) -> None:
+    """Raise ValueError for unknown or cyclic task dependencies."""
+    by_name = {t.name: t for t in tasks}
+    for task in tasks:
+        missing = [d for d in task.depends_on if d not in by_name]
+        if missing:
+            raise ValueError(f"Task {task.name} depends on unknown tasks: {', '.join(missing)}")
+
+    resolved = set()
+    pending = list(tasks)
+    while pending:
+        ready = [t for t in pending if all(d in resolved for d in t.depends_on)]
+        if not ready:
+            names = ", ".join(t.name for t in pending)
+            raise ValueError(f"Unresolvable task dependencies: {names}")
+        for task in ready:
+            pending.remove(task)
+            resolved.add(task.name)
+
+class DiscoveryExecutor:
+    """Run discovery tasks concurrently while honouring their dependencies.
+
+    ``incomplete`` maps the tasks whose listings ended early (see
+    ``discovery.scheduler``) to what is missing: None for the task's own
+    listing, parent IDs for child listings.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_CONCURRENCY, logger: logging.Logger = None):
+        self.max_workers = max(1, max_workers)
+        self.logger = logger or logging.getLogger(__name__)
+        self.incomplete: Dict[str, List[Optional[str]]] = {}
+
+    def _call(self, task: DiscoveryTask, args: Sequence[List[Any]]) -> List[Any]:
+        with track_incomplete() as incomplete:
+            try:
+                return list(task.func(*args))
+            except Exception as e:
+                # Discovery classes already isolate API errors; this only guards
+                # against bugs so one task cannot abort the whole run.
+                self.logger.error(f"Discovery task {task.name} failed: {e}")
+                incomplete.append(None)
+                return []
+            finally:
+                if incomplete:
+                    self.incomplete[task.name] = incomplete
+
+    def run(self, tasks: Sequence[DiscoveryTask]) -> Iterator[Tuple[str, List[Any]]]:
+        """Yield ``(name, items)`` for every task in completion order."""
+        check_dependencies(tasks)
+        results: Dict[str, List[Any]] = {}
+        pending = list(tasks)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="discovery") as pool:
+            while pending or running:
+                for task in [t for t in pending if all(d in results for d in t.depends_on)]:
+                    pending.remove(task)
+                    args = [results[d] for d in task.depends_on]
+                    running[pool.submit(self._call, task, args)] = task
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    results[task.name] = future.result()
+                    yield task.name, results[task.name]
+
+    def stream(self, tasks: Sequence[DiscoveryTask], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, List[Any], bool]]:
+        """
+        Yield ``(name, chunk, finished)`` while tasks are still listing.
+
+        Each task's iterable is consumed on a worker thread and handed over
+        in chunks of up to ``chunk_size`` items; ``finished`` is set on the
+        last chunk of a task (which may be empty). Chunks pass through a
+        bounded queue, so workers wait while the consumer is behind instead
+        of buffering whole result sets. Only the results of tasks others
+        depend on are collected, and released once their dependents started.
+        """
+        check_dependencies(tasks)
+        chunk_size = max(1, chunk_size)
+        dependents: Dict[str, int] = {}
+        for task in tasks:
+            for dependency in task.depends_on:
+                dependents[dependency] = dependents.get(dependency, 0) + 1
+        events: "queue.Queue[Tuple[str, List[Any], bool]]" = queue.Queue(maxsize=2 * self.max_workers)
+        stop = threading.Event()
+
+        def put(event: Tuple[str, List[Any], bool]) -> bool:
+            while not stop.is_set():
+                try:
+                    events.put(event, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce(task: DiscoveryTask, args: Sequence[List[Any]]) -> None:
+            chunk: List[Any] = []
+            incomplete: List[Optional[str]] = []
+            listed = False
+            try:
+                with track_incomplete() as incomplete:
+                    try:
+                        for item in task.func(*args):
+                            chunk.append(item)
+                            if len(chunk) >= chunk_size:
+                                if not put((task.name, chunk, False)):
+                                    return
+                                chunk = []
+                    except Exception as e:
+                        # Same guard as in ``_call``: keep what was listed so far
+                        self.logger.error(f"Discovery task {task.name} failed: {e}")
+                        incomplete.append(None)
+                listed = True
+            finally:
+                # Also when something else escaped: otherwise the consumer waits for this task forever
+                if not listed:
+                    incomplete.append(None)
+                if incomplete:
+                    self.incomplete[task.name] = incomplete
+                put((task.name, chunk, True))
+
+        results: Dict[str, List[Any]] = {}
+        finished = set()
+        pending = list(tasks)
+        running = 0
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="discovery")
+        try:
+            while pending or running:
+                for task in [t for t in pending if all(d in finished for d in t.depends_on)]:
+                    pending.remove(task)
+                    pool.submit(produce, task, [results[d] for d in task.depends_on])
+                    running += 1
+                    for dependency in task.depends_on:
+                        dependents[dependency] -= 1
+                        if not dependents[dependency]:
+                            del results[dependency]
+
+                name, chunk, done = events.get()
+                if name in dependents:
+                    results.setdefault(name, []).extend(chunk)
+                if done:
+                    finished.add(name)
+                    running -= 1
+                yield name, chunk, done
+        finally:
+            # Also reached when the consumer stops early: unblock the workers
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+class AsyncDiscoveryExecutor:
+    """Run async discovery tasks on the current event loop.
+
+    In-flight HTTP requests are bounded by the API client, so every task is
+    started as soon as its dependencies are available.
+    """
+
+    def __init__(self, logger: logging.Logger = None):
+        self.logger = logger or logging.getLogger(__name__)
+        # Same as ``DiscoveryExecutor.incomplete``
+        self.incomplete: Dict[str, List[Optional[str]]] = {}
+
+    async def run(self, tasks: Sequence[DiscoveryTask]) -> AsyncIterator[Tuple[str, List[Any]]]:
+        """Yield ``(name, items)`` for every task in completion order."""
+        check_dependencies(tasks)
+        futures: Dict[str, asyncio.Future] = {}
+
+        async def call(task: DiscoveryTask) -> Tuple[str, List[Any]]:
+            args = [(await futures[d])[1] for d in task.depends_on]
+            with track_incomplete() as incomplete:
+                try:
+                    return task.name, list(await task.func(*args))
+                except Exception as e:
+                    self.logger.error(f"Discovery task {task.name} failed: {e}")
+                    incomplete.append(None)
+                    return task.name, []
+                finally:
+                    if incomplete:
+                        self.incomplete[task.name] = incomplete
+
+        for task in tasks:
+            futures[task.name] = asyncio.ensure_future(call(task))
+        for next_done in asyncio.as_completed(list(futures.values())):
+            yield await next_done
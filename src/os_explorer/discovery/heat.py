@@ -2,6 +2,8 @@ from typing import Iterable, Dict, Any
 from .base import DiscoveryBase
 
 class HeatDiscovery(DiscoveryBase):
+    service_type = "orchestration"
+
     def list_stacks(self) -> Iterable[Any]:
         self.logger.info("Discovering stacks...")
         return self._safe_list(self.conn.orchestration.stacks, project_id=self.project_id)
@@ -11,10 +13,7 @@ class HeatDiscovery(DiscoveryBase):
         return self._safe_list(self.conn.orchestration.resources, stack_name_or_id)
 
     def list_all_stack_resources(self, stacks: Iterable[Any]) -> Iterable[Any]:
-        resources = []
-        for stack in stacks:
-            resources.extend(self.list_stack_resources(stack.id))
-        return resources
+        return self._fan_out(self.list_stack_resources, stacks, "stack_id")
 
     def list_resources(self) -> Dict[str, Iterable[Any]]:
         stacks = list(self.list_stacks())
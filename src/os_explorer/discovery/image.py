@@ -1,10 +1,21 @@
-from typing import Iterable, Dict, Any
+from typing import Iterable, Dict, Any, List, Optional
 from .base import DiscoveryBase
+from .pushdown import IMAGE_ID_BATCH, image_ids
 
 class ImageDiscovery(DiscoveryBase):
-    def list_images(self) -> Iterable[Any]:
+    service_type = "image"
+
+    def list_images(self, servers: Optional[List[Any]] = None) -> Iterable[Any]:
+        """All visible images, or with ``servers`` only the ones they were booted from."""
         self.logger.info("Discovering images...")
-        return self._safe_list(self.conn.image.images)
+        if servers is None:
+            return self._iter_list(self.conn.image.images)
+        ids = image_ids(servers)
+        images = []
+        for start in range(0, len(ids), IMAGE_ID_BATCH):
+            batch = ids[start:start + IMAGE_ID_BATCH]
+            images.extend(self._safe_list(self.conn.image.images, id=f"in:{','.join(batch)}"))
+        return images
 
     def list_resources(self) -> Dict[str, Iterable[Any]]:
         return {
@@ -1,47 +1,106 @@
 from typing import Iterable, Dict, Any
 from .base import DiscoveryBase
 
+# Discovery result key -> (Octavia collection path, response key, proxy getter)
+COLLECTIONS = {
+    "load_balancers": ("/lbaas/loadbalancers", "loadbalancers", "get_load_balancer"),
+    "listeners": ("/lbaas/listeners", "listeners", "get_listener"),
+    "pools": ("/lbaas/pools", "pools", "get_pool"),
+    "health_monitors": ("/lbaas/healthmonitors", "healthmonitors", "get_health_monitor"),
+    "l7_policies": ("/lbaas/l7policies", "l7policies", "get_l7_policy"),
+}
+
+# Child result key -> (Octavia collection path under the parent, response key)
+CHILD_COLLECTIONS = {
+    "members": ("/lbaas/pools/{}/members", "members"),
+    "l7_rules": ("/lbaas/l7policies/{}/rules", "rules"),
+}
+
+# Raw API field -> SDK attribute, for results listed with field selection
+RENAMES = {"loadbalancers": "load_balancers", "admin_state_up": "is_admin_state_up"}
+
+def _renamed(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {RENAMES.get(k, k): v for k, v in item.items()}
+
 class LoadBalancerDiscovery(DiscoveryBase):
+    service_type = "load-balancer"
+
     def list_load_balancers(self) -> Iterable[Any]:
         self.logger.info("Discovering load balancers...")
-        return self._safe_list(self.conn.load_balancer.load_balancers, project_id=self.project_id)
+        return self._list("load_balancers", self.conn.load_balancer.load_balancers)
 
     def list_listeners(self) -> Iterable[Any]:
         self.logger.info("Discovering listeners...")
-        return self._safe_list(self.conn.load_balancer.listeners, project_id=self.project_id)
+        return self._list("listeners", self.conn.load_balancer.listeners)
 
     def list_pools(self) -> Iterable[Any]:
         self.logger.info("Discovering pools...")
-        return self._safe_list(self.conn.load_balancer.pools, project_id=self.project_id)
+        return self._list("pools", self.conn.load_balancer.pools)
 
     def list_members(self, pool_id: str) -> Iterable[Any]:
         # Members are usually sub-resources of pools
         self.logger.info(f"Discovering members for pool {pool_id}...")
-        return self._safe_list(self.conn.load_balancer.members, pool_id)
+        return self._list_children("members", self.conn.load_balancer.members, pool_id)
     
     def list_all_members(self, pools: Iterable[Any]) -> Iterable[Any]:
-        members = []
-        for pool in pools:
-            members.extend(self.list_members(pool.id))
-        return members
+        return self._fan_out(self.list_members, pools, "pool_id")
 
     def list_l7_policies(self) -> Iterable[Any]:
         self.logger.info("Discovering L7 policies...")
-        return self._safe_list(self.conn.load_balancer.l7_policies, project_id=self.project_id)
+        return self._list("l7_policies", self.conn.load_balancer.l7_policies)
 
     def list_l7_rules(self, policy_id: str) -> Iterable[Any]:
         self.logger.info(f"Discovering rules for policy {policy_id}...")
-        return self._safe_list(self.conn.load_balancer.l7_rules, policy_id)
+        return self._list_children("l7_rules", self.conn.load_balancer.l7_rules, policy_id)
 
     def list_all_l7_rules(self, policies: Iterable[Any]) -> Iterable[Any]:
-        rules = []
-        for policy in policies:
-            rules.extend(self.list_l7_rules(policy.id))
-        return rules
+        return self._fan_out(self.list_l7_rules, policies, "l7_policy_id")
 
     def list_health_monitors(self) -> Iterable[Any]:
         self.logger.info("Discovering health monitors...")
-        return self._safe_list(self.conn.load_balancer.health_monitors, project_id=self.project_id)
+        return self._list("health_monitors", self.conn.load_balancer.health_monitors)
+
+    def _list(self, key: str, list_func) -> Iterable[Any]:
+        """List ``key`` through the SDK, or the raw API when fields are selected (the SDK does not forward ``fields``)."""
+        params = self.query.params(key)
+        if "fields" not in params:
+            return self._iter_list(list_func, project_id=self.project_id, **params)
+        path, resources_key, _ = COLLECTIONS[key]
+        items = self._iter_list(self._raw_list, self.conn.load_balancer, path, resources_key, {"project_id": self.project_id, **params})
+        return (_renamed(item) for item in items)
+
+    def _list_children(self, key: str, list_func, parent_id: str) -> Iterable[Any]:
+        params = self.query.params(key)
+        if "fields" not in params:
+            return self._safe_list(list_func, parent_id, **params)
+        path, resources_key = CHILD_COLLECTIONS[key]
+        items = self._safe_list(self._raw_list, self.conn.load_balancer, path.format(parent_id), resources_key, params)
+        return [_renamed(item) for item in items]
+
+    def list_child_update_times(self, key: str, parent_id: str) -> Dict[str, Any]:
+        """``{id: updated_at}`` for the members/L7 rules of one pool/policy, using Octavia field selection."""
+        path, resources_key = CHILD_COLLECTIONS[key]
+        items = self._safe_list(self._raw_list, self.conn.load_balancer, path.format(parent_id), resources_key,
+                                {"fields": ["id", "updated_at"]})
+        return {item["id"]: item.get("updated_at") for item in items}
+
+    def list_update_times(self, key: str) -> Dict[str, Any]:
+        """``{id: updated_at}`` for all resources of ``key``, using Octavia field selection."""
+        path, resources_key, _ = COLLECTIONS[key]
+        items = self._safe_list(self._raw_list, self.conn.load_balancer, path, resources_key,
+                                {"project_id": self.project_id, "fields": ["id", "updated_at"]})
+        return {item["id"]: item.get("updated_at") for item in items}
+
+    def get_resources(self, key: str, ids: Iterable[str]) -> Iterable[Any]:
+        """Fetch individual resources of ``key``; missing ones are skipped."""
+        getter_name = COLLECTIONS[key][2]
+        getter = getattr(self.conn.load_balancer, getter_name)
+
+        def get_one(resource_id: str) -> Iterable[Any]:
+            return [getter(resource_id)]
+        get_one.__name__ = getter_name
+
+        return self._fan_out(lambda i: self._safe_list(get_one, i), [{"id": i} for i in ids], None)
 
     def list_resources(self) -> Dict[str, Iterable[Any]]:
         lbs = list(self.list_load_balancers())
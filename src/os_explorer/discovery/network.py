@@ -1,30 +1,56 @@
 from typing import Iterable, Dict, Any
 from .base import DiscoveryBase
 
+# Discovery result key -> (Neutron collection path, response key)
+COLLECTIONS = {
+    "networks": ("/networks", "networks"),
+    "subnets": ("/subnets", "subnets"),
+    "ports": ("/ports", "ports"),
+    "routers": ("/routers", "routers"),
+    "security_groups": ("/security-groups", "security_groups"),
+    "floating_ips": ("/floatingips", "floatingips"),
+}
+
 class NetworkDiscovery(DiscoveryBase):
+    service_type = "network"
+
     def list_networks(self) -> Iterable[Any]:
         self.logger.info("Discovering networks...")
-        return self._safe_list(self.conn.network.networks, project_id=self.project_id)
+        return self._iter_list(self.conn.network.networks, project_id=self.project_id, **self.query.params("networks"))
 
     def list_subnets(self) -> Iterable[Any]:
         self.logger.info("Discovering subnets...")
-        return self._safe_list(self.conn.network.subnets, project_id=self.project_id)
+        return self._iter_list(self.conn.network.subnets, project_id=self.project_id, **self.query.params("subnets"))
 
     def list_ports(self) -> Iterable[Any]:
         self.logger.info("Discovering ports...")
-        return self._safe_list(self.conn.network.ports, project_id=self.project_id)
+        return self._iter_list(self.conn.network.ports, project_id=self.project_id, **self.query.params("ports"))
 
     def list_routers(self) -> Iterable[Any]:
         self.logger.info("Discovering routers...")
-        return self._safe_list(self.conn.network.routers, project_id=self.project_id)
+        return self._iter_list(self.conn.network.routers, project_id=self.project_id, **self.query.params("routers"))
 
     def list_security_groups(self) -> Iterable[Any]:
         self.logger.info("Discovering security groups...")
-        return self._safe_list(self.conn.network.security_groups, project_id=self.project_id)
+        return self._iter_list(self.conn.network.security_groups, project_id=self.project_id, **self.query.params("security_groups"))
     
     def list_floating_ips(self) -> Iterable[Any]:
         self.logger.info("Discovering floating IPs...")
-        return self._safe_list(self.conn.network.ips, project_id=self.project_id)
+        return self._iter_list(self.conn.network.ips, project_id=self.project_id, **self.query.params("floating_ips"))
+
+    def list_changed_since(self, key: str, since: str) -> Iterable[Any]:
+        """Resources of ``key`` changed since ``since`` (Neutron standard-attr-timestamp filter)."""
+        path, resources_key = COLLECTIONS[key]
+        self.logger.info(f"Discovering {key} changed since {since}...")
+        return self._safe_list(self._raw_list, self.conn.network, path, resources_key,
+                               {"project_id": self.project_id, "changed_since": since, **self.query.params(key)})
+
+    def list_ids(self, key: str) -> Iterable[str]:
+        """IDs of all resources of ``key``, without their bodies."""
+        path, resources_key = COLLECTIONS[key]
+        items = self._safe_list(self._raw_list, self.conn.network, path, resources_key,
+                                {"project_id": self.project_id, "fields": "id"})
+        return [item["id"] for item in items]
 
     def list_resources(self) -> Dict[str, Iterable[Any]]:
         return {
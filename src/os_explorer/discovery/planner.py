@@ -0,0 +1,73 @@
+"""
+Type-selective discovery planning.
+
+``plan_types`` works out which node types must be discovered to show the
+requested ones with all their edges, using the relationship registry:
+
+* Edges point from a resource to what hangs below it in the tree (server ->
+  port -> security group, load balancer -> listener -> pool -> member), so
+  every type reachable along edges from a requested type is included.
+* Types with edges into a requested type are included as well, but not
+  what hangs below them: a volume only counts as attached when its server
+  is known, which does not require the server's ports.
+
+Relations marked ``plan=False`` (port -> network, floating IP -> port) are
+only used by graph queries and are not followed here.
+
+``plan_tasks`` then keeps the discovery tasks listing those types, the
+lookups server nodes are enriched with and the tasks they depend on, so
+``tree --types load_balancer`` makes Octavia calls only.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from .executor import DiscoveryTask
+from ..graph.builder import RESOURCE_TYPES, SERVER_LOOKUPS
+from ..graph.relations import RELATIONS
+
+# Node type -> node types its outgoing / incoming edges lead to
+CHILDREN: Dict[str, Set[str]] = {}
+PARENTS: Dict[str, Set[str]] = {}
+for _relation in RELATIONS:
+    if not _relation.plan:
+        continue
+    _from, _to = (_relation.target, _relation.source) if _relation.inverse else (_relation.source, _relation.target)
+    CHILDREN.setdefault(_from, set()).add(_to)
+    PARENTS.setdefault(_to, set()).add(_from)
+
+# Node type -> result key it is listed by
+TASK_KEYS: Dict[str, str] = {node_type: key for key, node_type in RESOURCE_TYPES.items()}
+
+def plan_types(types: Iterable[str]) -> Set[str]:
+    """Node types to discover for ``types`` (see module docstring)."""
+    requested = {t.strip().lower() for t in types if t.strip()}
+    unknown = sorted(requested - set(TASK_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown resource types: {', '.join(unknown)} (known: {', '.join(sorted(TASK_KEYS))})")
+    planned = set(requested)
+    pending = list(requested)
+    while pending:
+        for child in CHILDREN.get(pending.pop(), ()):
+            if child not in planned:
+                planned.add(child)
+                pending.append(child)
+    for node_type in requested:
+        planned |= PARENTS.get(node_type, set())
+    return planned
+
+def plan_tasks(tasks: Sequence[DiscoveryTask], types: Optional[Iterable[str]]) -> List[DiscoveryTask]:
+    """The subset of ``tasks`` needed for ``types``, in order; all of them when ``types`` is empty."""
+    if not types:
+        return list(tasks)
+    planned = plan_types(types)
+    names = {TASK_KEYS[node_type] for node_type in planned}
+    if "server" in planned:
+        names.update(SERVER_LOOKUPS)
+    by_name = {task.name: task for task in tasks}
+    pending = list(names)
+    while pending:
+        task = by_name.get(pending.pop())
+        for dependency in task.depends_on if task else ():
+            if dependency not in names:
+                names.add(dependency)
+                pending.append(dependency)
+    return [task for task in tasks if task.name in names]
@@ -0,0 +1,161 @@
+"""
+Server-side field selection and filter push-down.
+
+``DiscoveryQuery`` turns what the graph needs into list call parameters:
+
+* Field selection: with a projecting meta profile (``minimal``, ``ui``) only
+  the fields the profile and the relationship registry read are requested
+  (``fields=``) from the APIs supporting it, Neutron and Octavia. With
+  ``full`` whole resources are fetched, as before.
+* Filters: ``--name``, ``--status`` and ``--tag`` become query parameters of
+  the types whose API evaluates them. Status vocabularies differ between
+  services (``ACTIVE`` for Nova and Neutron, ``available``/``in-use`` for
+  Cinder), so ``ResourceFilter.types`` limits filtering to some node types.
+
+Parameters use API names; the SDK proxies forward them unchanged.
+"""
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from ..graph.builder import RESOURCE_TYPES
+from ..graph.projection import DEFAULT_PROFILE, profile_fields
+from ..utils.resource import get_field
+
+# Filters each list API evaluates server-side
+FILTERS: Dict[str, Tuple[str, ...]] = {
+    "servers": ("name", "status", "tags"),
+    "volumes": ("name", "status"),
+    "snapshots": ("name", "status"),
+    "networks": ("name", "status", "tags"),
+    "subnets": ("name", "tags"),
+    "ports": ("name", "status", "tags"),
+    "routers": ("name", "status", "tags"),
+    "security_groups": ("name", "tags"),
+    "floating_ips": ("status", "tags"),
+    "load_balancers": ("name", "tags"),
+    "listeners": ("name", "tags"),
+    "pools": ("name", "tags"),
+    "health_monitors": ("name", "tags"),
+    "l7_policies": ("name", "tags"),
+}
+
+# Status values per list API; without explicit filter types, --status only
+# goes to the APIs whose vocabulary has it (Nova/Neutron "ACTIVE" would
+# otherwise drop every Cinder volume, which is "available" or "in-use")
+_NOVA_STATUSES = frozenset((
+    "ACTIVE", "BUILD", "DELETED", "ERROR", "HARD_REBOOT", "MIGRATING", "PASSWORD", "PAUSED", "REBOOT",
+    "REBUILD", "RESCUE", "RESIZE", "REVERT_RESIZE", "SHELVED", "SHELVED_OFFLOADED", "SHUTOFF",
+    "SOFT_DELETED", "SUSPENDED", "UNKNOWN", "VERIFY_RESIZE",
+))
+_NEUTRON_STATUSES = frozenset(("ACTIVE", "DOWN", "BUILD", "ERROR"))
+_CINDER_STATUSES = frozenset((
+    "available", "in-use", "creating", "deleting", "error", "error_deleting", "attaching", "detaching",
+    "reserved", "maintenance", "extending", "error_extending", "backing-up", "restoring", "restoring-backup",
+    "error_restoring", "downloading", "uploading", "retyping", "unmanaging",
+))
+STATUSES: Dict[str, FrozenSet[str]] = {
+    "servers": _NOVA_STATUSES,
+    "volumes": _CINDER_STATUSES,
+    "snapshots": _CINDER_STATUSES,
+    "networks": _NEUTRON_STATUSES,
+    "ports": _NEUTRON_STATUSES,
+    "routers": _NEUTRON_STATUSES | {"ALLOCATING"},
+    "floating_ips": _NEUTRON_STATUSES,
+}
+
+# Result keys whose list APIs accept ``fields=``
+FIELD_SELECTION = (
+    "networks", "subnets", "ports", "routers", "security_groups", "floating_ips",
+    "load_balancers", "listeners", "pools", "members", "health_monitors", "l7_policies", "l7_rules",
+)
+
+# Fields every node is built from, besides its meta
+NODE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "floating_ip": ("floating_ip_address",),
+}
+
+# Image IDs per "id=in:" query, keeping URLs short
+IMAGE_ID_BATCH = 50
+
+# SDK attribute -> API field, where they differ
+API_FIELDS: Dict[str, str] = {
+    "security_group_ids": "security_groups",
+    "subnet_ids": "subnets",
+    "is_admin_state_up": "admin_state_up",
+    "is_router_external": "router:external",
+    "is_shared": "shared",
+    "is_dhcp_enabled": "enable_dhcp",
+    "load_balancers": "loadbalancers",
+}
+
+@dataclass(frozen=True)
+class ResourceFilter:
+    """User filters; ``types`` (node types) limits which resources they apply to."""
+    name: Optional[str] = None
+    status: Optional[str] = None
+    tags: Tuple[str, ...] = ()
+    types: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.name or self.status or self.tags)
+
+@dataclass(frozen=True)
+class DiscoveryQuery:
+    meta_profile: str = DEFAULT_PROFILE
+    filter: ResourceFilter = field(default_factory=ResourceFilter)
+
+    def fields(self, key: str) -> Optional[List[str]]:
+        """API fields to request for ``key``, or None for whole resources."""
+        node_type = RESOURCE_TYPES.get(key)
+        if self.meta_profile == "full" or node_type is None or key not in FIELD_SELECTION:
+            return None
+        names = ("id", "name") + NODE_FIELDS.get(node_type, ()) + profile_fields(self.meta_profile, node_type)
+        # "fixed_ips[].ip_address" is selected as the whole fixed_ips list
+        return list(dict.fromkeys(API_FIELDS.get(name, name) for name in (n.partition("[].")[0] for n in names)))
+
+    def filters(self, key: str) -> Dict[str, str]:
+        """Query parameters of the user filters ``key``'s API can evaluate."""
+        supported = FILTERS.get(key, ())
+        if not self.filter or (self.filter.types and RESOURCE_TYPES.get(key) not in self.filter.types):
+            return {}
+        params: Dict[str, str] = {}
+        if self.filter.name and "name" in supported:
+            # Nova matches names as regular expressions
+            params["name"] = f"^{re.escape(self.filter.name)}$" if key == "servers" else self.filter.name
+        if self.filter.status and "status" in supported and (self.filter.types or key in status_keys(self.filter.status)):
+            params["status"] = self.filter.status
+        if self.filter.tags and "tags" in supported:
+            # Resources must have all of them
+            params["tags"] = ",".join(self.filter.tags)
+        return params
+
+    def params(self, key: str) -> Dict[str, Any]:
+        params: Dict[str, Any] = self.filters(key)
+        fields = self.fields(key)
+        if fields:
+            params["fields"] = fields
+        return params
+
+    def signature(self) -> str:
+        """Distinguishes cached results of different queries; empty for the default one."""
+        if self.meta_profile == "full" and not self.filter:
+            return ""
+        return json.dumps([self.meta_profile, self.filter.name, self.filter.status, sorted(self.filter.tags), sorted(self.filter.types)])
+
+def status_keys(status: str) -> List[str]:
+    """Result keys whose status vocabulary has ``status`` (case-insensitively)."""
+    status = status.casefold()
+    return [key for key, values in STATUSES.items() if any(value.casefold() == status for value in values)]
+
+def image_ids(servers: List[Any]) -> List[str]:
+    """IDs of the images ``servers`` were booted from (volume-backed servers have none)."""
+    ids = (get_field(get_field(server, "image") or {}, "id") for server in servers)
+    return sorted({image_id for image_id in ids if image_id})
+
+def images_cache_key(servers: List[Any]) -> str:
+    """Cache entry for the images of ``servers``: one per set of image IDs."""
+    digest = hashlib.sha1(",".join(image_ids(servers)).encode()).hexdigest()[:16]
+    return f"images@{digest}"
@@ -0,0 +1,92 @@
+"""
+Discovery plugin registry.
+
+Each OpenStack service is discovered by a plugin naming its discoverer
+classes as ``"module:Class"`` strings: one for the sdk backend and,
+optionally, one for the async backend. Service modules (and openstacksdk
+with them) are only imported when a discoverer is first needed, so commands
+working from a graph file never load them.
+
+Installed packages can replace built-in plugins through the
+``os_explorer.discovery`` entry point group; the entry point's name is the
+service and its object a ``DiscoveryPlugin``::
+
+    [project.entry-points."os_explorer.discovery"]
+    network = "my_package.discovery:NETWORK_PLUGIN"
+
+Graph discovery only runs the services in ``runner.GRAPH_SERVICES``, whose
+results ``GraphBuilder`` knows how to turn into nodes. Plugins registered
+under other names are available through ``discoverer`` but not discovered
+into the graph.
+"""
+import importlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+ENTRY_POINT_GROUP = "os_explorer.discovery"
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class DiscoveryPlugin:
+    name: str
+    sdk: str
+    aio: Optional[str] = None
+
+    def load(self, backend: str = "sdk") -> type:
+        """The discoverer class for ``backend`` (``sdk`` or ``async``), imported on first use."""
+        target = self.sdk if backend == "sdk" else self.aio
+        if target is None:
+            raise ValueError(f"Discovery plugin {self.name} has no {backend} backend")
+        module, _, attr = target.partition(":")
+        return getattr(importlib.import_module(module), attr)
+
+BUILTIN_PLUGINS = (
+    DiscoveryPlugin("compute", "os_explorer.discovery.compute:ComputeDiscovery", "os_explorer.discovery.aio:AsyncComputeDiscovery"),
+    DiscoveryPlugin("network", "os_explorer.discovery.network:NetworkDiscovery", "os_explorer.discovery.aio:AsyncNetworkDiscovery"),
+    DiscoveryPlugin("block_storage", "os_explorer.discovery.block_storage:BlockStorageDiscovery", "os_explorer.discovery.aio:AsyncBlockStorageDiscovery"),
+    DiscoveryPlugin("load_balancer", "os_explorer.discovery.loadbalancer:LoadBalancerDiscovery", "os_explorer.discovery.aio:AsyncLoadBalancerDiscovery"),
+    DiscoveryPlugin("image", "os_explorer.discovery.image:ImageDiscovery", "os_explorer.discovery.aio:AsyncImageDiscovery"),
+    DiscoveryPlugin("dns", "os_explorer.discovery.dns:DNSDiscovery", "os_explorer.discovery.aio:AsyncDNSDiscovery"),
+    DiscoveryPlugin("heat", "os_explorer.discovery.heat:HeatDiscovery", "os_explorer.discovery.aio:AsyncHeatDiscovery"),
+)
+
+_plugins: Optional[Dict[str, DiscoveryPlugin]] = None
+_lock = threading.Lock()
+
+def _entry_points():
+    from importlib.metadata import entry_points
+    found = entry_points()
+    if hasattr(found, "select"):
+        return found.select(group=ENTRY_POINT_GROUP)
+    # Python < 3.10: a dict of groups
+    return found.get(ENTRY_POINT_GROUP, ())
+
+def plugins() -> Dict[str, DiscoveryPlugin]:
+    """Built-in and installed plugins by service name, looked up once."""
+    global _plugins
+    with _lock:
+        if _plugins is None:
+            found = {plugin.name: plugin for plugin in BUILTIN_PLUGINS}
+            for entry_point in _entry_points():
+                try:
+                    plugin = entry_point.load()
+                except Exception as e:
+                    logger.warning(f"Could not load discovery plugin {entry_point.name}: {e}")
+                    continue
+                if not isinstance(plugin, DiscoveryPlugin):
+                    logger.warning(f"Ignoring discovery plugin {entry_point.name}: not a DiscoveryPlugin")
+                    continue
+                # Installed plugins replace built-in ones of the same name
+                found[entry_point.name] = plugin
+            _plugins = found
+        return _plugins
+
+def discoverer(name: str, backend: str = "sdk") -> type:
+    """The discoverer class of service ``name`` for ``backend``."""
+    plugin = plugins().get(name)
+    if plugin is None:
+        raise ValueError(f"Unknown discovery plugin: {name}")
+    return plugin.load(backend)
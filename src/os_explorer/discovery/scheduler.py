@@ -0,0 +1,319 @@
+"""
+Rate-limit-aware scheduling of discovery calls.
+
+One ``Scheduler`` is shared by all discoverers of a run, on both backends:
+
+* Concurrency: calls to each service go through an AIMD limit. It starts at
+  the configured concurrency, is halved when the service answers 429 or 503
+  or its pages get slower than ``latency_target``, and grows back by about
+  one call per window of successful calls.
+* Retries: list calls are idempotent, so 429, 502, 503 and 504 responses and
+  connection errors are retried with full-jitter exponential backoff, waiting
+  at least as long as ``Retry-After`` asks.
+* Incomplete listings: a listing that still fails (or is refused) is
+  recorded for the running discovery task (``track_incomplete``) so the
+  graph builder can mark the affected nodes ``partial``.
+"""
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from ..metrics import current_call
+
+T = TypeVar("T")
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_ATTEMPTS = 4
+# Backoff before the first retry, seconds; doubles with every attempt
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+# Longest Retry-After honoured, seconds
+MAX_RETRY_AFTER = 120.0
+# Mean response time per page above which a service counts as overloaded
+DEFAULT_LATENCY_TARGET = 5.0
+# Multiplicative decrease, applied at most once per DECREASE_INTERVAL seconds
+DECREASE = 0.5
+DECREASE_INTERVAL = 1.0
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# (module, exception) raised for connection failures and timeouts
+CONNECTION_ERRORS = (
+    ("requests", "ConnectionError"),
+    ("requests", "Timeout"),
+    ("keystoneauth1.exceptions", "ConnectionError"),
+    ("httpx", "TransportError"),
+)
+
+logger = logging.getLogger(__name__)
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an SDK or httpx error, if it has one."""
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the ``Retry-After`` header of the error's response asks to wait."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        # HTTP-date form
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+def is_retriable(error: BaseException) -> bool:
+    code = status_code(error)
+    if code is not None:
+        return code in RETRY_STATUSES
+    return isinstance(error, connection_errors())
+
+def connection_errors() -> tuple:
+    """
+    Connection error classes of the HTTP libraries loaded so far.
+
+    Looked up in ``sys.modules`` rather than imported: a library that was
+    never imported cannot have raised, and importing the scheduler stays
+    cheap for commands that never connect.
+    """
+    errors = (getattr(sys.modules.get(module), name, None) for module, name in CONNECTION_ERRORS)
+    return tuple(error for error in errors if isinstance(error, type))
+
+class AimdLimit:
+    """Additive-increase/multiplicative-decrease limit on one service's in-flight calls."""
+
+    def __init__(self, maximum: int, latency_target: Optional[float] = DEFAULT_LATENCY_TARGET, minimum: int = 1):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.latency_target = latency_target
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self.throttled = 0
+        self._last_decrease = float("-inf")
+
+    def available(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def on_success(self, latency: Optional[float]) -> None:
+        if self.latency_target and latency is not None and latency > self.latency_target:
+            self._decrease()
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self) -> None:
+        self.throttled += 1
+        self._decrease()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        # Calls in flight together see the same overload; cut once for all of them
+        if now - self._last_decrease < DECREASE_INTERVAL:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * DECREASE)
+
+class Scheduler:
+    """Per-service concurrency limits and retries for discovery calls (see module docstring)."""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, attempts: int = DEFAULT_ATTEMPTS, backoff: float = DEFAULT_BACKOFF,
+                 latency_target: Optional[float] = DEFAULT_LATENCY_TARGET, sleep: Callable[[float], None] = time.sleep):
+        self.concurrency = max(1, concurrency)
+        self.attempts = max(1, attempts)
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.sleep = sleep
+        self.limits: Dict[str, AimdLimit] = {}
+        self.retries = 0
+        self._condition = threading.Condition()
+        self._async_condition: Optional[asyncio.Condition] = None
+
+    def limit(self, service: str) -> AimdLimit:
+        with self._condition:
+            if service not in self.limits:
+                self.limits[service] = AimdLimit(self.concurrency, self.latency_target)
+            return self.limits[service]
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """Seconds to wait before retry number ``attempt`` (0-based)."""
+        delay = random.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** attempt))
+        wait = retry_after(error)
+        return max(delay, wait) if wait is not None else delay
+
+    def _retry(self, service: str, attempt: int, error: BaseException) -> Optional[float]:
+        """Delay before the next attempt, or None when ``error`` is final."""
+        if attempt + 1 >= self.attempts or not is_retriable(error):
+            return None
+        delay = self.delay(attempt, error)
+        with self._condition:
+            self.retries += 1
+        active = current_call()
+        if active is not None:
+            active.retries += 1
+        logger.warning(f"Retrying {service} call in {delay:.1f}s after {error}")
+        return delay
+
+    def _observe(self, limit: AimdLimit, error: Optional[BaseException], latency: Optional[float]) -> None:
+        limit.in_flight -= 1
+        if error is None:
+            limit.on_success(latency)
+        elif status_code(error) in THROTTLE_STATUSES:
+            limit.on_throttle()
+
+    # Threads (sdk backend)
+
+    def _acquire(self, service: str) -> AimdLimit:
+        limit = self.limit(service)
+        with self._condition:
+            self._condition.wait_for(limit.available)
+            limit.in_flight += 1
+        return limit
+
+    def _release(self, limit: AimdLimit, error: Optional[BaseException] = None, latency: Optional[float] = None) -> None:
+        with self._condition:
+            self._observe(limit, error, latency)
+            self._condition.notify_all()
+
+    def call(self, service: str, func: Callable[[], T]) -> T:
+        """``func()`` within the service's limit, retried on transient errors."""
+        attempt = 0
+        while True:
+            limit = self._acquire(service)
+            pages = _pages()
+            started = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                self._release(limit, error=e)
+                delay = self._retry(service, attempt, e)
+                if delay is None:
+                    raise
+                self.sleep(delay)
+                attempt += 1
+                continue
+            self._release(limit, latency=(time.perf_counter() - started) / max(1, _pages() - pages))
+            return result
+
+    def iterate(self, service: str, make_iter: Callable[[], Iterable[T]], key: Callable[[T], Any]) -> Iterator[T]:
+        """
+        Stream ``make_iter()`` within the service's limit.
+
+        On a transient error the listing starts over and items already
+        yielded (by ``key``; None keys are never skipped) are skipped. Only
+        the time spent fetching counts as latency, not the time the
+        consumer holds an item.
+        """
+        seen = set()
+        attempt = 0
+        while True:
+            limit = self._acquire(service)
+            pages = _pages()
+            busy = 0.0
+            error: Optional[BaseException] = None
+            try:
+                iterator = iter(make_iter())
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    finally:
+                        busy += time.perf_counter() - started
+                    item_key = key(item)
+                    if item_key is not None:
+                        if item_key in seen:
+                            continue
+                        seen.add(item_key)
+                    yield item
+            except Exception as e:
+                error = e
+            finally:
+                # Also runs when the consumer stops early (GeneratorExit)
+                self._release(limit, error=error, latency=busy / max(1, _pages() - pages))
+            if error is None:
+                return
+            delay = self._retry(service, attempt, error)
+            if delay is None:
+                raise error
+            self.sleep(delay)
+            attempt += 1
+
+    # Event loop (async backend)
+
+    async def _acquire_async(self, service: str) -> AimdLimit:
+        if self._async_condition is None:
+            self._async_condition = asyncio.Condition()
+        limit = self.limit(service)
+        async with self._async_condition:
+            await self._async_condition.wait_for(limit.available)
+            limit.in_flight += 1
+        return limit
+
+    async def _release_async(self, limit: AimdLimit, error: Optional[BaseException] = None, latency: Optional[float] = None) -> None:
+        async with self._async_condition:
+            self._observe(limit, error, latency)
+            self._async_condition.notify_all()
+
+    async def acall(self, service: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Async ``call``: ``await func()`` within the service's limit, retried on transient errors."""
+        attempt = 0
+        while True:
+            limit = await self._acquire_async(service)
+            started = time.perf_counter()
+            try:
+                result = await func()
+            except Exception as e:
+                await self._release_async(limit, error=e)
+                delay = self._retry(service, attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            await self._release_async(limit, latency=time.perf_counter() - started)
+            return result
+
+def _pages() -> int:
+    """Pages received so far by the metrics call running in this thread."""
+    active = current_call()
+    return active.pages if active is not None else 0
+
+# Listings of the running discovery task that ended early: None for the
+# task's own listing, parent IDs for child listings (members of a pool, ...)
+_incomplete: ContextVar[Optional[List[Optional[str]]]] = ContextVar("os_explorer_incomplete", default=None)
+
+@contextmanager
+def track_incomplete() -> Iterator[List[Optional[str]]]:
+    """Collect the incomplete listings recorded in this context (see ``record_incomplete``)."""
+    incomplete: List[Optional[str]] = []
+    token = _incomplete.set(incomplete)
+    try:
+        yield incomplete
+    finally:
+        _incomplete.reset(token)
+
+def record_incomplete(parent_id: Optional[str] = None) -> None:
+    incomplete = _incomplete.get()
+    if incomplete is not None:
+        incomplete.append(parent_id)
+
+def listing_incomplete() -> bool:
+    """Whether a listing of the running discovery task ended early."""
+    return bool(_incomplete.get())
@@ -1,9 +1,60 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
 from .model import Graph, Node, Edge
+from .projection import DEFAULT_PROFILE, MetaProjector
+from .relations import RELATIONS, Relation
+from ..utils.resource import get_field
+
+# Discovery result key -> node type
+RESOURCE_TYPES = {
+    "servers": "server",
+    "volumes": "volume",
+    "snapshots": "snapshot",
+    "ports": "port",
+    "networks": "network",
+    "subnets": "subnet",
+    "security_groups": "security_group",
+    "routers": "router",
+    "floating_ips": "floating_ip",
+    "load_balancers": "load_balancer",
+    "listeners": "listener",
+    "pools": "pool",
+    "members": "member",
+    "health_monitors": "health_monitor",
+    "l7_policies": "l7_policy",
+    "l7_rules": "l7_rule",
+}
+
+# Result keys that are only used to enrich server nodes
+SERVER_LOOKUPS = ("flavors", "images")
+
+# Node types that fall back to a short ID when the resource has no name
+SHORT_ID_FALLBACK = {"snapshot", "port", "subnet", "member", "health_monitor", "l7_policy"}
+
+# Node type -> relations whose references its resources hold
+RELATIONS_BY_SOURCE: Dict[str, List[Relation]] = {}
+for _relation in RELATIONS:
+    RELATIONS_BY_SOURCE.setdefault(_relation.source, []).append(_relation)
 
 class GraphBuilder:
-    def __init__(self, project_id: str, project_name: str):
-        self.graph = Graph(project_id=project_id, project_name=project_name)
+    def __init__(self, project_id: str, project_name: str, graph: Optional[Graph] = None, meta_profile: str = DEFAULT_PROFILE):
+        # Pass an existing graph to patch it in place (incremental refresh)
+        self.graph = graph if graph is not None else Graph(project_id=project_id, project_name=project_name)
+        # Selects which resource fields end up in Node.meta (graph.projection)
+        self.project_meta = MetaProjector(meta_profile)
+        # Foreign keys per relation, (source id, referenced id, edge meta or
+        # None), taken from the results as they arrive; the results themselves
+        # are not kept. Dropped once the relation is linked.
+        self._references: Dict[Relation, List[Tuple[str, Any, Optional[Dict[str, Any]]]]] = {}
+        # Flavor and image names by ID, and server nodes waiting for them
+        self._lookups: Dict[str, Dict[str, Any]] = {key: {} for key in SERVER_LOOKUPS}
+        self._pending_servers: List[Tuple[Node, Optional[str], Optional[str]]] = []
+        # Server IDs whose flavor or image was not found, per lookup key
+        self._unresolved: Dict[str, Set[str]] = {key: set() for key in SERVER_LOOKUPS}
+        # Result keys whose items are all added
+        self._complete = set()
+        # Node types whose nodes are all added, and relations already linked
+        self._ready_types = set()
+        self._linked = set()
 
     def add_node(self, node: Node):
         self.graph.add_node(node)
@@ -14,113 +65,164 @@ class GraphBuilder:
         edge = Edge(from_node=from_id, to_node=to_id, type=type, meta=meta)
         self.graph.add_edge(edge)
 
-    def link_server_volumes(self, servers: List[Dict[str, Any]], volumes: List[Dict[str, Any]]):
-        """Link servers to their attached volumes."""
-        server_ids = {s['id'] for s in servers}
-        for vol in volumes:
-            # Check if volume is attached to any known server
-            attachments = vol.get('attachments', [])
-            if attachments is None:
-                attachments = []
-            
-            for attachment in attachments:
-                s_id = attachment.get('server_id')
-                if s_id and s_id in server_ids:
-                    self.add_edge(
-                        from_id=s_id,
-                        to_id=vol['id'],
-                        type="attached",
-                        meta={"device": attachment.get("device")}
-                    )
-
-    def link_volume_snapshots(self, volumes: List[Dict[str, Any]], snapshots: List[Dict[str, Any]]):
-        """Link volumes to their snapshots."""
-        for snap in snapshots:
-            volume_id = snap.get('volume_id')
-            if volume_id:
-                # We only add the edge if the volume exists in our graph (or we assume it does)
-                # Ideally we check if volume_id is in our nodes, but for now we just add the edge.
-                # The UI handles missing nodes gracefully.
-                self.add_edge(
-                    from_id=volume_id,
-                    to_id=snap['id'],
-                    type="has_snapshot"
-                )
-
-    def link_network_subnets(self, networks: List[Dict[str, Any]], subnets: List[Dict[str, Any]]):
-        """Link networks to their subnets."""
-        for subnet in subnets:
-            network_id = subnet.get('network_id')
-            if network_id:
-                self.add_edge(
-                    from_id=network_id,
-                    to_id=subnet['id'],
-                    type="has_subnet"
-                )
-
-    def link_port_security_groups(self, ports: List[Dict[str, Any]]):
-        """Link ports to their security groups."""
-        for port in ports:
-            # Ports usually have 'security_groups' or 'security_group_ids'
-            sg_ids = port.get('security_groups') or port.get('security_group_ids', [])
-            for sg_id in sg_ids:
-                self.add_edge(
-                    from_id=port['id'],
-                    to_id=sg_id,
-                    type="has_sg"
-                )
-
-    def link_listener_policies(self, listeners: List[Dict[str, Any]], policies: List[Dict[str, Any]]):
-        """Link listeners to their L7 policies."""
-        for policy in policies:
-            listener_id = policy.get('listener_id')
-            if listener_id:
-                self.add_edge(
-                    from_id=listener_id,
-                    to_id=policy['id'],
-                    type="has_policy",
-                    meta={"position": policy.get("position")}
-                )
-
-    def link_policy_rules(self, policies: List[Dict[str, Any]], rules: List[Dict[str, Any]]):
-        """Link L7 policies to their rules."""
-        # Rules usually belong to a policy, but the rule object might not have policy_id if fetched via policy sub-resource
-        # However, openstacksdk rule object usually has it.
-        # If we fetched rules by policy, we know the parent.
-        # Let's assume the rule object has 'policy_id' or we need to pass it if we iterate differently.
-        # In our discovery, we fetched rules per policy but flattened the list.
-        # OpenStack SDK L7Rule object has 'l7_policy_id' usually.
-        # Let's check if we can rely on that.
-        for rule in rules:
-            # The SDK might use 'l7_policy_id' or we might need to rely on how we fetched them.
-            # Let's assume 'l7_policy_id' is present.
-            # If not, we might need to adjust discovery to attach it.
-            # But wait, we fetched them using `conn.load_balancer.l7_rules(policy_id)`.
-            # The returned objects should have the ID.
-            # Let's try to use 'l7_policy_id' or 'policy_id'.
-            policy_id = rule.get('l7_policy_id') or rule.get('policy_id')
-            if policy_id:
-                self.add_edge(
-                    from_id=policy_id,
-                    to_id=rule['id'],
-                    type="has_rule"
-                )
-
-    def link_pool_health_monitor(self, pools: List[Dict[str, Any]], monitors: List[Dict[str, Any]]):
-        """Link pools to their health monitors."""
-        # Pools have 'health_monitor_id' usually.
-        # Or monitors have 'pool_id'.
-        # SDK HealthMonitor has 'pools' list (usually one).
-        for monitor in monitors:
-            # Monitor can be attached to multiple pools in some versions, but usually 1:1 in Octavia?
-            # Actually HM has 'pools' attribute which is a list of dicts with 'id'.
-            monitor_pools = monitor.get('pools', [])
-            for pool_ref in monitor_pools:
-                self.add_edge(
-                    from_id=pool_ref['id'],
-                    to_id=monitor['id'],
-                    type="has_monitor"
-                )
+    def add_resources(self, key: str, items: Iterable[Any], complete: bool = True) -> List[Node]:
+        """Add nodes for one discovery result set and return the nodes added.
+
+        Can be called in any order as discovery tasks complete. A result set
+        can also arrive in chunks while it is being listed: pass
+        ``complete=False`` for all but the last one. Items are turned into
+        nodes and reference index entries right away and not kept. Server
+        nodes are held back until flavors and images are known so they can be
+        enriched.
+        """
+        if key in SERVER_LOOKUPS:
+            names = self._lookups[key]
+            for item in items:
+                names[get_field(item, 'id')] = get_field(item, 'name')
+            if complete:
+                self._complete.add(key)
+            return self._add_servers()
+        node_type = RESOURCE_TYPES.get(key)
+        if node_type is None:
+            return []
+        if key == "servers":
+            for item in items:
+                self._pending_servers.append(self._server_node(item))
+            if complete:
+                self._complete.add(key)
+            return self._add_servers()
+        nodes = []
+        for item in items:
+            node = self._make_node(node_type, item)
+            self._add_references(node_type, node.id, item)
+            self.add_node(node)
+            nodes.append(node)
+        if complete:
+            self._complete.add(key)
+            self._ready_types.add(node_type)
+        return nodes
+
+    def _add_references(self, node_type: str, item_id: str, item: Any) -> None:
+        for relation in RELATIONS_BY_SOURCE.get(node_type, ()):
+            for ref, meta in relation.references(item):
+                self._references.setdefault(relation, []).append((item_id, ref, meta or None))
+
+    def _make_node(self, node_type: str, item: Any) -> Node:
+        item_id = get_field(item, 'id')
+        name = get_field(item, 'name')
+        label = name
+        if node_type == "floating_ip":
+            name = label = get_field(item, 'floating_ip_address')
+        elif node_type == "l7_rule":
+            # Rules often don't have names, use ID
+            name, label = item_id[:8], item_id
+        elif node_type in SHORT_ID_FALLBACK:
+            name = name or item_id[:8]
+        return Node(id=item_id, type=node_type, name=name, label=label, meta=self.project_meta(node_type, item))
+
+    def _server_node(self, s: Any) -> Tuple[Node, Optional[str], Optional[str]]:
+        """A server node, not yet enriched, with its flavor and image IDs."""
+        # s.flavor and s.image are usually dicts with 'id'
+        flavor = get_field(s, 'flavor')
+        image = get_field(s, 'image')
+        meta = self.project_meta("server", s)
+        if meta is s:
+            meta = s.to_dict() if hasattr(s, 'to_dict') else dict(s)
+        name = get_field(s, 'name')
+        node = Node(id=get_field(s, 'id'), type="server", name=name, label=name, meta=meta)
+        self._add_references("server", node.id, s)
+        return node, flavor.get('id') if flavor else None, image.get('id') if image else None
+
+    def _add_servers(self, force: bool = False) -> List[Node]:
+        """Add the pending server nodes once their lookup data is available."""
+        if force:
+            self._complete.update(SERVER_LOOKUPS)
+        if not all(k in self._complete for k in SERVER_LOOKUPS):
+            return []
+        if "servers" in self._complete or force:
+            self._ready_types.add("server")
+        flavor_map = self._lookups["flavors"]
+        image_map = self._lookups["images"]
+
+        nodes = []
+        for node, flavor_id, image_id in self._pending_servers:
+            for key, lookup_id, names in (("flavors", flavor_id, flavor_map), ("images", image_id, image_map)):
+                if lookup_id and lookup_id not in names:
+                    self._unresolved[key].add(node.id)
+            node.meta['flavor_name'] = flavor_map.get(flavor_id, flavor_id) if flavor_id else "unknown"
+            node.meta['image_name'] = image_map.get(image_id, image_id) if image_id else "unknown"
+            self.add_node(node)
+            nodes.append(node)
+        self._pending_servers = []
+        return nodes
+
+    def mark_partial(self, key: str, parents: Iterable[Optional[str]]) -> List[Node]:
+        """Flag the nodes whose data is incomplete because listing ``key`` failed, and return them.
+
+        ``parents`` come from ``DiscoveryExecutor.incomplete``: None stands for
+        the listing of ``key`` itself, so its nodes that did arrive are marked,
+        and so are the nodes of types referencing ``key`` (their edges to the
+        missing resources are lost). Types that ``key``'s resources reference
+        are left alone: only the missing resources held those edges, and which
+        nodes they pointed at is unknown, so every node of the type would be
+        flagged. A parent ID (a pool whose members failed) marks that parent.
+        For flavors and images, the servers left without a name are marked.
+        Call after ``link_resources`` so held-back servers are included.
+        """
+        if key in SERVER_LOOKUPS:
+            ids = set(self._unresolved[key])
+        else:
+            node_type = RESOURCE_TYPES.get(key)
+            if node_type is None:
+                return []
+            parents = list(parents)
+            ids = {parent for parent in parents if parent is not None}
+            if None in parents:
+                types = {node_type} | {r.source for r in RELATIONS if r.target == node_type}
+                for related in types:
+                    ids.update(self.graph.index.node_ids(related))
+        marked = []
+        for node_id in ids:
+            node = self.graph.get_node(node_id)
+            if node is not None and not node.partial:
+                node.partial = True
+                marked.append(node)
+        return marked
+
+    def link_ready(self) -> List[Edge]:
+        """Build the edges of relations whose source and target nodes are all added.
+
+        Lets callers stream edges while discovery is still running; each
+        relation is linked only once, so ``link_resources`` afterwards only
+        handles the rest.
+        """
+        ready = [r for r in RELATIONS if r not in self._linked and r.source in self._ready_types and r.target in self._ready_types]
+        return self._link(ready)
+
+    def link_resources(self, relations: Optional[Iterable[Relation]] = None) -> List[Edge]:
+        """Build all (remaining) edges from the collected references.
+
+        Edges come from the relationship registry (``graph.relations``); a
+        reference only becomes an edge when its target node exists.
+        """
+        self._add_servers(force=True)
+        if relations is None:
+            relations = [r for r in RELATIONS if r not in self._linked]
+        return self._link(relations)
+
+    def _link(self, relations: Iterable[Relation]) -> List[Edge]:
+        relations = list(relations)
+        self._linked.update(relations)
+        index = self.graph.index
+        edges = []
+        for relation in relations:
+            for item_id, ref, meta in self._references.pop(relation, ()):
+                # Hash lookup: references to unknown resources produce no edge
+                if index.node_type(ref) == relation.target:
+                    edges.append(relation.edge(item_id, ref, meta or {}))
+        for edge in edges:
+            self.graph.add_edge(edge)
+        return edges
 
     def to_json(self) -> Dict[str, Any]:
         return self.graph.to_dict()
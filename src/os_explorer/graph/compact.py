@@ -0,0 +1,356 @@
+"""
+Compact in-memory edge storage behind ``Graph``.
+
+A list of ``Edge`` objects costs several hundred bytes per edge: the object,
+its ``meta`` dict, two ID strings and a type per edge, plus two adjacency
+entries. Here node IDs and edge types are interned once and every edge is a
+row of three ``array('i')`` columns (from, to, type); ``meta`` is only kept
+for edges that have some. Adjacency is CSR-style, one table per direction:
+
+* ``offsets[n] .. offsets[n + 1]`` delimit node ``n``'s slice of ``order``,
+* ``order`` holds edge numbers sorted by (node, edge type, edge number), so
+  the edges of one type form a contiguous run, located with a parallel
+  byte string of edge types.
+
+The tables cover the edges added up to their last build and are rebuilt on
+the next adjacency lookup once more than ``REBUILD_AFTER`` edges were added
+since; a shorter tail of newer edges is scanned instead. Building a graph
+therefore only appends to the arrays.
+
+Removed edges are found through the adjacency tables and only flagged in a
+tombstone byte string that lookups skip, so removals interleaved with
+lookups (delta refreshes, ``Graph.remove_nodes``) keep the tables. The
+columns are compacted once tombstones make up ``COMPACT_AT`` of the rows.
+
+``Edge`` objects are created on access and are snapshots: assigning their
+fields does not change the graph (``meta`` dicts of edges stored with meta
+are shared, so updating those in place does).
+"""
+from array import array
+from collections import deque
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .index import IN, NodeTypeIndex, OUT
+
+# Pending edges scanned linearly before the CSR tables are rebuilt
+REBUILD_AFTER = 64
+# Fraction of removed rows at which the columns are compacted
+COMPACT_AT = 0.25
+
+class Interner:
+    """Dense integer numbers for strings, in first-seen order."""
+
+    __slots__ = ("numbers", "strings")
+
+    def __init__(self):
+        self.numbers: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, value: str) -> int:
+        number = self.numbers.get(value)
+        if number is None:
+            number = self.numbers[value] = len(self.strings)
+            self.strings.append(value)
+        return number
+
+    def get(self, value: str) -> Optional[int]:
+        return self.numbers.get(value)
+
+    def __getitem__(self, number: int) -> str:
+        return self.strings[number]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+class EdgeTable:
+    """Edge columns plus lazily built CSR adjacency (see module docstring)."""
+
+    __slots__ = ("sources", "targets", "types", "meta", "dead", "removed", "_csr", "_built")
+
+    def __init__(self):
+        self.sources = array("i")
+        self.targets = array("i")
+        self.types = array("i")
+        # Edge number -> meta, for edges with non-empty meta only
+        self.meta: Dict[int, Dict[str, Any]] = {}
+        # One byte per row, 1 for removed edges; allocated on the first removal
+        self.dead: Optional[bytearray] = None
+        self.removed = 0
+        # Direction -> (offsets, order, kinds) over the first ``_built`` edges
+        self._csr: Dict[str, Tuple[array, array]] = {}
+        self._built = 0
+
+    def __len__(self) -> int:
+        """Edges not removed."""
+        return len(self.types) - self.removed
+
+    def append(self, source: int, target: int, edge_type: int, meta: Optional[Dict[str, Any]]) -> int:
+        number = len(self.types)
+        self.sources.append(source)
+        self.targets.append(target)
+        self.types.append(edge_type)
+        if self.dead is not None:
+            self.dead.append(0)
+        if meta:
+            self.meta[number] = meta
+        return number
+
+    def remove(self, number: int):
+        """Flag edge ``number`` as removed; it keeps its row until ``compact``."""
+        if self.dead is None:
+            self.dead = bytearray(len(self.types))
+        if not self.dead[number]:
+            self.dead[number] = 1
+            self.removed += 1
+            self.meta.pop(number, None)
+
+    def compact(self):
+        """Drop the rows of removed edges, renumbering the others."""
+        if not self.removed:
+            return
+        dead = self.dead
+        kept = [e for e in range(len(self.types)) if not dead[e]]
+        self.sources = array("i", [self.sources[e] for e in kept])
+        self.targets = array("i", [self.targets[e] for e in kept])
+        self.types = array("i", [self.types[e] for e in kept])
+        self.meta = {new: self.meta[old] for new, old in enumerate(kept) if old in self.meta}
+        self.dead = None
+        self.removed = 0
+        self._csr = {}
+        self._built = 0
+
+    def sparse(self) -> bool:
+        """Whether removed edges make up ``COMPACT_AT`` of the rows."""
+        return self.removed > len(self.types) * COMPACT_AT
+
+    @property
+    def pending(self) -> int:
+        """Edges added since the CSR tables were built."""
+        return len(self.types) - self._built
+
+    def build(self, node_count: int, type_count: int):
+        count = len(self.types)
+        types = self.types
+        for direction, ends in ((OUT, self.sources), (IN, self.targets)):
+            keys = [ends[e] * type_count + types[e] for e in range(count)]
+            # Stable: edge numbers stay ascending within a (node, type) run
+            order = array("i", sorted(range(count), key=keys.__getitem__))
+            degrees = [0] * (node_count + 1)
+            for node in ends:
+                degrees[node + 1] += 1
+            # Edge types along ``order``, one byte each, to find runs with bytes.find
+            kinds = bytearray(types[e] for e in order) if type_count <= 256 else None
+            self._csr[direction] = (array("i", accumulate(degrees)), order, kinds)
+        self._built = count
+
+    def csr(self, direction: str) -> Tuple[array, array, Optional[bytearray]]:
+        """``(offsets, order, kinds)`` for one direction, covering all edges once ``pending`` is 0."""
+        return self._csr.get(direction) or (array("i", [0]), array("i"), bytearray())
+
+    def _run(self, order: array, low: int, high: int, edge_type: int) -> Tuple[int, int]:
+        """Positions in ``order[low:high]`` (sorted by type) holding ``edge_type``, by binary search."""
+        types = self.types
+        start, end = low, high
+        while start < end:
+            middle = (start + end) // 2
+            if types[order[middle]] < edge_type:
+                start = middle + 1
+            else:
+                end = middle
+        end = high
+        stop = start
+        while stop < end:
+            middle = (stop + end) // 2
+            if types[order[middle]] <= edge_type:
+                stop = middle + 1
+            else:
+                end = middle
+        return start, stop
+
+    def adjacent(self, node: int, edge_type: Optional[int], direction: str) -> List[int]:
+        """Numbers of the edges leaving (``out``) or entering (``in``) ``node``, by type then age."""
+        types = self.types
+        count = len(types)
+        found: List[int] = []
+        csr = self._csr.get(direction)
+        if csr is not None:
+            offsets, order, kinds = csr
+            if node < len(offsets) - 1:
+                low, high = offsets[node], offsets[node + 1]
+                if edge_type is None:
+                    found = order[low:high].tolist()
+                elif kinds is not None:
+                    start = kinds.find(edge_type, low, high)
+                    if start >= 0:
+                        found = order[start:kinds.rfind(edge_type, start, high) + 1].tolist()
+                else:
+                    low, high = self._run(order, low, high, edge_type)
+                    found = order[low:high].tolist()
+        if self._built < count:
+            ends = self.sources if direction == OUT else self.targets
+            pending = [e for e in range(self._built, count)
+                       if ends[e] == node and (edge_type is None or types[e] == edge_type)]
+            if pending:
+                found.extend(pending)
+                if edge_type is None:
+                    found.sort(key=types.__getitem__)
+        if self.removed:
+            dead = self.dead
+            found = [e for e in found if not dead[e]]
+        return found
+
+class CompactIndex(NodeTypeIndex):
+    """``AdjacencyIndex`` counterpart storing edges in an ``EdgeTable``.
+
+    ``edge_factory`` builds the edge records handed out (``Edge`` for
+    ``Graph``) from ``(from_id, to_id, type, meta)``.
+    """
+
+    def __init__(self, edge_factory: Callable[..., Any]):
+        super().__init__()
+        self.edge_factory = edge_factory
+        self.ids = Interner()
+        self.edge_types = Interner()
+        self.table = EdgeTable()
+
+    def add_node(self, node_id: str, node_type: str):
+        super().add_node(node_id, node_type)
+        # Edges then share the node's ID string
+        self.ids.intern(node_id)
+
+    def add_edge(self, from_id: str, to_id: str, edge_type: str, meta: Optional[Dict[str, Any]] = None):
+        self.table.append(self.ids.intern(from_id), self.ids.intern(to_id), self.edge_types.intern(edge_type), meta)
+
+    def edge(self, number: int) -> Any:
+        table, ids = self.table, self.ids.strings
+        return self.edge_factory(ids[table.sources[number]], ids[table.targets[number]],
+                                 self.edge_types.strings[table.types[number]], table.meta.get(number))
+
+    def _adjacent(self, node_id: str, edge_type: Optional[str], direction: str) -> List[int]:
+        node = self.ids.numbers.get(node_id)
+        type_number = self.edge_types.numbers.get(edge_type) if edge_type is not None else None
+        if node is None or (edge_type is not None and type_number is None):
+            return []
+        return self._numbers(node, type_number, direction)
+
+    def _numbers(self, node: int, type_number: Optional[int], direction: str) -> List[int]:
+        table = self.table
+        if table.pending > REBUILD_AFTER:
+            table.build(len(self.ids), len(self.edge_types))
+        return table.adjacent(node, type_number, direction)
+
+    def adjacent(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[Tuple[str, Any]]:
+        """``(other_id, edge)`` pairs for edges leaving (``out``) or entering (``in``) a node."""
+        others = self.table.targets if direction == OUT else self.table.sources
+        ids, edge = self.ids.strings, self.edge
+        return [(ids[others[e]], edge(e)) for e in self._adjacent(node_id, edge_type, direction)]
+
+    def neighbor_ids(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[str]:
+        # Without creating Edge objects
+        others = self.table.targets if direction == OUT else self.table.sources
+        ids = self.ids.strings
+        return [ids[others[e]] for e in self._adjacent(node_id, edge_type, direction)]
+
+    def walk(self, start: str, depth: Optional[int],
+             routes: Sequence[Tuple[str, Optional[Sequence[str]]]]) -> Iterator[Tuple[str, int, Any]]:
+        """``query._walk`` over the CSR tables, yielding edge numbers (see ``edge``) instead of edges."""
+        node = self.ids.numbers.get(start)
+        if node is None:
+            return
+        table = self.table
+        if table.pending:
+            table.build(len(self.ids), len(self.edge_types))
+        steps = []
+        for direction, edge_types in routes:
+            if edge_types:
+                type_numbers = [self.edge_types.numbers[t] for t in edge_types if t in self.edge_types.numbers]
+            else:
+                type_numbers = [None]
+            steps.append(table.csr(direction) + (table.targets if direction == OUT else table.sources, type_numbers))
+        # Nodes added since the build have no edges
+        if not len(table) or node >= len(steps[0][0]) - 1:
+            return
+        ids, known = self.ids.strings, self._types
+        dead = table.dead if table.removed else None
+        seen = {node}
+        frontier = deque([(node, 0)])
+        while frontier:
+            current, hops = frontier.popleft()
+            if depth is not None and hops >= depth:
+                continue
+            for offsets, order, kinds, others, type_numbers in steps:
+                low, high = offsets[current], offsets[current + 1]
+                for type_number in type_numbers:
+                    if type_number is None:
+                        run = order[low:high]
+                    elif kinds is not None:
+                        first = kinds.find(type_number, low, high)
+                        run = order[first:kinds.rfind(type_number, first, high) + 1] if first >= 0 else ()
+                    else:
+                        first, stop = table._run(order, low, high, type_number)
+                        run = order[first:stop]
+                    for e in run:
+                        if dead is not None and dead[e]:
+                            continue
+                        other = others[e]
+                        # Dangling edges (to resources outside the graph) are not followed
+                        if other in seen or ids[other] not in known:
+                            continue
+                        seen.add(other)
+                        frontier.append((other, hops + 1))
+                        yield ids[other], hops + 1, e
+
+    def remove_edges(self, edges: Iterable[Any]):
+        """Remove one stored edge per given edge, matched by endpoints and type.
+
+        Matches are looked up in the source node's adjacency, the oldest
+        first, and flagged as removed (see module docstring).
+        """
+        table = self.table
+        for edge in edges:
+            source, target = self.ids.get(edge.from_node), self.ids.get(edge.to_node)
+            type_number = self.edge_types.get(edge.type)
+            if source is None or target is None or type_number is None:
+                continue
+            for number in self._numbers(source, type_number, OUT):
+                if table.targets[number] == target:
+                    table.remove(number)
+                    break
+        if table.sparse():
+            table.compact()
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Edges as ``Edge.to_dict`` dicts, straight from the columns."""
+        ids, edge_types, table = self.ids.strings, self.edge_types.strings, self.table
+        meta, dead = table.meta, table.dead if table.removed else None
+        for number, (source, target, edge_type) in enumerate(zip(table.sources, table.targets, table.types)):
+            if dead is not None and dead[number]:
+                continue
+            yield {"from": ids[source], "to": ids[target], "type": edge_types[edge_type], "meta": meta.get(number) or {}}
+
+class EdgeList(Sequence):
+    """Read-only sequence of a ``CompactIndex``'s edges, created on access."""
+
+    __slots__ = ("_index",)
+
+    def __init__(self, index: CompactIndex):
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index.table)
+
+    def __getitem__(self, position: Union[int, slice]) -> Any:
+        # Positions count edges not removed
+        self._index.table.compact()
+        if isinstance(position, slice):
+            return [self._index.edge(e) for e in range(len(self))[position]]
+        return self._index.edge(range(len(self))[position])
+
+    def __iter__(self) -> Iterator[Any]:
+        table, edge = self._index.table, self._index.edge
+        dead = table.dead if table.removed else None
+        return (edge(e) for e in range(len(table.types)) if dead is None or not dead[e])
+
+    def __repr__(self) -> str:
+        return f"EdgeList({list(self)!r})"
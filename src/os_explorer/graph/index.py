@@ -0,0 +1,136 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .compact import CompactIndex
+
+OUT = "out"
+IN = "in"
+# Either direction, for walks ignoring edge direction
+BOTH = "both"
+
+class NodeTypeIndex:
+    """Node IDs by type, in insertion order, and the type of each node."""
+
+    def __init__(self):
+        # Dicts used as insertion-ordered sets
+        self._by_type: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._types: Dict[str, str] = {}
+
+    def add_node(self, node_id: str, node_type: str):
+        old_type = self._types.get(node_id)
+        if old_type is not None and old_type != node_type:
+            self._by_type[old_type].pop(node_id, None)
+        self._types[node_id] = node_type
+        self._by_type[node_type][node_id] = None
+
+    def remove_node(self, node_id: str):
+        """Forget a node; its edges must be removed first."""
+        node_type = self._types.pop(node_id, None)
+        if node_type is not None:
+            self._by_type[node_type].pop(node_id, None)
+
+    def node_type(self, node_id: str) -> Optional[str]:
+        return self._types.get(node_id)
+
+    def node_ids(self, node_type: str) -> List[str]:
+        return list(self._by_type.get(node_type, ()))
+
+    def types(self) -> List[str]:
+        return [t for t, ids in self._by_type.items() if ids]
+
+class AdjacencyIndex(NodeTypeIndex):
+    """Outgoing/incoming adjacency keyed by edge type, plus node IDs by type.
+
+    Edge records are stored as-is (``Edge`` objects or edge dicts) next to the
+    ID of the node on the other end, so lookups never scan the edge list.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._out: Dict[str, Dict[str, List[Tuple[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+        self._in: Dict[str, Dict[str, List[Tuple[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+
+    def add_edge(self, from_id: str, to_id: str, edge_type: str, record: Any):
+        self._out[from_id][edge_type].append((to_id, record))
+        self._in[to_id][edge_type].append((from_id, record))
+
+    def remove_node(self, node_id: str):
+        """Forget a node; its edges must be removed first with ``remove_edge``."""
+        super().remove_node(node_id)
+        self._out.pop(node_id, None)
+        self._in.pop(node_id, None)
+
+    def remove_edge(self, from_id: str, to_id: str, edge_type: str, record: Any):
+        for table, key in ((self._out, from_id), (self._in, to_id)):
+            pairs = table.get(key, {}).get(edge_type)
+            if pairs:
+                pairs[:] = [pair for pair in pairs if pair[1] is not record]
+
+    def adjacent(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[Tuple[str, Any]]:
+        """``(other_id, edge_record)`` pairs for edges leaving (``out``) or entering (``in``) a node."""
+        table = self._out if direction == OUT else self._in
+        by_type = table.get(node_id)
+        if not by_type:
+            return []
+        if edge_type is not None:
+            return list(by_type.get(edge_type, ()))
+        return [pair for pairs in by_type.values() for pair in pairs]
+
+    def neighbor_ids(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[str]:
+        return [other for other, _ in self.adjacent(node_id, edge_type, direction)]
+
+class GraphQueries(ABC):
+    """Query API shared by ``Graph``, ``GraphIndex`` and ``Snapshot``.
+
+    Subclasses provide ``self.index`` and ``self.get_node``.
+    """
+
+    index: Union[AdjacencyIndex, "CompactIndex"]
+
+    @abstractmethod
+    def get_node(self, node_id: str) -> Optional[Any]:
+        """The node with ``node_id``, or None."""
+
+    def nodes_of_type(self, node_type: str) -> List[Any]:
+        return [self.get_node(node_id) for node_id in self.index.node_ids(node_type)]
+
+    def neighbor_ids(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[str]:
+        return self.index.neighbor_ids(node_id, edge_type, direction)
+
+    def neighbors(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[Any]:
+        """Neighbouring nodes that exist in the graph (dangling edges are skipped)."""
+        found = (self.get_node(other) for other in self.neighbor_ids(node_id, edge_type, direction))
+        return [node for node in found if node is not None]
+
+    def edges_of(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[Any]:
+        return [record for _, record in self.index.adjacent(node_id, edge_type, direction)]
+
+class GraphIndex(GraphQueries):
+    """Indexed, read-only view over a graph JSON document (as produced by ``Graph.to_dict``)."""
+
+    def __init__(self, graph_json: Dict[str, Any]):
+        self.graph_json = graph_json
+        self.index = AdjacencyIndex()
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        for node in graph_json.get('nodes', []):
+            self._nodes[node['id']] = node
+            self.index.add_node(node['id'], node['type'])
+        for edge in graph_json.get('edges', []):
+            self.index.add_edge(edge['from'], edge['to'], edge['type'], edge)
+
+    @classmethod
+    def from_dict(cls, graph_json: Dict[str, Any]) -> "GraphIndex":
+        return cls(graph_json)
+
+    @property
+    def project_name(self) -> Optional[str]:
+        return self.graph_json.get('project_name')
+
+    @property
+    def nodes(self) -> Iterable[Dict[str, Any]]:
+        return self._nodes.values()
+
+    def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        return self._nodes.get(node_id)
@@ -1,20 +1,39 @@
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime
+from .compact import CompactIndex, EdgeList
+from .index import GraphQueries
 
-@dataclass
 class Node:
-    id: str
-    type: str
-    name: str
-    label: str
-    meta: Dict[str, Any] = field(default_factory=dict)
-    created_at: Optional[str] = None
-    updated_at: Optional[str] = None
-    partial: bool = False
+    # Slotted: a large project holds hundreds of thousands of nodes
+    __slots__ = ("id", "type", "name", "label", "meta", "created_at", "updated_at", "partial", "region", "project_id")
+
+    def __init__(self, id: str, type: str, name: str, label: str, meta: Optional[Dict[str, Any]] = None,
+                 created_at: Optional[str] = None, updated_at: Optional[str] = None, partial: bool = False,
+                 region: Optional[str] = None, project_id: Optional[str] = None):
+        self.id = id
+        self.type = type
+        self.name = name
+        self.label = label
+        self.meta = meta if meta is not None else {}
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.partial = partial
+        # Set on graphs merged from several regions/projects (see sharding.py)
+        self.region = region
+        self.project_id = project_id
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Node({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        data = {
             "id": self.id,
             "type": self.type,
             "name": self.name,
@@ -24,13 +43,46 @@ class Node:
             "updated_at": self.updated_at,
             "partial": self.partial
         }
+        if self.region is not None:
+            data["region"] = self.region
+        if self.project_id is not None:
+            data["project_id"] = self.project_id
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Node":
+        return cls(
+            id=data["id"],
+            type=data["type"],
+            name=data.get("name"),
+            label=data.get("label"),
+            meta=data.get("meta") or {},
+            created_at=data.get("created_at"),
+            updated_at=data.get("updated_at"),
+            partial=data.get("partial", False),
+            region=data.get("region"),
+            project_id=data.get("project_id")
+        )
 
-@dataclass
 class Edge:
-    from_node: str
-    to_node: str
-    type: str
-    meta: Dict[str, Any] = field(default_factory=dict)
+    # Graph stores edges in compact arrays; Edge objects are created on access
+    __slots__ = ("from_node", "to_node", "type", "meta")
+
+    def __init__(self, from_node: str, to_node: str, type: str, meta: Optional[Dict[str, Any]] = None):
+        self.from_node = from_node
+        self.to_node = to_node
+        self.type = type
+        self.meta = meta if meta is not None else {}
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.from_node, self.to_node, self.type, self.meta) == (other.from_node, other.to_node, other.type, other.meta)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Edge(from_node={self.from_node!r}, to_node={self.to_node!r}, type={self.type!r}, meta={self.meta!r})"
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -40,19 +92,74 @@ class Edge:
             "meta": self.meta
         }
 
-@dataclass
-class Graph:
-    project_id: str
-    project_name: str
-    nodes: Dict[str, Node] = field(default_factory=dict)
-    edges: List[Edge] = field(default_factory=list)
-    generated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Edge":
+        return cls(from_node=data["from"], to_node=data["to"], type=data["type"], meta=data.get("meta") or {})
+
+class Graph(GraphQueries):
+    """Nodes by ID plus edges in a ``CompactIndex`` (see compact.py).
+
+    ``edges`` is a read-only sequence of ``Edge`` objects created on access;
+    use ``add_edge`` and ``remove_edges`` to change them.
+    """
+
+    def __init__(self, project_id: str, project_name: str, nodes: Optional[Dict[str, Node]] = None,
+                 edges: Optional[Iterable[Edge]] = None, generated_at: Optional[str] = None):
+        self.project_id = project_id
+        self.project_name = project_name
+        self.generated_at = generated_at or datetime.utcnow().isoformat()
+        self.nodes: Dict[str, Node] = {}
+        # Maintained by add_node/add_edge; see GraphQueries for the query API
+        self.index = CompactIndex(Edge)
+        for node in (nodes or {}).values():
+            self.add_node(node)
+        for edge in edges or ():
+            self.add_edge(edge)
+
+    def __repr__(self) -> str:
+        return (f"Graph(project_id={self.project_id!r}, project_name={self.project_name!r}, "
+                f"nodes={len(self.nodes)}, edges={len(self.edges)})")
+
+    @property
+    def edges(self) -> EdgeList:
+        return EdgeList(self.index)
 
     def add_node(self, node: Node):
         self.nodes[node.id] = node
+        self.index.add_node(node.id, node.type)
 
     def add_edge(self, edge: Edge):
-        self.edges.append(edge)
+        self.index.add_edge(edge.from_node, edge.to_node, edge.type, edge.meta)
+
+    def get_node(self, node_id: str) -> Optional[Node]:
+        return self.nodes.get(node_id)
+
+    def remove_edges(self, edges: Iterable[Edge]):
+        """Remove one edge per given edge with the same endpoints and type."""
+        self.index.remove_edges(edges)
+
+    def remove_nodes(self, node_ids: Iterable[str]):
+        """Remove nodes together with every edge touching them."""
+        node_ids = [node_id for node_id in node_ids if node_id in self.nodes]
+        incident = []
+        for node_id in node_ids:
+            incident.extend(self.edges_of(node_id, direction="out"))
+            incident.extend(self.edges_of(node_id, direction="in"))
+        self.remove_edges(incident)
+        for node_id in node_ids:
+            del self.nodes[node_id]
+            self.index.remove_node(node_id)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Graph":
+        graph = cls(project_id=data.get("project_id"), project_name=data.get("project_name"))
+        if data.get("generated_at"):
+            graph.generated_at = data["generated_at"]
+        for node in data.get("nodes", []):
+            graph.add_node(Node.from_dict(node))
+        for edge in data.get("edges", []):
+            graph.add_edge(Edge.from_dict(edge))
+        return graph
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -60,5 +167,5 @@ class Graph:
             "project_name": self.project_name,
             "generated_at": self.generated_at,
             "nodes": [n.to_dict() for n in self.nodes.values()],
-            "edges": [e.to_dict() for e in self.edges]
+            "edges": list(self.index.records())
         }
@@ -0,0 +1,129 @@
+"""
+Meta projection profiles.
+
+By default a node's ``meta`` is the whole discovered resource. Projection
+keeps only selected fields, which makes nodes (and the graph file) several
+times smaller on large projects:
+
+* ``minimal``: exactly the fields ``ui/tree.py``, ``ui/table.py`` and the web
+  UI read, plus the foreign keys edges are built from and ``updated_at``
+  (used by incremental refresh).
+* ``ui``: ``minimal`` plus common descriptive fields for the details panel.
+* ``full``: the resource unchanged.
+
+Fields are names of top-level attributes; ``name[].sub`` keeps only ``sub``
+of every element of the list ``name``.
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .relations import RELATIONS
+from ..utils.resource import get_field
+
+PROFILES = ("minimal", "ui", "full")
+DEFAULT_PROFILE = "full"
+
+# Read by every profile: table view status, incremental refresh
+COMMON_FIELDS = ("status", "updated_at")
+
+MINIMAL_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "server": ("availability_zone", "flavor_name", "image_name", "key_name", "created_at"),
+    "volume": ("size", "volume_type"),
+    "snapshot": ("size",),
+    "port": ("fixed_ips[].ip_address", "mac_address"),
+    "security_group": tuple(f"security_group_rules[].{f}" for f in (
+        "id", "direction", "ethertype", "protocol", "port_range_min", "port_range_max",
+        "remote_ip_prefix", "remote_group_id")),
+    "subnet": ("cidr", "gateway_ip"),
+    "listener": ("protocol", "protocol_port"),
+    "l7_policy": ("action",),
+    "l7_rule": ("type", "compare_type", "value", "key"),
+    "pool": ("protocol",),
+    "health_monitor": ("type", "delay", "max_retries"),
+    "member": ("address",),
+    "floating_ip": ("fixed_ip_address",),
+}
+
+UI_FIELDS = ("description", "created_at", "project_id", "tags")
+
+UI_EXTRA_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "server": ("addresses", "flavor", "image", "power_state"),
+    "volume": ("availability_zone", "bootable", "is_bootable", "is_encrypted"),
+    "port": ("fixed_ips[].subnet_id", "network_id", "device_owner", "is_admin_state_up"),
+    "network": ("subnet_ids", "mtu", "is_router_external", "is_shared"),
+    "subnet": ("ip_version", "is_dhcp_enabled", "dns_nameservers"),
+    "router": ("external_gateway_info",),
+    "floating_ip": ("floating_network_id", "port_id"),
+    "load_balancer": ("vip_address", "provisioning_status", "operating_status"),
+    "listener": ("provisioning_status", "operating_status"),
+    "pool": ("lb_algorithm", "provisioning_status", "operating_status"),
+    "member": ("protocol_port", "weight", "operating_status"),
+    "health_monitor": ("url_path", "expected_codes", "timeout"),
+    "l7_policy": ("redirect_pool_id", "redirect_url"),
+}
+
+def relation_fields(node_type: str) -> Tuple[str, ...]:
+    """Fields the relationship registry reads from ``node_type`` resources."""
+    fields: List[str] = []
+    for relation in RELATIONS:
+        if relation.source != node_type:
+            continue
+        for alternative in relation.path.split("|"):
+            segments = alternative.split(".")
+            # The container holding the final key, e.g. "attachments[]."
+            prefix = "".join(segment + "." for segment in segments[:-1])
+            if prefix and not prefix.endswith("[]."):
+                # Nested non-list containers are kept whole
+                fields.append(segments[0].rstrip("[]"))
+                continue
+            fields.append(prefix + segments[-1].rstrip("[]"))
+            fields.extend(prefix + field for _, field in relation.meta)
+    return tuple(dict.fromkeys(fields))
+
+def profile_fields(profile: str, node_type: str) -> Tuple[str, ...]:
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown meta profile: {profile}")
+    fields = COMMON_FIELDS + MINIMAL_FIELDS.get(node_type, ()) + relation_fields(node_type)
+    if profile == "ui":
+        fields += UI_FIELDS + UI_EXTRA_FIELDS.get(node_type, ())
+    return tuple(dict.fromkeys(fields))
+
+def _has(item: Any, name: str) -> bool:
+    try:
+        return name in item
+    except TypeError:
+        return False
+
+def project(item: Any, fields: Iterable[str]) -> Dict[str, Any]:
+    """Plain dict with only ``fields`` of ``item`` (an SDK resource or dict)."""
+    projected: Dict[str, Any] = {}
+    for field in fields:
+        name, _, sub = field.partition("[].")
+        value = get_field(item, name)
+        if value is None:
+            if _has(item, name) and not sub:
+                projected[name] = None
+            continue
+        if not sub:
+            projected[name] = value
+            continue
+        elements = projected.setdefault(name, [{} for _ in value])
+        for target, element in zip(elements, value):
+            target[sub] = get_field(element, sub)
+    return projected
+
+class MetaProjector:
+    """Applies one profile; field lists are resolved once per node type."""
+
+    def __init__(self, profile: str = DEFAULT_PROFILE):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown meta profile: {profile}")
+        self.profile = profile
+        self._fields: Dict[str, Tuple[str, ...]] = {}
+
+    def __call__(self, node_type: str, item: Any) -> Any:
+        if self.profile == "full":
+            return item
+        fields = self._fields.get(node_type)
+        if fields is None:
+            fields = self._fields[node_type] = profile_fields(self.profile, node_type)
+        return project(item, fields)
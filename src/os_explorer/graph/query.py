@@ -0,0 +1,168 @@
+"""
+Reachability, blast-radius and path queries.
+
+Queries walk the adjacency index every graph view keeps (``Graph``,
+``GraphIndex``, ``Snapshot``), so they cost time proportional to the part
+of the graph they visit rather than to its size: a blast radius in a
+100k-node graph takes milliseconds and needs no copy of the graph.
+
+Edges point from a resource to what it uses or contains (server -> port ->
+security group, floating IP -> port -> network), hence:
+
+* ``reachable`` follows edges forward: everything a resource relies on.
+  Ports are also followed back to their server (``has_port`` points
+  server -> port), so a floating IP reaches the server behind it.
+* ``impact`` follows them backwards: everything relying on a resource,
+  e.g. the servers behind a security group or network.
+* ``shortest_path`` ignores direction unless told otherwise.
+
+``depth`` bounds the number of hops, ``edge_types`` the edges followed and
+``node_types`` the nodes reported (the walk still passes through others).
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .compact import CompactIndex
+from .index import BOTH, GraphQueries, IN, OUT
+
+QUERIES = ("reachable", "impact", "path")
+
+# Edge types ``reachable`` also follows backwards: what a port is attached to
+REACH_BACK = ("has_port",)
+
+# A direction to walk and the edge types followed that way (None: all)
+Route = Tuple[str, Optional[Sequence[str]]]
+
+def _routes(direction: str, edge_types: Optional[Sequence[str]], back: Sequence[str] = ()) -> List[Route]:
+    """Routes for a walk in ``direction``, plus the ``back`` edge types the other way."""
+    routes: List[Route] = [(walk, edge_types) for walk in ((OUT, IN) if direction == BOTH else (direction,))]
+    back = [t for t in back if not edge_types or t in edge_types]
+    if back and direction != BOTH:
+        routes.append((IN if direction == OUT else OUT, back))
+    return routes
+
+@dataclass
+class QueryResult:
+    """Nodes found (in walk order) with their distance, and the edges they were reached by."""
+    node_ids: List[str] = field(default_factory=list)
+    depths: Dict[str, int] = field(default_factory=dict)
+    edges: List[Any] = field(default_factory=list)
+
+    def to_dict(self, graph: GraphQueries) -> Dict[str, Any]:
+        nodes = []
+        for node_id in self.node_ids:
+            node = graph.get_node(node_id)
+            record = node.to_dict() if hasattr(node, "to_dict") else dict(node)
+            record["depth"] = self.depths[node_id]
+            nodes.append(record)
+        return {"nodes": nodes, "edges": [edge.to_dict() if hasattr(edge, "to_dict") else edge for edge in self.edges]}
+
+def _steps(graph: GraphQueries, node_id: str, routes: Sequence[Route]) -> Iterator[Tuple[str, Any]]:
+    for walk, edge_types in routes:
+        for edge_type in edge_types or (None,):
+            yield from graph.index.adjacent(node_id, edge_type, walk)
+
+def _walk(graph: GraphQueries, start: str, depth: Optional[int], routes: Sequence[Route]) -> Iterator[Tuple[str, int, Any]]:
+    """Breadth-first ``(node_id, hops, edge reached by)``, the start excluded.
+
+    On a ``CompactIndex`` the edge is an edge number; ``_edges`` turns it into
+    an ``Edge``, so only the edges a query keeps are created.
+    """
+    if isinstance(graph.index, CompactIndex):
+        # Walks node and edge numbers instead
+        yield from graph.index.walk(start, depth, routes)
+        return
+    seen = {start}
+    frontier = deque([(start, 0)])
+    while frontier:
+        current, hops = frontier.popleft()
+        if depth is not None and hops >= depth:
+            continue
+        for other, edge in _steps(graph, current, routes):
+            # Dangling edges (to resources outside the graph) are not followed
+            if other in seen or graph.index.node_type(other) is None:
+                continue
+            seen.add(other)
+            frontier.append((other, hops + 1))
+            yield other, hops + 1, edge
+
+def _edges(graph: GraphQueries) -> Callable[[Any], Any]:
+    """Edge for an edge reference yielded by ``_walk``."""
+    if isinstance(graph.index, CompactIndex):
+        return graph.index.edge
+    return lambda edge: edge
+
+def _check(graph: GraphQueries, *node_ids: str) -> None:
+    for node_id in node_ids:
+        if graph.index.node_type(node_id) is None:
+            raise KeyError(node_id)
+
+def reachable(graph: GraphQueries, start: str, depth: Optional[int] = None, direction: str = OUT,
+              edge_types: Optional[Sequence[str]] = None, node_types: Optional[Sequence[str]] = None) -> QueryResult:
+    """Nodes reachable from ``start``; raises KeyError when it is not in the graph."""
+    _check(graph, start)
+    result = QueryResult()
+    wanted = set(node_types) if node_types else None
+    edge_of = _edges(graph)
+    routes = _routes(direction, edge_types, REACH_BACK if direction == OUT else ())
+    for node_id, hops, edge in _walk(graph, start, depth, routes):
+        result.edges.append(edge_of(edge))
+        if wanted is None or graph.index.node_type(node_id) in wanted:
+            result.node_ids.append(node_id)
+            result.depths[node_id] = hops
+    return result
+
+def impact(graph: GraphQueries, start: str, depth: Optional[int] = None, edge_types: Optional[Sequence[str]] = None,
+           node_types: Optional[Sequence[str]] = None) -> QueryResult:
+    """Blast radius of ``start``: the nodes relying on it, directly or not."""
+    return reachable(graph, start, depth, IN, edge_types, node_types)
+
+def shortest_path(graph: GraphQueries, source: str, target: str, depth: Optional[int] = None, direction: str = BOTH,
+                  edge_types: Optional[Sequence[str]] = None) -> Optional[QueryResult]:
+    """Fewest-hop path from ``source`` to ``target`` (both included), or None."""
+    _check(graph, source, target)
+    if source == target:
+        return QueryResult([source], {source: 0})
+    reached_by: Dict[str, Tuple[str, Any]] = {}
+    for node_id, _, edge in _walk(graph, source, depth, _routes(direction, edge_types)):
+        reached_by[node_id] = edge
+        if node_id == target:
+            break
+    else:
+        return None
+
+    path = [target]
+    edges = []
+    edge_of = _edges(graph)
+    while path[-1] != source:
+        edge = edge_of(reached_by[path[-1]])
+        edges.append(edge)
+        ends = _ends(edge)
+        path.append(ends[0] if ends[1] == path[-1] else ends[1])
+    path.reverse()
+    edges.reverse()
+    return QueryResult(path, {node_id: hops for hops, node_id in enumerate(path)}, edges)
+
+def _ends(edge: Any) -> Tuple[str, str]:
+    if isinstance(edge, dict):
+        return edge["from"], edge["to"]
+    return edge.from_node, edge.to_node
+
+def run_query(graph: GraphQueries, kind: str, start: str, target: Optional[str] = None, depth: Optional[int] = None,
+              direction: Optional[str] = None, edge_types: Optional[Sequence[str]] = None,
+              node_types: Optional[Sequence[str]] = None) -> Optional[QueryResult]:
+    """Dispatch one of ``QUERIES``; ValueError for bad arguments, KeyError for unknown nodes."""
+    if kind not in QUERIES:
+        raise ValueError(f"Unknown query: {kind} (expected one of {', '.join(QUERIES)})")
+    if direction is not None and direction not in (OUT, IN, BOTH):
+        raise ValueError(f"Unknown direction: {direction}")
+    if kind == "path":
+        if target is None:
+            raise ValueError("A path query needs a target node")
+        return shortest_path(graph, start, target, depth, direction or BOTH, edge_types)
+    if kind == "impact":
+        if direction is not None and direction != IN:
+            raise ValueError("Impact queries always follow edges backwards")
+        return impact(graph, start, depth, edge_types, node_types)
+    return reachable(graph, start, depth, direction or OUT, edge_types, node_types)
@@ -0,0 +1,99 @@
+"""
+Declarative relationship registry.
+
+Every edge in the graph comes from one ``Relation`` entry: a resource of the
+``source`` type references a ``target`` resource through a foreign-key field
+path. ``GraphBuilder`` evaluates the references as resources are added and
+links them against a hash index of known nodes, so linking is linear in the
+number of resources and references.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from .model import Edge
+from ..utils.resource import get_field
+
+@dataclass(frozen=True)
+class Relation:
+    """
+    ``source`` nodes reference ``target`` nodes through ``path``.
+
+    ``path`` is a dotted field path where a ``[]`` suffix iterates a list
+    (``attachments[].server_id``); alternatives separated by ``|`` are tried in
+    order until one yields a value. Edges go source -> target, or target ->
+    source when ``inverse`` is set. ``meta`` maps edge meta keys to fields of
+    the object holding the final key (the attachment, the listener ref, ...).
+    Relations with ``plan`` unset only serve graph queries and are not
+    followed when planning type-selective discovery (``discovery/planner.py``).
+    """
+    source: str
+    path: str
+    target: str
+    edge_type: str
+    inverse: bool = False
+    meta: Tuple[Tuple[str, str], ...] = ()
+    plan: bool = True
+
+    def resolve(self, item: Any) -> List[Tuple[Any, Any]]:
+        """``(container, referenced_id)`` pairs for one source resource."""
+        for alternative in self.path.split("|"):
+            found = resolve_path(item, alternative.split("."))
+            if found:
+                return found
+        return []
+
+    def references(self, item: Any) -> List[Tuple[Any, Dict[str, Any]]]:
+        """``(referenced_id, edge meta)`` pairs for one source resource."""
+        return [(ref, {key: get_field(container, field) for key, field in self.meta})
+                for container, ref in self.resolve(item)]
+
+    def edge(self, item_id: Any, ref: Any, meta: Dict[str, Any]) -> Edge:
+        if self.inverse:
+            return Edge(from_node=ref, to_node=item_id, type=self.edge_type, meta=meta)
+        return Edge(from_node=item_id, to_node=ref, type=self.edge_type, meta=meta)
+
+RELATIONS: List[Relation] = [
+    Relation("volume", "attachments[].server_id", "server", "attached", inverse=True, meta=(("device", "device"),)),
+    Relation("snapshot", "volume_id", "volume", "has_snapshot", inverse=True),
+    Relation("subnet", "network_id", "network", "has_subnet", inverse=True),
+    Relation("port", "security_group_ids[]|security_groups[]", "security_group", "has_sg"),
+    Relation("port", "device_id", "server", "has_port", inverse=True),
+    # Query-only: following them would list every port for --types network
+    Relation("port", "network_id", "network", "on_network", plan=False),
+    Relation("floating_ip", "port_id", "port", "associated", plan=False),
+    Relation("listener", "load_balancers[].id", "load_balancer", "has_listener", inverse=True),
+    Relation("listener", "default_pool_id", "pool", "has_pool"),
+    Relation("member", "pool_id", "pool", "has_member", inverse=True),
+    Relation("l7_policy", "listener_id", "listener", "has_policy", inverse=True, meta=(("position", "position"),)),
+    Relation("l7_rule", "l7_policy_id|policy_id", "l7_policy", "has_rule", inverse=True),
+    Relation("health_monitor", "pools[].id", "pool", "has_monitor", inverse=True),
+]
+
+def resolve_path(item: Any, segments: List[str]) -> List[Tuple[Any, Any]]:
+    containers = [item]
+    for segment in segments[:-1]:
+        many = segment.endswith("[]")
+        name = segment[:-2] if many else segment
+        next_containers = []
+        for container in containers:
+            value = get_field(container, name)
+            if value is None:
+                continue
+            if many:
+                next_containers.extend(value)
+            else:
+                next_containers.append(value)
+        containers = next_containers
+
+    last = segments[-1]
+    many = last.endswith("[]")
+    name = last[:-2] if many else last
+    found = []
+    for container in containers:
+        value = get_field(container, name)
+        if not value:
+            continue
+        for ref in (value if many else [value]):
+            if ref:
+                found.append((container, ref))
+    return found
@@ -0,0 +1,408 @@
+"""
+Compact binary graph snapshots.
+
+A snapshot is opened with ``mmap`` and decoded lazily, so opening one is
+constant time and only the nodes and edges actually visited are decoded.
+
+Layout (all integers little-endian, regions 8-byte aligned)::
+
+    magic "OSXSNAP1" | u32 header length | header JSON
+    strings   u32 offsets[S + 1] + UTF-8 blob (IDs, names, types... interned)
+    nodes     N fixed-size records, grouped into one section per node type
+    id_index  u32 node numbers sorted by node ID (binary search)
+    edges     E fixed-size records in graph order
+    out/in    u32 offsets[N + 1] + u32 edge numbers (CSR adjacency per node)
+    meta      JSON blob referenced by node and edge records
+    scope     optional u32 (region, project_id) string numbers per node,
+              present only for merged multi-region/project graphs
+
+The header JSON holds the project fields, region offsets and the per-type
+sections as ``[type, first node number, count]``.
+"""
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .index import GraphQueries, OUT
+from .model import Graph
+from .serialize import dumps, loads, node_record, edge_record
+
+MAGIC = b"OSXSNAP1"
+VERSION = 1
+NONE = 0xFFFFFFFF
+
+# id, name, label, created_at, updated_at (string numbers), meta offset/length, partial
+NODE = struct.Struct("<5IQI?3x")
+# from, to, type (string numbers), meta offset/length
+EDGE = struct.Struct("<3IQI")
+
+# Decoded nodes and edges kept per snapshot (least recently used go first)
+DECODED_LIMIT = 65536
+
+PathLike = Union[str, Path]
+
+def is_snapshot(path: PathLike) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+class _Writer:
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+        self.meta = bytearray()
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+        value = str(value)
+        number = self.strings.get(value)
+        if number is None:
+            number = self.strings[value] = len(self.strings)
+        return number
+
+    def add_meta(self, value: Any) -> Tuple[int, int]:
+        if not value:
+            return 0, 0
+        data = dumps(value)
+        offset = len(self.meta)
+        self.meta += data
+        return offset, len(data)
+
+def _u32(values) -> bytes:
+    data = array("I", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+def write_snapshot(graph: Union[Graph, Dict[str, Any]], path: PathLike) -> None:
+    """Write a ``Graph`` (or graph dict) as a binary snapshot."""
+    if isinstance(graph, Graph):
+        header = {"project_id": graph.project_id, "project_name": graph.project_name, "generated_at": graph.generated_at}
+        nodes = [node_record(n) for n in graph.nodes.values()]
+        edges = [edge_record(e) for e in graph.edges]
+    else:
+        header = {k: v for k, v in graph.items() if k not in ("nodes", "edges")}
+        nodes = list(graph.get("nodes", []))
+        edges = list(graph.get("edges", []))
+
+    writer = _Writer()
+    # Per-type sections: stable grouping by first appearance of each type
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    for node in nodes:
+        by_type.setdefault(node["type"], []).append(node)
+    sections = []
+    ordered = []
+    for node_type, members in by_type.items():
+        sections.append([node_type, len(ordered), len(members)])
+        ordered.extend(members)
+    number_of = {node["id"]: i for i, node in enumerate(ordered)}
+
+    node_data = bytearray()
+    for node in ordered:
+        meta_offset, meta_len = writer.add_meta(node.get("meta"))
+        node_data += NODE.pack(
+            writer.intern(node["id"]), writer.intern(node.get("name")), writer.intern(node.get("label")),
+            writer.intern(node.get("created_at")), writer.intern(node.get("updated_at")),
+            meta_offset, meta_len, bool(node.get("partial")))
+
+    edge_data = bytearray()
+    out_lists: List[List[int]] = [[] for _ in ordered]
+    in_lists: List[List[int]] = [[] for _ in ordered]
+    for number, edge in enumerate(edges):
+        meta_offset, meta_len = writer.add_meta(edge.get("meta"))
+        edge_data += EDGE.pack(writer.intern(edge["from"]), writer.intern(edge["to"]), writer.intern(edge["type"]), meta_offset, meta_len)
+        if edge["from"] in number_of:
+            out_lists[number_of[edge["from"]]].append(number)
+        if edge["to"] in number_of:
+            in_lists[number_of[edge["to"]]].append(number)
+
+    scoped = any(node.get("region") is not None or node.get("project_id") is not None for node in ordered)
+    scope = _u32([writer.intern(node.get(f)) for node in ordered for f in ("region", "project_id")]) if scoped else b""
+
+    string_list = list(writer.strings)
+    encoded = [s.encode("utf-8") for s in string_list]
+    string_offsets = [0]
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+    id_index = sorted(range(len(ordered)), key=lambda i: encoded[writer.strings[str(ordered[i]["id"])]])
+
+    def csr(lists: List[List[int]]) -> bytes:
+        offsets = [0]
+        for items in lists:
+            offsets.append(offsets[-1] + len(items))
+        return _u32(offsets) + _u32([n for items in lists for n in items])
+
+    regions = {
+        "string_offsets": _u32(string_offsets),
+        "strings": b"".join(encoded),
+        "nodes": bytes(node_data),
+        "id_index": _u32(id_index),
+        "edges": bytes(edge_data),
+        "out": csr(out_lists),
+        "in": csr(in_lists),
+        "meta": bytes(writer.meta),
+    }
+    if scoped:
+        regions["scope"] = scope
+
+    header.update(version=VERSION, string_count=len(string_list), node_count=len(ordered),
+                  edge_count=len(edges), sections=sections, regions={})
+    # Region offsets are relative to the end of the (padded) header
+    layout = {}
+    position = 0
+    for name, data in regions.items():
+        layout[name] = [position, len(data)]
+        position += len(data) + (-len(data) % 8)
+    header["regions"] = layout
+    header_bytes = json.dumps(header, default=str).encode("utf-8")
+    header_bytes += b" " * (-(len(MAGIC) + 4 + len(header_bytes)) % 8)
+
+    # Written aside and renamed: readers may still have the old file mapped
+    partial = Path(f"{path}.tmp")
+    with open(partial, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for data in regions.values():
+            f.write(data + b"\0" * (-len(data) % 8))
+    os.replace(partial, path)
+
+class SnapshotIndex:
+    """``AdjacencyIndex``-compatible view over the snapshot's CSR tables."""
+
+    def __init__(self, snapshot: "Snapshot"):
+        self.snapshot = snapshot
+
+    def node_type(self, node_id: str) -> Optional[str]:
+        number = self.snapshot._find(node_id)
+        return None if number is None else self.snapshot._type_of(number)
+
+    def node_ids(self, node_type: str) -> List[str]:
+        snapshot = self.snapshot
+        first, count = snapshot._sections.get(node_type, (0, 0))
+        return [snapshot._string(snapshot._node_fields(n)[0]) for n in range(first, first + count)]
+
+    def types(self) -> List[str]:
+        return list(self.snapshot._sections)
+
+    def adjacent(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[Tuple[str, Any]]:
+        snapshot = self.snapshot
+        number = snapshot._find(node_id)
+        if number is None:
+            return []
+        offsets, edge_numbers = snapshot._out if direction == OUT else snapshot._in
+        found = []
+        for position in range(offsets[number], offsets[number + 1]):
+            from_s, to_s, type_s, _, _ = snapshot._edge_fields(edge_numbers[position])
+            if edge_type is not None and snapshot._string(type_s) != edge_type:
+                continue
+            other = to_s if direction == OUT else from_s
+            found.append((snapshot._string(other), snapshot.edge(edge_numbers[position])))
+        return found
+
+    def neighbor_ids(self, node_id: str, edge_type: Optional[str] = None, direction: str = OUT) -> List[str]:
+        return [other for other, _ in self.adjacent(node_id, edge_type, direction)]
+
+class Snapshot(GraphQueries):
+    """Read-only, lazily decoded graph backed by a memory-mapped snapshot file.
+
+    Exposes the same query API as ``GraphIndex``; nodes and edges are the
+    dicts of the graph JSON schema. Only the ``decoded_limit`` most recently
+    used nodes and edges stay decoded, so a long-lived reader does not end
+    up holding the whole graph.
+    """
+
+    def __init__(self, path: PathLike, decoded_limit: int = DECODED_LIMIT):
+        self.path = Path(path)
+        self.decoded_limit = decoded_limit
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a graph snapshot")
+        (header_len,) = struct.unpack_from("<I", view, len(MAGIC))
+        base = len(MAGIC) + 4
+        self.header = json.loads(bytes(view[base:base + header_len]))
+        if self.header.get("version") != VERSION:
+            raise ValueError(f"Unsupported snapshot version: {self.header.get('version')}")
+        base += header_len
+
+        def region(name: str) -> memoryview:
+            offset, length = self.header["regions"][name]
+            return view[base + offset:base + offset + length]
+
+        def u32(name: str) -> memoryview:
+            # Snapshots are little-endian; fall back to a copy on big-endian hosts
+            data = region(name)
+            if sys.byteorder == "little":
+                return data.cast("I")
+            values = array("I", data)
+            values.byteswap()
+            return memoryview(values)
+
+        self._view = view
+        self._string_offsets = u32("string_offsets")
+        self._strings = region("strings")
+        self._nodes = region("nodes")
+        self._id_index = u32("id_index")
+        self._edges = region("edges")
+        self._meta = region("meta")
+        self._scope = u32("scope") if "scope" in self.header["regions"] else None
+        node_count = self.header["node_count"]
+        out_table, in_table = u32("out"), u32("in")
+        self._out = (out_table[:node_count + 1], out_table[node_count + 1:])
+        self._in = (in_table[:node_count + 1], in_table[node_count + 1:])
+        self._sections = {t: (first, count) for t, first, count in self.header["sections"]}
+        starts = sorted((first, t) for t, (first, _) in self._sections.items())
+        self._section_firsts = [first for first, _ in starts]
+        self._section_types = [t for _, t in starts]
+        self._decoded: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._decoded_edges: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.index = SnapshotIndex(self)
+
+    @classmethod
+    def open(cls, path: PathLike) -> "Snapshot":
+        return cls(path)
+
+    def close(self):
+        for name in ("_string_offsets", "_id_index", "_out", "_in", "_strings", "_nodes", "_edges", "_meta", "_scope"):
+            value = getattr(self, name)
+            if value is None:
+                continue
+            for view in (value if isinstance(value, tuple) else (value,)):
+                view.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Decoding helpers
+
+    def _string(self, number: int) -> Optional[str]:
+        if number == NONE:
+            return None
+        return str(self._strings[self._string_offsets[number]:self._string_offsets[number + 1]], "utf-8")
+
+    def _string_bytes(self, number: int) -> bytes:
+        return self._strings[self._string_offsets[number]:self._string_offsets[number + 1]].tobytes()
+
+    def _node_fields(self, number: int) -> Tuple:
+        return NODE.unpack_from(self._nodes, number * NODE.size)
+
+    def _edge_fields(self, number: int) -> Tuple:
+        return EDGE.unpack_from(self._edges, number * EDGE.size)
+
+    def _decode_meta(self, offset: int, length: int) -> Dict[str, Any]:
+        return loads(self._meta[offset:offset + length].tobytes()) if length else {}
+
+    def _type_of(self, number: int) -> str:
+        return self._section_types[bisect.bisect_right(self._section_firsts, number) - 1]
+
+    def _find(self, node_id: str) -> Optional[int]:
+        """Node number for ``node_id`` by binary search over the sorted ID index."""
+        key = node_id.encode("utf-8")
+        index = self._id_index
+        low, high = 0, len(index)
+        while low < high:
+            middle = (low + high) // 2
+            if self._string_bytes(self._node_fields(index[middle])[0]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(index) and self._string_bytes(self._node_fields(index[low])[0]) == key:
+            return index[low]
+        return None
+
+    def _remember(self, decoded: "OrderedDict[int, Dict[str, Any]]", number: int, value: Dict[str, Any]) -> None:
+        decoded[number] = value
+        if len(decoded) > self.decoded_limit:
+            decoded.popitem(last=False)
+
+    def _node(self, number: int) -> Dict[str, Any]:
+        node = self._decoded.get(number)
+        if node is not None:
+            self._decoded.move_to_end(number)
+        else:
+            id_s, name_s, label_s, created_s, updated_s, meta_offset, meta_len, partial = self._node_fields(number)
+            node = {
+                "id": self._string(id_s),
+                "type": self._type_of(number),
+                "name": self._string(name_s),
+                "label": self._string(label_s),
+                "meta": self._decode_meta(meta_offset, meta_len),
+                "created_at": self._string(created_s),
+                "updated_at": self._string(updated_s),
+                "partial": partial,
+            }
+            if self._scope is not None:
+                for position, field in enumerate(("region", "project_id")):
+                    value = self._string(self._scope[2 * number + position])
+                    if value is not None:
+                        node[field] = value
+            self._remember(self._decoded, number, node)
+        return node
+
+    # Public API
+
+    @property
+    def project_id(self) -> Optional[str]:
+        return self.header.get("project_id")
+
+    @property
+    def project_name(self) -> Optional[str]:
+        return self.header.get("project_name")
+
+    @property
+    def generated_at(self) -> Optional[str]:
+        return self.header.get("generated_at")
+
+    def __len__(self) -> int:
+        return self.header["node_count"]
+
+    def node(self, number: int) -> Dict[str, Any]:
+        return self._node(number)
+
+    def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        number = self._find(node_id)
+        return None if number is None else self._node(number)
+
+    def nodes_of_type(self, node_type: str) -> List[Dict[str, Any]]:
+        first, count = self._sections.get(node_type, (0, 0))
+        return [self._node(n) for n in range(first, first + count)]
+
+    @property
+    def nodes(self) -> Iterator[Dict[str, Any]]:
+        return (self._node(n) for n in range(self.header["node_count"]))
+
+    def edge(self, number: int) -> Dict[str, Any]:
+        edge = self._decoded_edges.get(number)
+        if edge is not None:
+            self._decoded_edges.move_to_end(number)
+        else:
+            from_s, to_s, type_s, meta_offset, meta_len = self._edge_fields(number)
+            edge = {"from": self._string(from_s), "to": self._string(to_s), "type": self._string(type_s),
+                    "meta": self._decode_meta(meta_offset, meta_len)}
+            self._remember(self._decoded_edges, number, edge)
+        return edge
+
+    @property
+    def edges(self) -> Iterator[Dict[str, Any]]:
+        return (self.edge(n) for n in range(self.header["edge_count"]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        graph = {k: v for k, v in self.header.items()
+                 if k not in ("version", "string_count", "node_count", "edge_count", "sections", "regions")}
+        graph["nodes"] = list(self.nodes)
+        graph["edges"] = list(self.edges)
+        return graph
@@ -0,0 +1,213 @@
+"""
+Discovery metrics.
+
+Every list call made through ``_safe_list`` (sync and async backends) is
+recorded per (service, call): latency, item count, pages, bytes received,
+retries (``discovery.scheduler``) and errors by exception class. Pages and
+bytes come from a ``requests`` response hook on the SDK session
+(``instrument_connection``) or from the async client, attributed to the
+call running in the current thread or task.
+Stages such as graph building and serialization are timed with ``stage``.
+
+``METRICS`` is the process-wide registry. ``render_prometheus`` formats it
+in the Prometheus text format for the web API's ``/metrics`` endpoint, and
+``ui.profile`` renders it as the CLI's ``--profile`` table.
+"""
+import copy
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Latency histogram bucket bounds, seconds
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    items: int = 0
+    pages: int = 0
+    bytes: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    errors: Dict[str, int] = field(default_factory=dict)
+    # Observations per bucket of BUCKETS, plus one for +Inf
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+
+    def observe(self, seconds: float) -> None:
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def merge(self, other: "CallStats") -> None:
+        self.calls += other.calls
+        self.items += other.items
+        self.pages += other.pages
+        self.bytes += other.bytes
+        self.retries += other.retries
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+@dataclass
+class StageStats:
+    count: int = 0
+    seconds: float = 0.0
+
+class ActiveCall:
+    """One call in progress; ``items`` and ``error`` are set by the caller."""
+
+    def __init__(self):
+        self.items = 0
+        self.pages = 0
+        self.bytes = 0
+        self.retries = 0
+        self.error: Optional[BaseException] = None
+
+_active: ContextVar[Optional[ActiveCall]] = ContextVar("os_explorer_active_call", default=None)
+
+class Metrics:
+    def __init__(self):
+        self.calls: Dict[Tuple[str, str], CallStats] = {}
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def call(self, service: str, name: str) -> Iterator[ActiveCall]:
+        active = ActiveCall()
+        token = _active.set(active)
+        started = time.perf_counter()
+        try:
+            yield active
+        finally:
+            elapsed = time.perf_counter() - started
+            _active.reset(token)
+            with self._lock:
+                stats = self.calls.setdefault((service, name), CallStats())
+                stats.calls += 1
+                stats.items += active.items
+                stats.pages += active.pages
+                stats.bytes += active.bytes
+                stats.retries += active.retries
+                stats.observe(elapsed)
+                if active.error is not None:
+                    error = type(active.error).__name__
+                    stats.errors[error] = stats.errors.get(error, 0) + 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats = self.stages.setdefault(name, StageStats())
+                stats.count += 1
+                stats.seconds += elapsed
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.stages.clear()
+
+    def export(self) -> Dict[str, Any]:
+        """Picklable copy, e.g. to send from a worker process to ``merge``."""
+        with self._lock:
+            return copy.deepcopy({"calls": self.calls, "stages": self.stages})
+
+    def merge(self, exported: Dict[str, Any]) -> None:
+        with self._lock:
+            for key, stats in exported["calls"].items():
+                self.calls.setdefault(key, CallStats()).merge(stats)
+            for name, stats in exported["stages"].items():
+                mine = self.stages.setdefault(name, StageStats())
+                mine.count += stats.count
+                mine.seconds += stats.seconds
+
+METRICS = Metrics()
+
+def current_call() -> Optional[ActiveCall]:
+    """The call running in this thread/task, if any."""
+    return _active.get()
+
+def record_page(size: int) -> None:
+    """Count one response of ``size`` bytes for the call running in this thread/task."""
+    active = _active.get()
+    if active is not None:
+        active.pages += 1
+        active.bytes += size
+
+def _on_response(response, *args, **kwargs):
+    length = response.headers.get("Content-Length")
+    record_page(int(length) if length and length.isdigit() else len(response.content or b""))
+    return response
+
+def instrument_connection(conn: Any) -> None:
+    """Install the response hook on the connection's HTTP session (once)."""
+    session = getattr(getattr(conn, "session", None), "session", None)
+    hooks = getattr(session, "hooks", None)
+    if not isinstance(hooks, dict):
+        return
+    responses = hooks.setdefault("response", [])
+    if _on_response not in responses:
+        responses.append(_on_response)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}" if labels else ""
+
+# (name, type, help, [(labels, value)]) families appended by callers
+Family = Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]
+
+def render_prometheus(metrics: Metrics = METRICS, extra: Optional[List[Family]] = None) -> str:
+    """Prometheus text exposition of ``metrics`` followed by the ``extra`` families."""
+    exported = metrics.export()
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    calls = sorted(exported["calls"].items())
+    family("os_explorer_api_call_duration_seconds", "histogram", "Latency of discovery list calls")
+    for (service, name), stats in calls:
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), stats.buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"os_explorer_api_call_duration_seconds_bucket{_labels(service=service, call=name, le=le)} {cumulative}")
+        lines.append(f"os_explorer_api_call_duration_seconds_sum{_labels(service=service, call=name)} {stats.seconds}")
+        lines.append(f"os_explorer_api_call_duration_seconds_count{_labels(service=service, call=name)} {stats.calls}")
+    for metric, attr, help_text in (
+        ("os_explorer_api_call_items_total", "items", "Resources returned by discovery list calls"),
+        ("os_explorer_api_call_pages_total", "pages", "HTTP responses (pages) received by discovery list calls"),
+        ("os_explorer_api_call_bytes_total", "bytes", "Response bytes received by discovery list calls"),
+        ("os_explorer_api_call_retries_total", "retries", "Discovery list calls retried after throttling or transient errors"),
+    ):
+        family(metric, "counter", help_text)
+        for (service, name), stats in calls:
+            lines.append(f"{metric}{_labels(service=service, call=name)} {getattr(stats, attr)}")
+    family("os_explorer_api_call_errors_total", "counter", "Failed discovery list calls by exception class")
+    for (service, name), stats in calls:
+        for error, count in sorted(stats.errors.items()):
+            lines.append(f"os_explorer_api_call_errors_total{_labels(service=service, call=name, error=error)} {count}")
+
+    family("os_explorer_stage_duration_seconds", "summary", "Time spent in discovery, graph building and serialization")
+    for name, stats in sorted(exported["stages"].items()):
+        lines.append(f"os_explorer_stage_duration_seconds_sum{_labels(stage=name)} {stats.seconds}")
+        lines.append(f"os_explorer_stage_duration_seconds_count{_labels(stage=name)} {stats.count}")
+
+    for name, kind, help_text, samples in extra or []:
+        family(name, kind, help_text)
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(**labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,242 @@
+"""
+Discovery orchestration shared by the CLI, the web API and the benchmarks.
+
+Only what every run needs is imported up front; the discoverers come from
+the plugin registry (``discovery.registry``) and are imported, together
+with openstacksdk or httpx, when a discovery actually starts.
+"""
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .cache import DiscoveryCache
+from .config import load_config, CONNECTIONS
+from .metrics import METRICS, instrument_connection
+from .graph.builder import GraphBuilder
+from .graph.model import Edge, Graph, Node
+from .graph.projection import DEFAULT_PROFILE
+from .discovery.executor import DiscoveryExecutor, AsyncDiscoveryExecutor, DiscoveryTask, DEFAULT_CONCURRENCY
+from .discovery.planner import plan_tasks
+from .discovery.pushdown import DiscoveryQuery, ResourceFilter, images_cache_key
+from .discovery.registry import discoverer
+from .discovery.scheduler import Scheduler
+from .sharding import ShardResult, merge_graphs, plan_shards, run_shards
+from .utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Services whose resources make up the graph, in ``build_tasks`` order
+GRAPH_SERVICES = ("compute", "network", "block_storage", "load_balancer", "image")
+
+@dataclass
+class DiscoveryBatch:
+    """Nodes and edges added to the graph for one chunk of a discovery task's results.
+
+    ``done`` counts the tasks finished so far, this one included when the
+    chunk was its last.
+    """
+    resource: str
+    nodes: List[Node]
+    edges: List[Edge]
+    done: int
+    total: int
+
+OnBatch = Callable[[DiscoveryBatch], None]
+
+def _connect(cloud: str, region: Optional[str], config_file: Optional[str], project_id: Optional[str], conn=None):
+    if conn is not None:
+        # Supplied by the caller (benchmarks, tests): already scoped to its project
+        instrument_connection(conn)
+        project = conn.current_project
+        return conn, conn.current_project_id, project.name if project else conn.current_project_id
+    config = load_config(cloud, region, config_file, project_id)
+    # Pooled: repeated calls (e.g. API requests) reuse the token and catalog
+    conn = config.connection
+    instrument_connection(conn)
+    
+    # If project_id was passed, we expect the connection to be scoped to it.
+    # However, depending on auth type, we might need to verify.
+    # conn.current_project_id should reflect the scoped project.
+    
+    current_project_id = conn.current_project_id
+    project_name = config.project_name
+    
+    logger.info(f"Connected to cloud: {cloud}, Project: {project_name} ({current_project_id})")
+    logger.debug(f"Connection pool: {CONNECTIONS.stats()}")
+    return conn, current_project_id, project_name
+
+def build_tasks(compute, network, storage, lb, image) -> List[DiscoveryTask]:
+    """Discovery calls needed for the graph. Works with sync and async discoverers alike."""
+    return [
+        DiscoveryTask("servers", compute.list_servers),
+        DiscoveryTask("flavors", compute.list_flavors),
+        # Only the images servers were booted from, not the whole visible catalog,
+        # cached per set of image IDs
+        DiscoveryTask("images", image.list_images, depends_on=("servers",), cache_key=images_cache_key),
+        DiscoveryTask("volumes", storage.list_volumes),
+        DiscoveryTask("snapshots", storage.list_snapshots),
+        DiscoveryTask("ports", network.list_ports),
+        DiscoveryTask("networks", network.list_networks),
+        DiscoveryTask("subnets", network.list_subnets),
+        DiscoveryTask("security_groups", network.list_security_groups),
+        DiscoveryTask("routers", network.list_routers),
+        DiscoveryTask("floating_ips", network.list_floating_ips),
+        DiscoveryTask("load_balancers", lb.list_load_balancers),
+        DiscoveryTask("pools", lb.list_pools),
+        DiscoveryTask("listeners", lb.list_listeners),
+        DiscoveryTask("members", lb.list_all_members, depends_on=("pools",)),
+        DiscoveryTask("health_monitors", lb.list_health_monitors),
+        DiscoveryTask("l7_policies", lb.list_l7_policies),
+        DiscoveryTask("l7_rules", lb.list_all_l7_rules, depends_on=("l7_policies",)),
+    ]
+
+def _cached(tasks: List[DiscoveryTask], cloud: str, region: Optional[str], project_id: str, use_cache: bool, max_age: Optional[float], query: DiscoveryQuery) -> List[DiscoveryTask]:
+    if not use_cache:
+        return tasks
+    # Field selection and filters change the results, so they get their own entries
+    cache = DiscoveryCache(cloud, region, project_id, max_age=max_age, variant=query.signature())
+    return cache.wrap_tasks(tasks)
+
+def run_discovery(cloud: str, region: Optional[str] = None, config_file: Optional[str] = None, project_id: Optional[str] = None, concurrency: Optional[int] = None, backend: str = "sdk", use_cache: bool = True, max_age: Optional[float] = None, previous: Optional[dict] = None, meta_profile: str = DEFAULT_PROFILE, conn=None, filters: Optional[ResourceFilter] = None, types: Optional[Sequence[str]] = None) -> dict:
+    """Discover the project and return the graph as a dict (see ``discover_graph``)."""
+    return discover_graph(cloud, region, config_file, project_id, concurrency=concurrency, backend=backend, use_cache=use_cache, max_age=max_age, previous=previous, meta_profile=meta_profile, conn=conn, filters=filters, types=types).to_dict()
+
+def discover_graph(cloud: str, region: Optional[str] = None, config_file: Optional[str] = None, project_id: Optional[str] = None, concurrency: Optional[int] = None, backend: str = "sdk", use_cache: bool = True, max_age: Optional[float] = None, previous: Optional[dict] = None, meta_profile: str = DEFAULT_PROFILE, on_batch: Optional[OnBatch] = None, conn=None, filters: Optional[ResourceFilter] = None, types: Optional[Sequence[str]] = None) -> Graph:
+    """
+    Discover the project and return the ``Graph``.
+
+    With ``previous`` (a graph dict from an earlier run) only resources changed
+    since its ``generated_at`` are fetched and patched into it; this needs
+    the sdk backend. ``on_batch`` is called with the nodes and edges
+    added as discovery results arrive (not for incremental refreshes); the
+    sdk backend streams listings in chunks, the async one per task, from a
+    worker thread so the event loop stays free.
+    ``conn`` replaces the connection built from ``cloud``/``clouds.yaml``.
+    ``filters`` are pushed into the list calls (see ``discovery.pushdown``);
+    projecting meta profiles also request only the fields they keep.
+    ``types`` limits discovery to those node types and the ones needed for
+    their edges (see ``discovery.planner``); not for incremental refreshes.
+    """
+    if previous is not None and types:
+        raise ValueError("Type-selective discovery cannot refresh a previous graph")
+    if previous is not None and backend != "sdk":
+        raise ValueError("Incremental refresh needs the sdk backend")
+    if backend == "async":
+        return asyncio.run(discover_graph_async(cloud, region, config_file, project_id, concurrency=concurrency, use_cache=use_cache, max_age=max_age, meta_profile=meta_profile, on_batch=on_batch, conn=conn, filters=filters, types=types))
+    if backend != "sdk":
+        raise ValueError(f"Unknown discovery backend: {backend}")
+    query = DiscoveryQuery(meta_profile, filters or ResourceFilter())
+    with METRICS.stage("discovery"):
+        return _discover_graph_sdk(cloud, region, config_file, project_id, concurrency or DEFAULT_CONCURRENCY, use_cache, max_age, previous, query, on_batch, conn, types)
+
+def _discover_graph_sdk(cloud: str, region: Optional[str], config_file: Optional[str], project_id: Optional[str], concurrency: int, use_cache: bool, max_age: Optional[float], previous: Optional[dict], query: DiscoveryQuery, on_batch: Optional[OnBatch], conn, types: Optional[Sequence[str]]) -> Graph:
+    conn, current_project_id, project_name = _connect(cloud, region, config_file, project_id, conn)
+    meta_profile = query.meta_profile
+    builder = GraphBuilder(current_project_id, project_name, meta_profile=meta_profile)
+    
+    # Instantiate discoverers; they share per-service rate limits and retries
+    scheduler = Scheduler(concurrency)
+    compute, network, storage, lb, image = (
+        discoverer(name)(conn, current_project_id, logger, max_workers=concurrency, query=query, scheduler=scheduler)
+        for name in GRAPH_SERVICES)
+
+    if previous is not None:
+        from .discovery.delta import DeltaRefresher
+        graph = Graph.from_dict(previous)
+        cache = DiscoveryCache(cloud, region, current_project_id, max_age=max_age, variant=query.signature()) if use_cache else None
+        DeltaRefresher(graph, compute, network, storage, lb, image, logger, cache=cache, max_workers=concurrency, meta_profile=meta_profile).refresh()
+        return graph
+
+    # 1. Discover resources concurrently, turning each chunk of a listing into
+    # nodes as it arrives so whole result sets are never held in memory
+    executor = DiscoveryExecutor(max_workers=concurrency, logger=logger)
+    tasks = _cached(plan_tasks(build_tasks(compute, network, storage, lb, image), types), cloud, region, current_project_id, use_cache, max_age, query)
+    done = 0
+    for name, chunk, finished in executor.stream(tasks):
+        done += finished
+        _add_batch(builder, name, chunk, done, len(tasks), on_batch, complete=finished)
+
+    # 2. Build the remaining edges once everything is known
+    _link_rest(builder, len(tasks), on_batch)
+    _mark_partial(builder, executor.incomplete)
+
+    return builder.graph
+
+def _add_batch(builder: GraphBuilder, name: str, items: List, done: int, total: int, on_batch: Optional[OnBatch], complete: bool = True) -> None:
+    with METRICS.stage("graph_build"):
+        nodes = builder.add_resources(name, items, complete=complete)
+        # Edges between types that are complete can be reported right away
+        edges = builder.link_ready() if on_batch is not None else None
+    if on_batch is not None:
+        on_batch(DiscoveryBatch(name, nodes, edges, done, total))
+
+def _link_rest(builder: GraphBuilder, total: int, on_batch: Optional[OnBatch]) -> None:
+    with METRICS.stage("graph_build"):
+        edges = builder.link_resources()
+    if on_batch is not None and edges:
+        on_batch(DiscoveryBatch("links", [], edges, total, total))
+
+def _mark_partial(builder: GraphBuilder, incomplete: Dict[str, List[Optional[str]]]) -> None:
+    """Flag nodes affected by listings that failed even after retries."""
+    marked = sum(len(builder.mark_partial(key, parents)) for key, parents in incomplete.items())
+    if marked:
+        logger.warning(f"Incomplete listings: {', '.join(sorted(incomplete))}; {marked} nodes marked partial")
+
+async def run_discovery_async(cloud: str, region: Optional[str] = None, config_file: Optional[str] = None, project_id: Optional[str] = None, concurrency: Optional[int] = None, use_cache: bool = True, max_age: Optional[float] = None, meta_profile: str = DEFAULT_PROFILE, filters: Optional[ResourceFilter] = None, types: Optional[Sequence[str]] = None) -> dict:
+    """Same as ``run_discovery`` but on the asyncio backend; ``concurrency`` bounds in-flight HTTP requests."""
+    graph = await discover_graph_async(cloud, region, config_file, project_id, concurrency=concurrency, use_cache=use_cache, max_age=max_age, meta_profile=meta_profile, filters=filters, types=types)
+    return await asyncio.to_thread(graph.to_dict)
+
+async def discover_graph_async(cloud: str, region: Optional[str] = None, config_file: Optional[str] = None, project_id: Optional[str] = None, concurrency: Optional[int] = None, use_cache: bool = True, max_age: Optional[float] = None, meta_profile: str = DEFAULT_PROFILE, on_batch: Optional[OnBatch] = None, conn=None, filters: Optional[ResourceFilter] = None, types: Optional[Sequence[str]] = None) -> Graph:
+    query = DiscoveryQuery(meta_profile, filters or ResourceFilter())
+    with METRICS.stage("discovery"):
+        return await _discover_graph_async(cloud, region, config_file, project_id, concurrency, use_cache, max_age, query, on_batch, conn, types)
+
+async def _discover_graph_async(cloud: str, region: Optional[str], config_file: Optional[str], project_id: Optional[str], concurrency: Optional[int], use_cache: bool, max_age: Optional[float], query: DiscoveryQuery, on_batch: Optional[OnBatch], conn, types: Optional[Sequence[str]]) -> Graph:
+    conn, current_project_id, project_name = await asyncio.to_thread(_connect, cloud, region, config_file, project_id, conn)
+    builder = GraphBuilder(current_project_id, project_name, meta_profile=query.meta_profile)
+
+    from .discovery.aio import AsyncApiClient, DEFAULT_MAX_IN_FLIGHT
+    async with AsyncApiClient(conn, max_in_flight=concurrency or DEFAULT_MAX_IN_FLIGHT) as client:
+        compute, network, storage, lb, image = (
+            discoverer(name, "async")(client, current_project_id, logger, query) for name in GRAPH_SERVICES)
+
+        executor = AsyncDiscoveryExecutor(logger=logger)
+        tasks = _cached(plan_tasks(build_tasks(compute, network, storage, lb, image), types), cloud, region, current_project_id, use_cache, max_age, query)
+        done = 0
+        async for name, items in executor.run(tasks):
+            done += 1
+            # Building and projecting is CPU-bound: keep the event loop serving requests
+            await asyncio.to_thread(_add_batch, builder, name, items, done, len(tasks), on_batch)
+
+    await asyncio.to_thread(_link_rest, builder, len(tasks), on_batch)
+    _mark_partial(builder, executor.incomplete)
+    return builder.graph
+
+def discover_sharded(cloud: str, regions: List[Optional[str]], project_ids: List[Optional[str]], config_file: Optional[str] = None, processes: Optional[int] = None, out: Optional[Path] = None, format: Optional[str] = None, compression: Optional[str] = None, **options) -> Tuple[Optional[Graph], List[ShardResult]]:
+    """
+    Discover every (region, project) pair on a process pool.
+
+    Without ``out`` the shards are merged into one graph; with ``out`` each
+    shard is written to its own file next to it and no graph is returned.
+    Returns the graph and the per-shard results.
+    """
+    shards = plan_shards(regions, project_ids)
+    logger.info(f"Discovering {len(shards)} shards ({len(regions)} regions x {len(project_ids)} projects)")
+    results: List[ShardResult] = []
+
+    def collected():
+        for result in run_shards(discover_graph, cloud, config_file, shards, options, processes=processes, out=out, format=format, compression=compression):
+            results.append(result)
+            if result.graph is not None:
+                yield result.shard, result.graph
+                # Merged already; do not keep a second copy around
+                result.graph = None
+
+    if out is not None:
+        for _ in collected():
+            pass
+        return None, results
+    return merge_graphs(collected(), project_name=cloud), results
+
@@ -0,0 +1,183 @@
+"""
+Discovery across many projects and regions.
+
+Every (region, project) pair is a shard. Shards are discovered in a process
+pool, one ``discover_graph`` run per shard, so inventories of hundreds of
+projects scale with the available cores instead of being limited by one
+interpreter. Results are either merged into one graph, with ``region`` and
+``project_id`` set on every node, or written to one file per shard.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .config import load_config
+from .metrics import METRICS
+from .graph.model import Edge, Graph, Node
+from .graph.serialize import edge_record, node_record, write_graph
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Shard:
+    region: Optional[str]
+    project_id: Optional[str]
+
+    @property
+    def label(self) -> str:
+        return f"{self.region or 'default'}/{self.project_id or 'default'}"
+
+@dataclass
+class ShardResult:
+    shard: Shard
+    graph: Optional[Dict[str, Any]] = None
+    path: Optional[str] = None
+    nodes: int = 0
+    edges: int = 0
+    error: Optional[str] = None
+    # METRICS of a worker process, merged into the parent's registry
+    metrics: Optional[Dict[str, Any]] = None
+
+def list_project_ids(cloud: str, config_file: Optional[str] = None) -> List[str]:
+    """IDs of all enabled projects; falls back to the user's own projects without admin rights."""
+    conn = load_config(cloud, None, config_file).connection
+    try:
+        projects = list(conn.identity.projects())
+    except Exception as e:
+        logger.warning(f"Listing all projects failed ({e}); using the projects of the current user")
+        projects = list(conn.identity.user_projects(conn.current_user_id))
+    return sorted(p.id for p in projects if getattr(p, "is_enabled", True))
+
+def plan_shards(regions: Sequence[Optional[str]], project_ids: Sequence[Optional[str]]) -> List[Shard]:
+    return [Shard(region, project_id) for region in regions for project_id in project_ids]
+
+def shard_path(out: Path, shard: Shard) -> Path:
+    """``graph.json.gz`` -> ``graph.<region>.<project>.json.gz``."""
+    name = out.name
+    stem, dot, suffixes = name.partition(".")
+    parts = [stem] + [part.replace("/", "_") for part in (shard.region or "default", shard.project_id or "default")]
+    return out.with_name(".".join(parts) + dot + suffixes)
+
+def discover_shard(discover: Callable[..., Graph], cloud: str, config_file: Optional[str], shard: Shard,
+                   options: Dict[str, Any], out: Optional[Path] = None, format: Optional[str] = None,
+                   compression: Optional[str] = None) -> ShardResult:
+    """
+    Run ``discover`` for one shard (in a worker process).
+
+    With ``out`` the graph is written there and only counts are returned;
+    otherwise the graph comes back as a plain dict for merging.
+    """
+    in_worker = multiprocessing.parent_process() is not None
+    if in_worker:
+        # Workers run shards one after another; report each shard's calls once
+        METRICS.reset()
+    try:
+        graph = discover(cloud, shard.region, config_file, shard.project_id, **options)
+    except Exception as e:
+        return ShardResult(shard, error=str(e), metrics=METRICS.export() if in_worker else None)
+    result = ShardResult(shard, nodes=len(graph.nodes), edges=len(graph.edges))
+    if out is not None:
+        write_graph(graph, out, format=format, compression=compression)
+        result.path = str(out)
+    else:
+        result.graph = {
+            "project_id": graph.project_id,
+            "project_name": graph.project_name,
+            "generated_at": graph.generated_at,
+            "nodes": [node_record(n) for n in graph.nodes.values()],
+            "edges": [edge_record(e) for e in graph.edges],
+        }
+    if in_worker:
+        result.metrics = METRICS.export()
+    return result
+
+def _executor(processes: Optional[int], shard_count: int) -> Optional[Executor]:
+    processes = min(processes or os.cpu_count() or 1, shard_count)
+    if processes <= 1:
+        return None
+    # spawn: workers must not inherit the parent's pooled connections and sockets
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+
+def run_shards(discover: Callable[..., Graph], cloud: str, config_file: Optional[str], shards: Sequence[Shard],
+               options: Dict[str, Any], processes: Optional[int] = None, out: Optional[Path] = None,
+               format: Optional[str] = None, compression: Optional[str] = None) -> Iterator[ShardResult]:
+    """
+    Discover ``shards`` on up to ``processes`` processes (default: CPU count),
+    yielding results as shards finish. ``discover`` must be a module-level
+    function (it is pickled by reference). With ``out``, each shard is written
+    to ``shard_path(out, shard)``.
+    """
+    def target(shard: Shard) -> Optional[Path]:
+        return shard_path(out, shard) if out is not None else None
+
+    executor = _executor(processes, len(shards))
+    if executor is None:
+        for shard in shards:
+            yield _logged(discover_shard(discover, cloud, config_file, shard, options, target(shard), format, compression))
+        return
+    with executor:
+        futures = [executor.submit(discover_shard, discover, cloud, config_file, shard, options, target(shard), format, compression)
+                   for shard in shards]
+        for future in as_completed(futures):
+            yield _logged(future.result())
+
+def _logged(result: ShardResult) -> ShardResult:
+    if result.metrics is not None:
+        METRICS.merge(result.metrics)
+        result.metrics = None
+    if result.error:
+        logger.error(f"Discovery of {result.shard.label} failed: {result.error}")
+    else:
+        logger.info(f"Discovered {result.shard.label}: {result.nodes} nodes, {result.edges} edges")
+    return result
+
+def merge_graphs(results: Iterable[Tuple[Shard, Dict[str, Any]]], project_name: Optional[str] = None) -> Graph:
+    """
+    Combine per-shard graph dicts into one ``Graph``.
+
+    Nodes get the shard's region and project. A node ID already seen in the
+    same region is a resource shared between projects and kept once (as are
+    edges between shared resources); the same ID in another region is a
+    different resource and is renamed to ``<region>/<id>``, with the shard's
+    edges following it.
+    """
+    merged = Graph(project_id=None, project_name=project_name)
+    region_of: Dict[str, Optional[str]] = {}
+    merged_edges = set()
+    generated = []
+    for shard, graph in results:
+        if graph.get("generated_at"):
+            generated.append(graph["generated_at"])
+        project_id = graph.get("project_id") or shard.project_id
+        renamed: Dict[str, str] = {}
+        for record in graph.get("nodes", []):
+            node_id = record["id"]
+            if node_id in region_of and region_of[node_id] != shard.region:
+                renamed[node_id] = f"{shard.region}/{node_id}"
+                node_id = renamed[node_id]
+            if node_id in merged.nodes:
+                continue
+            node = Node.from_dict({**record, "id": node_id})
+            node.region = shard.region
+            node.project_id = project_id
+            region_of[node_id] = shard.region
+            merged.add_node(node)
+        shard_edges = set()
+        for record in graph.get("edges", []):
+            edge = Edge.from_dict(record)
+            edge.from_node = renamed.get(edge.from_node, edge.from_node)
+            edge.to_node = renamed.get(edge.to_node, edge.to_node)
+            key = (edge.from_node, edge.to_node, edge.type)
+            if key in merged_edges:
+                continue
+            shard_edges.add(key)
+            merged.add_edge(edge)
+        merged_edges |= shard_edges
+    if generated:
+        # The merged graph is only as fresh as its oldest shard
+        merged.generated_at = min(generated)
+    return merged
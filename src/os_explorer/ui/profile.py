@@ -0,0 +1,37 @@
+from rich.console import Console
+from rich.table import Table
+
+from ..metrics import Metrics
+
+def _size(count: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+def render_profile(metrics: Metrics) -> None:
+    """Per-call and per-stage timings, slowest first."""
+    console = Console(stderr=True)
+    exported = metrics.export()
+
+    table = Table(title="Discovery calls")
+    table.add_column("Service", style="cyan")
+    table.add_column("Call", style="green")
+    for column in ("Calls", "Items", "Pages", "Received", "Retries", "Total (s)", "Max (s)"):
+        table.add_column(column, justify="right")
+    table.add_column("Errors", style="red")
+    calls = sorted(exported["calls"].items(), key=lambda entry: entry[1].seconds, reverse=True)
+    for (service, name), stats in calls:
+        errors = ", ".join(f"{error} x{count}" for error, count in sorted(stats.errors.items()))
+        table.add_row(service, name, str(stats.calls), str(stats.items), str(stats.pages), _size(stats.bytes), str(stats.retries),
+                      f"{stats.seconds:.2f}", f"{stats.max_seconds:.2f}", errors)
+    console.print(table)
+
+    stages = Table(title="Stages")
+    stages.add_column("Stage", style="cyan")
+    stages.add_column("Runs", justify="right")
+    stages.add_column("Total (s)", justify="right")
+    for name, stats in sorted(exported["stages"].items(), key=lambda entry: entry[1].seconds, reverse=True):
+        stages.add_row(name, str(stats.count), f"{stats.seconds:.2f}")
+    console.print(stages)
@@ -1,21 +1,24 @@
 from rich.tree import Tree
 from rich.console import Console
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
+from ..graph.index import GraphIndex, GraphQueries
 
 def find_node(graph_json: Dict[str, Any], node_id: str) -> Optional[Dict[str, Any]]:
+    """Linear lookup; build a ``GraphIndex`` once when looking up many nodes."""
     for node in graph_json.get('nodes', []):
         if node['id'] == node_id:
             return node
     return None
 
-def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optional[str] = None, filter_types: Optional[List[str]] = None) -> None:
-    """Render tree to terminal using rich"""
+def render_tree(graph_json: Union[Dict[str, Any], GraphQueries], max_depth: int = 3, highlight: Optional[str] = None, filter_types: Optional[List[str]] = None) -> None:
+    """Render tree to terminal using rich.
+
+    Accepts a graph dict or any indexed view with node dicts (``GraphIndex``, ``Snapshot``).
+    """
     console = Console()
-    project_name = graph_json.get('project_name', 'Unknown Project')
+    graph = graph_json if isinstance(graph_json, GraphQueries) else GraphIndex.from_dict(graph_json)
+    project_name = graph.project_name or 'Unknown Project'
     root = Tree(f"[bold cyan]Project: {project_name}[/]")
-
-    nodes = graph_json.get('nodes', [])
-    edges = graph_json.get('edges', [])
     
     # Normalize filter_types
     if filter_types:
@@ -28,7 +31,7 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
 
     # Servers
     if should_show('server'):
-        servers = [n for n in nodes if n['type'] == 'server']
+        servers = graph.nodes_of_type('server')
         if servers:
             serv_branch = root.add(f"Servers ({len(servers)})")
             for s in servers:
@@ -53,11 +56,11 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
                     s_node.add(f"[dim]{', '.join(details)}[/]")
                 
                 # Volumes
-                vols = [e['to'] for e in edges if e['from'] == s['id'] and e['type'] == 'attached']
+                vols = graph.neighbor_ids(s['id'], 'attached')
                 if vols:
                     vbranch = s_node.add("Volumes:")
                     for vid in vols:
-                        v = find_node(graph_json, vid)
+                        v = graph.get_node(vid)
                         if v:
                             size = v['meta'].get('size', '?') # OpenStack SDK uses 'size' usually, check discovery
                             v_type = v['meta'].get('volume_type', 'unknown-type')
@@ -65,32 +68,32 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
                             v_node = vbranch.add(f"{name} ({v['id']}) ({size}GB, {v_type})")
                             
                             # Snapshots
-                            snaps = [e['to'] for e in edges if e['from'] == vid and e['type'] == 'has_snapshot']
+                            snaps = graph.neighbor_ids(vid, 'has_snapshot')
                             if snaps:
                                 snap_branch = v_node.add("Snapshots:")
                                 for snap_id in snaps:
-                                    snap = find_node(graph_json, snap_id)
+                                    snap = graph.get_node(snap_id)
                                     if snap:
                                         snap_size = snap['meta'].get('size', '?')
                                         snap_branch.add(f"{snap['name']} ({snap['id']}) ({snap_size}GB)")
 
                 # Ports
-                ports = [e['to'] for e in edges if e['from'] == s['id'] and e['type'] == 'has_port']
+                ports = graph.neighbor_ids(s['id'], 'has_port')
                 if ports:
                     pbranch = s_node.add("Ports:")
                     for pid in ports:
-                        p = find_node(graph_json, pid)
+                        p = graph.get_node(pid)
                         if p:
                             fixed_ips = p['meta'].get('fixed_ips', [])
                             ip_str = ", ".join([ip['ip_address'] for ip in fixed_ips]) if fixed_ips else "-"
                             pnode = pbranch.add(f"{p['name']} ({p['id']}) ({ip_str})")
                             
                             # Security Groups
-                            sgs = [e['to'] for e in edges if e['from'] == pid and e['type'] == 'has_sg']
+                            sgs = graph.neighbor_ids(pid, 'has_sg')
                             if sgs:
                                 sg_branch = pnode.add("Security Groups:")
                                 for sgid in sgs:
-                                    sg = find_node(graph_json, sgid)
+                                    sg = graph.get_node(sgid)
                                     if sg:
                                         sg_node = sg_branch.add(f"{sg['name']} ({sg['id']})")
                                         
@@ -121,18 +124,18 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
 
     # Networks
     if should_show('network'):
-        networks = [n for n in nodes if n['type'] == 'network']
+        networks = graph.nodes_of_type('network')
         if networks:
             net_branch = root.add(f"Networks ({len(networks)})")
             for n in networks:
                 n_node = net_branch.add(f"{n['name']} ({n['id']})")
                 
                 # Subnets
-                subnets = [e['to'] for e in edges if e['from'] == n['id'] and e['type'] == 'has_subnet']
+                subnets = graph.neighbor_ids(n['id'], 'has_subnet')
                 if subnets:
                     sub_branch = n_node.add("Subnets:")
                     for sub_id in subnets:
-                        sub = find_node(graph_json, sub_id)
+                        sub = graph.get_node(sub_id)
                         if sub:
                             cidr = sub['meta'].get('cidr', '?')
                             gateway = sub['meta'].get('gateway_ip', '?')
@@ -140,35 +143,35 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
 
     # Load Balancers
     if should_show('load_balancer'):
-        lbs = [n for n in nodes if n['type'] == 'load_balancer']
+        lbs = graph.nodes_of_type('load_balancer')
         if lbs:
             lb_branch = root.add(f"Load Balancers ({len(lbs)})")
             for lb in lbs:
                 l_node = lb_branch.add(f"{lb['name']} ({lb['id']})")
                 # Listeners
-                listeners = [e['to'] for e in edges if e['from'] == lb['id'] and e['type'] == 'has_listener']
+                listeners = graph.neighbor_ids(lb['id'], 'has_listener')
                 if listeners:
                     lis_branch = l_node.add("Listeners:")
                     for lis_id in listeners:
-                        lis = find_node(graph_json, lis_id)
+                        lis = graph.get_node(lis_id)
                         if lis:
                             lis_node = lis_branch.add(f"{lis['name']} ({lis['id']}) ({lis['meta'].get('protocol', '?')}:{lis['meta'].get('protocol_port', '?')})")
                             
                             # L7 Policies
-                            policies = [e['to'] for e in edges if e['from'] == lis_id and e['type'] == 'has_policy']
+                            policies = graph.neighbor_ids(lis_id, 'has_policy')
                             if policies:
                                 pol_branch = lis_node.add("L7 Policies:")
                                 for pol_id in policies:
-                                    pol = find_node(graph_json, pol_id)
+                                    pol = graph.get_node(pol_id)
                                     if pol:
                                         pol_node = pol_branch.add(f"{pol['name']} ({pol['id']}) (Action: {pol['meta'].get('action', '?')})")
                                         
                                         # L7 Rules
-                                        rules = [e['to'] for e in edges if e['from'] == pol_id and e['type'] == 'has_rule']
+                                        rules = graph.neighbor_ids(pol_id, 'has_rule')
                                         if rules:
                                             rule_branch = pol_node.add("Rules:")
                                             for rule_id in rules:
-                                                rule = find_node(graph_json, rule_id)
+                                                rule = graph.get_node(rule_id)
                                                 if rule:
                                                     rule_type = rule['meta'].get('type', '?')
                                                     compare_type = rule['meta'].get('compare_type', '?')
@@ -177,20 +180,20 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
                                                     rule_branch.add(f"{rule_type} {compare_type} {key} {value} ({rule['id']})")
 
                             # Default Pool
-                            pools = [e['to'] for e in edges if e['from'] == lis_id and e['type'] == 'has_pool']
+                            pools = graph.neighbor_ids(lis_id, 'has_pool')
                             if pools:
                                 pool_branch = lis_node.add("Default Pool:")
                                 for pool_id in pools:
-                                    pool = find_node(graph_json, pool_id)
+                                    pool = graph.get_node(pool_id)
                                     if pool:
                                         p_node = pool_branch.add(f"{pool['name']} ({pool['id']}) ({pool['meta'].get('protocol', '?')})")
                                         
                                         # Health Monitor
-                                        monitors = [e['to'] for e in edges if e['from'] == pool_id and e['type'] == 'has_monitor']
+                                        monitors = graph.neighbor_ids(pool_id, 'has_monitor')
                                         if monitors:
                                             hm_branch = p_node.add("Health Monitor:")
                                             for hm_id in monitors:
-                                                hm = find_node(graph_json, hm_id)
+                                                hm = graph.get_node(hm_id)
                                                 if hm:
                                                     hm_type = hm['meta'].get('type', '?')
                                                     delay = hm['meta'].get('delay', '?')
@@ -198,17 +201,17 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
                                                     hm_branch.add(f"{hm['name']} ({hm['id']}) (Type: {hm_type}, Delay: {delay}s, Retries: {max_retries})")
 
                                         # Members
-                                        members = [e['to'] for e in edges if e['from'] == pool_id and e['type'] == 'has_member']
+                                        members = graph.neighbor_ids(pool_id, 'has_member')
                                         if members:
                                             m_branch = p_node.add("Members:")
                                             for mid in members:
-                                                m = find_node(graph_json, mid)
+                                                m = graph.get_node(mid)
                                                 if m:
                                                     m_branch.add(f"{m['name']} ({m['id']}) ({m['meta'].get('address', '-')})")
 
     # Routers
     if should_show('router'):
-        routers = [n for n in nodes if n['type'] == 'router']
+        routers = graph.nodes_of_type('router')
         if routers:
             r_branch = root.add(f"Routers ({len(routers)})")
             for r in routers:
@@ -218,7 +221,7 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
 
     # Floating IPs
     if should_show('floating_ip'):
-        fips = [n for n in nodes if n['type'] == 'floating_ip']
+        fips = graph.nodes_of_type('floating_ip')
         if fips:
             fip_branch = root.add(f"Floating IPs ({len(fips)})")
             for fip in fips:
@@ -229,14 +232,9 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
 
     # Volumes (Top Level - Unattached Only)
     if should_show('volume'):
-        # Find all volume IDs that are attached (target of 'attached' edge)
-        attached_vol_ids = set()
-        for e in edges:
-            if e['type'] == 'attached':
-                attached_vol_ids.add(e['to'])
-
-        all_volumes = [n for n in nodes if n['type'] == 'volume']
-        unattached_volumes = [v for v in all_volumes if v['id'] not in attached_vol_ids]
+        # Volumes without an incoming 'attached' edge
+        all_volumes = graph.nodes_of_type('volume')
+        unattached_volumes = [v for v in all_volumes if not graph.neighbor_ids(v['id'], 'attached', direction='in')]
                 
         if unattached_volumes:
             vol_branch = root.add(f"Volumes (Unattached) ({len(unattached_volumes)})")
@@ -250,18 +248,18 @@ def render_tree(graph_json: Dict[str, Any], max_depth: int = 3, highlight: Optio
                 v_node = vol_branch.add(f"{name} ({v['id']}) ({size}GB, {v_type}) [{status_color}]{status}[/]")
                 
                 # Snapshots
-                snaps = [e['to'] for e in edges if e['from'] == v['id'] and e['type'] == 'has_snapshot']
+                snaps = graph.neighbor_ids(v['id'], 'has_snapshot')
                 if snaps:
                     snap_branch = v_node.add("Snapshots:")
                     for snap_id in snaps:
-                        snap = find_node(graph_json, snap_id)
+                        snap = graph.get_node(snap_id)
                         if snap:
                             snap_size = snap['meta'].get('size', '?')
                             snap_branch.add(f"{snap['name']} ({snap['id']}) ({snap_size}GB)")
 
     # Security Groups (Top Level)
     if should_show('security_group'):
-        sgs = [n for n in nodes if n['type'] == 'security_group']
+        sgs = graph.nodes_of_type('security_group')
         if sgs:
             sg_branch = root.add(f"Security Groups ({len(sgs)})")
             for sg in sgs:
@@ -0,0 +1,45 @@
+from typing import Any, Dict
+
+def get_field(obj: Any, name: str, default: Any = None) -> Any:
+    """Read a field from an SDK resource, a plain dict or any attribute holder."""
+    if obj is None:
+        return default
+    if type(obj) is dict:
+        value = obj.get(name)
+    elif isinstance(obj, dict):
+        # SDK resources are dict subclasses but raise KeyError for unknown keys
+        # and keep annotations added by discovery as plain attributes.
+        try:
+            value = obj[name]
+        except (KeyError, TypeError):
+            value = getattr(obj, name, None)
+    else:
+        value = getattr(obj, name, None)
+    return default if value is None else value
+
+# Fields set through set_field on non-dict objects, so to_plain can keep them
+_ANNOTATIONS = "_os_explorer_annotations"
+
+def set_field(obj: Any, name: str, value: Any) -> None:
+    """Set a field on an SDK resource or dict, falling back to a plain attribute."""
+    if type(obj) is dict:
+        obj[name] = value
+        return
+    try:
+        obj[name] = value
+    except (KeyError, TypeError):
+        # SDK resources refuse keys that are not part of their schema
+        setattr(obj, name, value)
+    # SDK to_dict() drops URI parameters (e.g. a member's pool_id) and plain
+    # attributes, so remember what was set.
+    if hasattr(obj, '__dict__'):
+        vars(obj).setdefault(_ANNOTATIONS, {})[name] = value
+
+def to_plain(obj: Any) -> Dict[str, Any]:
+    """Convert an SDK resource (or mapping) into a plain dict."""
+    if type(obj) is dict:
+        return obj
+    plain = obj.to_dict() if hasattr(obj, 'to_dict') else dict(obj)
+    if hasattr(obj, '__dict__'):
+        plain.update(vars(obj).get(_ANNOTATIONS, {}))
+    return plain
@@ -1,15 +1,69 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional, Dict, Any
-import openstack.config
-from ..cli import run_discovery
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from functools import partial
+from typing import AsyncIterator, List, Optional, Dict, Any
+import asyncio
+import os
+import threading
+from ..graph.projection import DEFAULT_PROFILE, PROFILES
+from ..graph.query import QUERIES, run_query
+from ..graph.serialize import dumps, read_graph
+from ..graph.snapshot import Snapshot, is_snapshot
+from ..metrics import METRICS
+from .store import DIRECTIONS, BOTH, GraphKey, GraphSource, GraphStore, GraphView, InvalidCursor, decode_cursor, encode_cursor, select_fields
+from .stream import batch_events, replay_events, sse
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+MOCK_CLOUD = "Mock Cloud"
+MAX_PAGE_SIZE = 1000
+MAX_DEPTH = 5
+
+# Files served for "Mock Cloud", looked up in the working directory
+MOCK_GRAPH_FILES = ("graph.snap", "graph.json")
+_mock_graph: Dict[str, Any] = {}
+_mock_graph_lock = threading.Lock()
+# Replaced Mock Cloud snapshots, closed once no stored graph is served from them
+_retired_snapshots: List[Snapshot] = []
+
+def load_mock_graph() -> Optional[GraphSource]:
+    """
+    The Mock Cloud graph, loaded once and reloaded only when the file changes.
+
+    Snapshots stay memory-mapped and are served through their own index;
+    JSON files are decoded into a graph dict.
+    """
+    for name in MOCK_GRAPH_FILES:
+        try:
+            stat = os.stat(name)
+        except OSError:
+            continue
+        key = (os.path.abspath(name), stat.st_mtime_ns, stat.st_size)
+        with _mock_graph_lock:
+            if _mock_graph.get("key") != key:
+                if isinstance(_mock_graph.get("graph"), Snapshot):
+                    _retired_snapshots.append(_mock_graph["graph"])
+                _mock_graph["graph"] = Snapshot(name) if is_snapshot(name) else read_graph(name)
+                _mock_graph["key"] = key
+            return _mock_graph["graph"]
+    return None
+
+def close_retired_snapshots() -> None:
+    """Release the mappings of replaced Mock Cloud snapshots the store no longer serves."""
+    served = {id(view.source) for view in map(store.get, store.keys()) if view is not None}
+    with _mock_graph_lock:
+        for snapshot in [s for s in _retired_snapshots if id(s) not in served]:
+            _retired_snapshots.remove(snapshot)
+            snapshot.close()
+
 @router.get("/clouds", response_model=List[str])
 def list_clouds():
     """List available clouds from clouds.yaml."""
+    import openstack.config
+
     try:
         config = openstack.config.loader.OpenStackConfig()
         clouds = [cloud.name for cloud in config.get_all_clouds()]
@@ -19,28 +73,226 @@ def list_clouds():
         logger.error(f"Error listing clouds: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/graph")
-def get_graph(
+def graph_scope(
     cloud: str = Query(..., description="Cloud name in clouds.yaml"),
     region: Optional[str] = Query(None, description="Region name"),
-    project_id: Optional[str] = Query(None, description="Project ID to scope discovery to")
-) -> Dict[str, Any]:
-    """Run discovery and return the resource graph."""
-    try:
-        if cloud == "Mock Cloud":
-            # Try to load graph.json from current directory
-            import json
-            import os
-            if os.path.exists("graph.json"):
-                with open("graph.json", "r") as f:
-                    return json.load(f)
-            else:
-                raise HTTPException(status_code=404, detail="graph.json not found for Mock Cloud")
+    project_id: Optional[str] = Query(None, description="Project ID to scope discovery to"),
+    meta_profile: str = Query(DEFAULT_PROFILE, description=f"Node meta fields to keep: {', '.join(PROFILES)}")
+) -> GraphKey:
+    if meta_profile not in PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown meta profile: {meta_profile}")
+    return (cloud, region, project_id, meta_profile)
 
+async def discover(key: GraphKey, max_age: Optional[float] = None, no_cache: bool = False) -> GraphSource:
+    """Run discovery (or load the Mock Cloud file) for ``key``."""
+    cloud, region, project_id, meta_profile = key
+    try:
+        if cloud == MOCK_CLOUD:
+            graph = await run_in_threadpool(load_mock_graph)
+            if graph is None:
+                raise HTTPException(status_code=404, detail="graph.snap or graph.json not found for Mock Cloud")
+            return graph
+        # Discovery (httpx, openstacksdk) is only loaded once a real cloud is asked for
+        from ..discovery import aio
+        from ..runner import run_discovery, run_discovery_async
         # We don't pass config_file here, assuming standard locations or env vars
         # If needed we can add a setting for it.
-        graph = run_discovery(cloud, region=region, project_id=project_id)
-        return graph
+        if aio.is_available():
+            return await run_discovery_async(cloud, region=region, project_id=project_id, use_cache=not no_cache, max_age=max_age, meta_profile=meta_profile)
+        # Without httpx fall back to the SDK backend off the event loop
+        return await run_in_threadpool(run_discovery, cloud, region=region, project_id=project_id, use_cache=not no_cache, max_age=max_age, meta_profile=meta_profile)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating graph: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+# Shared graphs: one discovery per scope at a time, served stale-while-revalidate
+store = GraphStore(discover=discover)
+
+async def get_view(key: GraphKey = Depends(graph_scope)) -> GraphView:
+    """The stored graph for ``key``, discovering it first if needed."""
+    if key[0] == MOCK_CLOUD:
+        # The Mock Cloud file is re-validated on every call (cheap mtime check)
+        view = store.put(key, await discover(key))
+        close_retired_snapshots()
+        return view
+    return await store.fetch(key)
+
+def _fields(fields: Optional[str]) -> Optional[List[str]]:
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+@router.get("/graph")
+async def get_graph(
+    key: GraphKey = Depends(graph_scope),
+    max_age: Optional[float] = Query(None, description="Ignore cached discovery results older than this many seconds"),
+    no_cache: bool = Query(False, description="Bypass the discovery cache")
+) -> Response:
+    """Return the resource graph, discovering it when the shared copy is missing or too old."""
+    if key[0] == MOCK_CLOUD:
+        view = await get_view(key)
+    else:
+        view = await store.fetch(key, max_age=max_age, force=no_cache, discover=partial(discover, max_age=max_age, no_cache=no_cache))
+    with METRICS.stage("serialize"):
+        body = dumps(view.graph_json)
+    return Response(body, media_type="application/json")
+
+async def _stream_discovery(key: GraphKey, max_age: Optional[float], no_cache: bool) -> AsyncIterator[bytes]:
+    """SSE events of a discovery of ``key``; see ``web.stream``."""
+    cloud, region, project_id, meta_profile = key
+    yield sse("start", {"cloud": cloud, "region": region, "project_id": project_id, "meta_profile": meta_profile})
+    view = store.get(key)
+    fresh = view is not None and not no_cache and store.age(key) <= (store.ttl if max_age is None else min(store.ttl, max_age))
+    if cloud == MOCK_CLOUD or fresh:
+        try:
+            view = await get_view(key) if cloud == MOCK_CLOUD else view
+        except HTTPException as e:
+            yield sse("error", {"detail": e.detail})
+            return
+        for event, data in replay_events(view.graph_json):
+            yield sse(event, data)
+        return
+
+    future = store.running(key, force=no_cache)
+    events: Optional[asyncio.Queue] = None
+    if future is None:
+        from ..discovery import aio
+        from ..runner import discover_graph, discover_graph_async
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        # Called from a worker thread with either backend
+        on_batch = lambda batch: loop.call_soon_threadsafe(events.put_nowait, batch)
+        options = dict(region=region, project_id=project_id, use_cache=not no_cache, max_age=max_age, meta_profile=meta_profile, on_batch=on_batch)
+
+        async def discover_streamed(_key: GraphKey) -> Dict[str, Any]:
+            if aio.is_available():
+                graph = await discover_graph_async(cloud, **options)
+            else:
+                graph = await run_in_threadpool(discover_graph, cloud, **options)
+            return await run_in_threadpool(graph.to_dict)
+
+        # Registered as the shared discovery: concurrent requests for the scope
+        # join it, and the graph is stored even if the client went away
+        future = store.start(key, discover_streamed, force=no_cache)
+
+        def finished(f: asyncio.Future):
+            # Failures are logged by the store and sent below, if still connected
+            f.cancelled() or f.exception()
+            events.put_nowait(None)
+        future.add_done_callback(finished)
+
+        while True:
+            batch = await events.get()
+            if batch is None:
+                break
+            for event, data in batch_events(batch):
+                yield sse(event, data)
+
+    try:
+        view = await asyncio.shield(future)
+    except Exception as e:
+        yield sse("error", {"detail": str(e)})
+        return
+    if events is None:
+        # Joined a discovery started elsewhere: its batches went to that request
+        for event, data in replay_events(view.graph_json):
+            yield sse(event, data)
+        return
+    graph_json = view.graph_json
+    yield sse("done", {"generated_at": graph_json.get("generated_at"), "nodes": len(graph_json.get("nodes", [])), "edges": len(graph_json.get("edges", []))})
+
+@router.get("/graph/stream")
+async def stream_graph(
+    key: GraphKey = Depends(graph_scope),
+    max_age: Optional[float] = Query(None, description="Ignore cached discovery results older than this many seconds"),
+    no_cache: bool = Query(False, description="Bypass the discovery cache")
+) -> StreamingResponse:
+    """
+    Server-Sent Events with the graph's nodes and edges as each discovery
+    call finishes, plus progress events. A fresh shared graph is replayed
+    instead of discovered again.
+    """
+    return StreamingResponse(
+        _stream_discovery(key, max_age, no_cache), media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/nodes")
+async def list_nodes(
+    view: GraphView = Depends(get_view),
+    type: Optional[str] = Query(None, description="Only nodes of this type"),
+    q: Optional[str] = Query(None, description="Case-insensitive substring of the node ID, name or label"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to return, e.g. id,name,meta.status")
+) -> Dict[str, Any]:
+    """One page of nodes from the stored graph."""
+    try:
+        position = decode_cursor(cursor, view.version) if cursor else 0
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    nodes, next_position = view.page(type, q, limit, position)
+    selected = _fields(fields)
+    return {
+        "items": [select_fields(n, selected) for n in nodes],
+        "next_cursor": encode_cursor(view.version, next_position) if next_position is not None else None,
+        "generated_at": view.version,
+    }
+
+@router.get("/nodes/{node_id}")
+async def get_node(
+    node_id: str,
+    view: GraphView = Depends(get_view),
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to return")
+) -> Dict[str, Any]:
+    node = view.index.get_node(node_id)
+    if node is None:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} not found")
+    return select_fields(node, _fields(fields))
+
+@router.get("/nodes/{node_id}/neighbors")
+async def get_neighbors(
+    node_id: str,
+    view: GraphView = Depends(get_view),
+    depth: int = Query(1, ge=1, le=MAX_DEPTH),
+    edge_type: Optional[str] = Query(None, description="Only follow edges of this type"),
+    direction: str = Query(BOTH, description=f"Edge direction to follow: {', '.join(DIRECTIONS)}"),
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to return")
+) -> Dict[str, Any]:
+    """Nodes within ``depth`` hops of a node, with the edges connecting them."""
+    if direction not in DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown direction: {direction}")
+    if view.index.get_node(node_id) is None:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} not found")
+    nodes, edges = view.neighborhood(node_id, depth, edge_type, direction)
+    selected = _fields(fields)
+    return {"nodes": [select_fields(n, selected) for n in nodes], "edges": edges}
+
+@router.get("/query")
+async def query_graph(
+    kind: str = Query(..., description=f"Query to run: {', '.join(QUERIES)}"),
+    start: str = Query(..., alias="from", description="ID of the node to start from"),
+    target: Optional[str] = Query(None, alias="to", description="ID of the node to find a path to (path only)"),
+    view: GraphView = Depends(get_view),
+    depth: Optional[int] = Query(None, ge=1, description="Maximum number of hops (default: unlimited)"),
+    direction: Optional[str] = Query(None, description=f"Edge direction to follow: {', '.join(DIRECTIONS)}"),
+    edge_types: Optional[str] = Query(None, description="Comma-separated edge types to follow"),
+    types: Optional[str] = Query(None, description="Comma-separated node types to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to return")
+) -> Dict[str, Any]:
+    """
+    Reachability (``reachable``), blast radius (``impact``) or shortest path
+    (``path``) over the stored graph; see ``graph.query``. Nodes carry their
+    ``depth``, the number of hops from ``from``.
+    """
+    try:
+        result = run_query(view.index, kind, start, target, depth, direction, _fields(edge_types), _fields(types))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Node {e.args[0]} not found")
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No path from {start} to {target}")
+    found = result.to_dict(view.index)
+    selected = _fields(fields)
+    return {"nodes": [dict(select_fields(n, selected), depth=n["depth"]) for n in found["nodes"]], "edges": found["edges"]}
@@ -1,8 +1,24 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from . import api
+from ..config import CONNECTIONS
+from ..metrics import render_prometheus
 from .api import router as api_router
 
-app = FastAPI(title="OpenStack Resource Explorer")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Re-discover graphs that are in use before they go stale
+    refresher = asyncio.create_task(api.store.run_refresher())
+    try:
+        yield
+    finally:
+        refresher.cancel()
+
+app = FastAPI(title="OpenStack Resource Explorer", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -18,3 +34,19 @@ app.include_router(api_router, prefix="/api")
 @app.get("/")
 def read_root():
     return {"message": "Welcome to OpenStack Resource Explorer API"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: discovery calls and stages, shared graphs and pooled connections."""
+    pool = CONNECTIONS.stats()
+    extra = [
+        ("os_explorer_graph_store_events_total", "counter", "Shared graph store lookups and discoveries by outcome",
+         [({"event": event}, count) for event, count in api.store.stats.items()]),
+        ("os_explorer_graph_store_graphs", "gauge", "Graphs held by the shared store",
+         [({}, len(api.store.keys()))]),
+        ("os_explorer_connection_pool_requests_total", "counter", "Connection pool lookups by result",
+         [({"result": "hit"}, pool["hits"]), ({"result": "miss"}, pool["misses"])]),
+        ("os_explorer_connection_pool_connections", "gauge", "Pooled OpenStack connections",
+         [({}, pool["connections"])]),
+    ]
+    return PlainTextResponse(render_prometheus(extra=extra), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,306 @@
+"""
+In-memory graphs served by the web API.
+
+Every discovered graph is kept as a ``GraphView`` per (cloud, region,
+project, meta profile) so the node endpoints can page, filter and walk it
+without sending the whole document to the browser. Snapshot files are
+served from their memory-mapped index, decoding only the nodes visited.
+
+``GraphStore.fetch`` makes discovery shared: concurrent requests for the
+same scope join one in-flight discovery, graphs older than ``ttl`` are still
+served (for up to ``stale_ttl``) while a background discovery replaces them,
+and ``run_refresher`` re-discovers recently used scopes shortly before they
+go stale.
+"""
+import asyncio
+import base64
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from ..graph.index import BOTH, GraphIndex, IN, OUT
+from ..graph.snapshot import Snapshot
+
+GraphKey = Tuple[str, Optional[str], Optional[str], str]
+# A graph dict, or a snapshot served without decoding it up front
+GraphSource = Union[Dict[str, Any], Snapshot]
+Discover = Callable[[GraphKey], Awaitable[GraphSource]]
+
+# Seconds a graph is served as-is, and served stale while being refreshed
+DEFAULT_TTL = 60.0
+DEFAULT_STALE_TTL = 900.0
+# Scopes requested within this many seconds are refreshed ahead of time
+DEFAULT_HOT_FOR = 600.0
+# Fraction of the TTL after which hot scopes are refreshed
+REFRESH_AHEAD = 0.8
+DEFAULT_REFRESH_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = (OUT, IN, BOTH)
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(version: Optional[str], position: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([version, position]).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, version: Optional[str]) -> int:
+    try:
+        cursor_version, position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_version != version:
+        # The graph was rediscovered; positions no longer line up
+        raise InvalidCursor("Cursor refers to an older version of the graph")
+    return int(position)
+
+def select_fields(node: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Keep only ``fields`` of a node; ``meta.<key>`` picks single meta entries."""
+    if not fields:
+        return node
+    selected: Dict[str, Any] = {}
+    for field in fields:
+        if field.startswith("meta."):
+            key = field[len("meta."):]
+            meta = node.get("meta") or {}
+            if key in meta:
+                selected.setdefault("meta", {})[key] = meta[key]
+        elif field in node:
+            selected[field] = node[field]
+    return selected
+
+class _SnapshotNodes(Sequence):
+    """A snapshot's nodes in file order, decoded on access."""
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def __getitem__(self, position: Union[int, slice]) -> Any:
+        if isinstance(position, slice):
+            return [self.snapshot.node(n) for n in range(len(self))[position]]
+        return self.snapshot.node(range(len(self))[position])
+
+class GraphView:
+    """A graph dict with its ``GraphIndex`` (or a ``Snapshot``) and lazily built search keys."""
+
+    def __init__(self, source: GraphSource):
+        self.source = source
+        if isinstance(source, Snapshot):
+            self.index = source
+            self.version = source.generated_at
+            self._nodes: Sequence[Dict[str, Any]] = _SnapshotNodes(source)
+            self._graph_json: Optional[Dict[str, Any]] = None
+        else:
+            self.index = GraphIndex.from_dict(source)
+            self.version = source.get("generated_at")
+            self._nodes = source.get("nodes", [])
+            self._graph_json = source
+        self._search_keys: Dict[str, str] = {}
+
+    @property
+    def graph_json(self) -> Dict[str, Any]:
+        """The whole graph document; a snapshot is decoded on first use."""
+        if self._graph_json is None:
+            self._graph_json = self.source.to_dict()
+        return self._graph_json
+
+    def _matches(self, node: Dict[str, Any], q: str) -> bool:
+        key = self._search_keys.get(node["id"])
+        if key is None:
+            key = self._search_keys[node["id"]] = "\0".join(
+                str(node.get(f) or "") for f in ("id", "name", "label")).lower()
+        return q in key
+
+    def page(self, node_type: Optional[str] = None, q: Optional[str] = None, limit: int = 100,
+             position: int = 0) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Up to ``limit`` matching nodes, scanning from ``position``.
+
+        Returns the nodes and the position to resume from (None at the end).
+        Scanning stops as soon as the page is full.
+        """
+        candidates = self.index.nodes_of_type(node_type) if node_type else self._nodes
+        q = q.lower() if q else None
+        found = []
+        for current in range(position, len(candidates)):
+            node = candidates[current]
+            if q and not self._matches(node, q):
+                continue
+            found.append(node)
+            if len(found) == limit:
+                following = current + 1
+                return found, (following if following < len(candidates) else None)
+        return found, None
+
+    def neighborhood(self, node_id: str, depth: int = 1, edge_type: Optional[str] = None,
+                     direction: str = BOTH) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Nodes within ``depth`` hops of ``node_id`` (excluding it) and the edges walked."""
+        directions = (OUT, IN) if direction == BOTH else (direction,)
+        seen = {node_id}
+        frontier = [node_id]
+        nodes: List[Dict[str, Any]] = []
+        # By endpoints and type: snapshot edges may be decoded again mid-walk
+        edges: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for _ in range(depth):
+            next_frontier = []
+            for current in frontier:
+                for walk in directions:
+                    for other, edge in self.index.index.adjacent(current, edge_type, walk):
+                        edges[(edge["from"], edge["to"], edge["type"])] = edge
+                        if other in seen:
+                            continue
+                        seen.add(other)
+                        node = self.index.get_node(other)
+                        if node is not None:
+                            nodes.append(node)
+                            next_frontier.append(other)
+            frontier = next_frontier
+        return nodes, list(edges.values())
+
+@dataclass
+class _Entry:
+    view: GraphView
+    fetched_at: float
+    accessed_at: float
+
+class GraphStore:
+    """Latest graph per (cloud, region, project, meta profile), with shared discovery."""
+
+    def __init__(self, discover: Optional[Discover] = None, ttl: float = DEFAULT_TTL,
+                 stale_ttl: float = DEFAULT_STALE_TTL, hot_for: float = DEFAULT_HOT_FOR,
+                 clock: Callable[[], float] = time.monotonic):
+        self.discover = discover
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.hot_for = hot_for
+        self.clock = clock
+        self._entries: Dict[GraphKey, _Entry] = {}
+        self._inflight: Dict[GraphKey, asyncio.Future] = {}
+        # In-flight discoveries started with force, which bypass the disk cache
+        self._forced: Set[asyncio.Future] = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "joined": 0, "refreshes": 0, "errors": 0}
+
+    def get(self, key: GraphKey) -> Optional[GraphView]:
+        entry = self._entries.get(key)
+        return entry.view if entry else None
+
+    def put(self, key: GraphKey, graph: GraphSource) -> GraphView:
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is None or entry.view.source is not graph:
+            entry = self._entries[key] = _Entry(GraphView(graph), fetched_at=now, accessed_at=now)
+        entry.fetched_at = now
+        return entry.view
+
+    def keys(self) -> Iterable[GraphKey]:
+        return list(self._entries)
+
+    def age(self, key: GraphKey) -> Optional[float]:
+        entry = self._entries.get(key)
+        return None if entry is None else self.clock() - entry.fetched_at
+
+    async def fetch(self, key: GraphKey, max_age: Optional[float] = None, force: bool = False,
+                    discover: Optional[Discover] = None) -> GraphView:
+        """
+        The graph for ``key``.
+
+        Fresh graphs are returned directly; stale ones are returned while a
+        background discovery replaces them. Otherwise (nothing stored, too old,
+        older than ``max_age`` or ``force``) this waits for a discovery, joining
+        one that is already running for the same key. With ``force`` only a
+        forced discovery is joined: ``discover`` may read the disk cache
+        otherwise, and is started afresh, superseding the running one.
+        """
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.accessed_at = now
+            age = now - entry.fetched_at
+            if not force and (max_age is None or age <= max_age):
+                if age <= self.ttl:
+                    self.stats["hits"] += 1
+                    return entry.view
+                if age <= self.stale_ttl:
+                    self.stats["stale_hits"] += 1
+                    self.refresh(key)
+                    return entry.view
+        self.stats["misses"] += 1
+        # Shielded so a client disconnecting does not cancel the shared discovery
+        return await asyncio.shield(self._single_flight(key, discover, force))
+
+    def running(self, key: GraphKey, force: bool = False) -> Optional[asyncio.Future]:
+        """The in-flight discovery for ``key`` a request with ``force`` may join, if any."""
+        future = self._inflight.get(key)
+        return future if future is not None and (not force or future in self._forced) else None
+
+    def start(self, key: GraphKey, discover: Optional[Discover] = None, force: bool = False) -> asyncio.Future:
+        """Discover ``key`` with ``discover``, or join the discovery already running for it."""
+        self.stats["misses"] += 1
+        return self._single_flight(key, discover, force)
+
+    def refresh(self, key: GraphKey) -> asyncio.Future:
+        """Start a background discovery for ``key`` unless one is running."""
+        future = self._inflight.get(key)
+        if future is None:
+            self.stats["refreshes"] += 1
+            future = self._single_flight(key)
+            # Failures are logged in _discover; the stale graph stays in place
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return future
+
+    def _single_flight(self, key: GraphKey, discover: Optional[Discover] = None, force: bool = False) -> asyncio.Future:
+        future = self.running(key, force)
+        if future is not None:
+            self.stats["joined"] += 1
+            return future
+        future = self._inflight[key] = asyncio.ensure_future(self._discover(key, discover or self.discover))
+        if force:
+            self._forced.add(future)
+
+        def finished(_):
+            self._forced.discard(future)
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        future.add_done_callback(finished)
+        return future
+
+    async def _discover(self, key: GraphKey, discover: Discover) -> GraphView:
+        try:
+            graph = await discover(key)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Discovery for {key[0]} failed: {e}")
+            raise
+        if self._inflight.get(key) is not asyncio.current_task():
+            # Superseded by a forced discovery: its waiters get this graph,
+            # but it must not replace the newer one in the store
+            return GraphView(graph)
+        return self.put(key, graph)
+
+    def refresh_hot_keys(self) -> List[GraphKey]:
+        """Refresh recently used scopes close to going stale; forget unused ones."""
+        now = self.clock()
+        refreshed = []
+        for key, entry in list(self._entries.items()):
+            idle = now - entry.accessed_at
+            if idle > self.stale_ttl:
+                del self._entries[key]
+            elif idle <= self.hot_for and now - entry.fetched_at >= self.ttl * REFRESH_AHEAD and key not in self._inflight:
+                self.refresh(key)
+                refreshed.append(key)
+        return refreshed
+
+    async def run_refresher(self, interval: float = DEFAULT_REFRESH_INTERVAL):
+        """Refresh hot keys forever; run as a background task."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.refresh_hot_keys()
+            except Exception as e:
+                logger.error(f"Graph refresher failed: {e}")
@@ -0,0 +1,55 @@
+"""
+Server-Sent Events for streaming discovery.
+
+``/api/graph/stream`` sends the graph as it is discovered instead of in one
+response at the end:
+
+* ``start``: the scope being discovered.
+* ``progress``: one per chunk of discovery results, ``{resource, count, done, total}``;
+  ``done`` counts finished discovery tasks. Large listings arrive in several chunks.
+* ``batch``: the nodes and edges that chunk added, ``{resource, nodes, edges}``.
+  Edges are sent as soon as both of their node types are complete.
+* ``done``: ``{generated_at, nodes, edges}`` totals; the graph is now stored
+  and served by the other endpoints.
+* ``error``: ``{detail}``; the stream ends.
+"""
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple
+
+from ..graph.serialize import dumps, edge_record, node_record
+
+if TYPE_CHECKING:
+    from ..runner import DiscoveryBatch
+
+Event = Tuple[str, Dict[str, Any]]
+
+def sse(event: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+def batch_events(batch: "DiscoveryBatch") -> Iterator[Event]:
+    yield "progress", {"resource": batch.resource, "count": len(batch.nodes), "done": batch.done, "total": batch.total}
+    if batch.nodes or batch.edges:
+        yield "batch", {
+            "resource": batch.resource,
+            "nodes": [node_record(n) for n in batch.nodes],
+            "edges": [edge_record(e) for e in batch.edges],
+        }
+
+def replay_events(graph_json: Dict[str, Any]) -> Iterator[Event]:
+    """The events of an already discovered graph, one batch per node type."""
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    for node in graph_json.get("nodes", []):
+        by_type.setdefault(node["type"], []).append(node)
+    # Each edge goes out with the batch completing its second endpoint
+    batch_of = {node["id"]: number for number, nodes in enumerate(by_type.values()) for node in nodes}
+    last = max(len(by_type) - 1, 0)
+    edges: List[List[Dict[str, Any]]] = [[] for _ in range(len(by_type) or 1)]
+    for edge in graph_json.get("edges", []):
+        edges[max(batch_of.get(edge["from"], last), batch_of.get(edge["to"], last))].append(edge)
+    for number, (node_type, nodes) in enumerate(by_type.items()):
+        yield "progress", {"resource": node_type, "count": len(nodes), "done": number + 1, "total": len(by_type)}
+        yield "batch", {"resource": node_type, "nodes": nodes, "edges": edges[number]}
+    yield "done", {
+        "generated_at": graph_json.get("generated_at"),
+        "nodes": len(graph_json.get("nodes", [])),
+        "edges": len(graph_json.get("edges", [])),
+    }
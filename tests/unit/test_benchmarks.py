@@ -0,0 +1,24 @@
+from collections import Counter
+
+from benchmarks.run import compare, run_size
+from benchmarks.synthetic import FakeConnection, ProjectSpec, generate
+from os_explorer.cli import discover_graph
+from os_explorer.graph.relations import RELATIONS
+
+def test_synthetic_project_covers_every_relation():
+    spec = ProjectSpec.scaled(500)
+    graph = discover_graph("bench", conn=FakeConnection(generate(spec)), use_cache=False).to_dict()
+
+    assert len(graph["nodes"]) == spec.resource_count()
+    edge_types = Counter(e["type"] for e in graph["edges"])
+    assert {r.edge_type for r in RELATIONS} <= set(edge_types)
+    assert edge_types["has_port"] == spec.servers * spec.ports_per_server
+
+def test_run_size_and_compare():
+    results = run_size(200, repeat=1, memory=True)
+    assert set(results) == {"discovery", "build", "link", "to_dict", "json", "tree"}
+    assert all(entry["peak_bytes"] >= 0 for entry in results.values())
+
+    slower = {"200": {name: {"seconds": entry["seconds"] * 2 + 1} for name, entry in results.items()}}
+    assert compare(slower, {"200": results}, 1.25)
+    assert not compare({"200": results}, slower, 1.25)
@@ -0,0 +1,45 @@
+import time
+
+from os_explorer.cache import DiscoveryCache
+from os_explorer.discovery.executor import DiscoveryExecutor, DiscoveryTask
+
+def test_cache_serves_fresh_entries_and_expires_old_ones(tmp_path):
+    cache = DiscoveryCache("cloud", "region", "p1", directory=tmp_path, ttls={"ports": 15})
+    cache.put("ports", [{"id": "port1"}])
+    assert cache.get("ports") == [{"id": "port1"}]
+
+    other_project = DiscoveryCache("cloud", "region", "p2", directory=tmp_path)
+    assert other_project.get("ports") is None
+
+    stale = DiscoveryCache("cloud", "region", "p1", directory=tmp_path, max_age=0)
+    time.sleep(0.01)
+    assert stale.get("ports") is None
+
+def test_wrapped_tasks_only_call_the_api_on_miss(tmp_path):
+    calls = []
+
+    def list_flavors():
+        calls.append("flavors")
+        return [{"id": "f1", "name": "m1.small"}]
+
+    for _ in range(2):
+        cache = DiscoveryCache("cloud", None, "p1", directory=tmp_path)
+        results = dict(DiscoveryExecutor().run(cache.wrap_tasks([DiscoveryTask("flavors", list_flavors)])))
+        assert results == {"flavors": [{"id": "f1", "name": "m1.small"}]}
+
+    assert calls == ["flavors"]
+    assert cache.hits == 1
+
+def test_streamed_results_are_stored_once_complete(tmp_path):
+    cache = DiscoveryCache("cloud", None, "p1", directory=tmp_path)
+    stream = cache.stream("ports", iter([{"id": "port1"}, {"id": "port2"}]))
+    assert next(stream) == {"id": "port1"}
+    assert cache.get("ports") is None
+
+    # Abandoned halfway: nothing is stored and no temp file is left behind
+    stream.close()
+    assert cache.get("ports") is None
+    assert list(cache.directory.iterdir()) == []
+
+    assert list(cache.stream("ports", iter([{"id": "port1"}, {"id": "port2"}]))) == [{"id": "port1"}, {"id": "port2"}]
+    assert cache.get("ports") == [{"id": "port1"}, {"id": "port2"}]
@@ -0,0 +1,138 @@
+import random
+import tracemalloc
+import uuid
+
+import pytest
+
+from os_explorer.graph.compact import COMPACT_AT, REBUILD_AFTER
+from os_explorer.graph.index import IN, OUT
+from os_explorer.graph.model import Edge, Graph, Node
+from os_explorer.graph.query import reachable, shortest_path
+
+def _graph(node_count, edge_count, edge_types, seed=1):
+    rng = random.Random(seed)
+    graph = Graph(project_id="p", project_name="p")
+    ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(node_count)]
+    for node_id in ids:
+        graph.add_node(Node(node_id, "port", node_id, node_id))
+    edges = [Edge(rng.choice(ids), rng.choice(ids), rng.choice(edge_types)) for _ in range(edge_count)]
+    return graph, ids, edges
+
+def _expected(edges, node_id, edge_type, direction):
+    ends = [(e.from_node, e.to_node) if direction == OUT else (e.to_node, e.from_node) for e in edges
+            if edge_type is None or e.type == edge_type]
+    return sorted(other for this, other in ends if this == node_id)
+
+def test_edges_cost_an_order_of_magnitude_less_memory():
+    graph, ids, edges = _graph(5000, 20000, ["has_port", "has_sg", "on_network", "attached"])
+    tracemalloc.start()
+    for edge in edges:
+        graph.add_edge(edge)
+    # Includes both CSR adjacency tables
+    graph.neighbor_ids(ids[0])
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Edge objects with per-node adjacency lists took about 450 bytes per edge
+    assert used / len(edges) < 45
+
+@pytest.mark.parametrize("type_count", [4, 300])
+def test_adjacency_covers_built_and_pending_edges(type_count):
+    edge_types = [f"type{i}" for i in range(type_count)]
+    graph, ids, edges = _graph(50, 2000, edge_types)
+    built, pending = edges[:-REBUILD_AFTER // 2], edges[-REBUILD_AFTER // 2:]
+    for edge in built:
+        graph.add_edge(edge)
+    graph.neighbor_ids(ids[0])
+    # Scanned until the next rebuild
+    for edge in pending:
+        graph.add_edge(edge)
+    assert graph.index.table.pending == len(pending)
+
+    for node_id in ids:
+        for direction in (OUT, IN):
+            for edge_type in (None, edge_types[0], edge_types[-1]):
+                expected = _expected(edges, node_id, edge_type, direction)
+                assert sorted(graph.neighbor_ids(node_id, edge_type, direction)) == expected
+                found = graph.edges_of(node_id, edge_type, direction)
+                assert sorted(e.to_node if direction == OUT else e.from_node for e in found) == expected
+    assert graph.neighbor_ids(ids[0], "unknown") == [] and graph.neighbor_ids("missing") == []
+
+def test_walks_match_adjacency_and_skip_dangling_edges():
+    graph = Graph(project_id="p", project_name="p")
+    for node_id in ("fip", "port", "net", "srv"):
+        graph.add_node(Node(node_id, "port", node_id, node_id))
+    for from_id, to_id, edge_type in (("fip", "port", "associated"), ("port", "net", "on_network"),
+                                      ("srv", "port", "has_port"), ("port", "sg-gone", "has_sg")):
+        graph.add_edge(Edge(from_id, to_id, edge_type, {"via": edge_type}))
+    graph.add_node(Node("lonely", "port", "lonely", "lonely"))
+
+    found = reachable(graph, "fip")
+    # The server behind the port is reached through has_port, walked backwards
+    assert found.node_ids == ["port", "net", "srv"] and found.depths == {"port": 1, "net": 2, "srv": 2}
+    assert [edge.meta for edge in found.edges] == [{"via": "associated"}, {"via": "on_network"}, {"via": "has_port"}]
+    assert reachable(graph, "fip", edge_types=["associated", "on_network"]).node_ids == ["port", "net"]
+    assert shortest_path(graph, "srv", "net").node_ids == ["srv", "port", "net"]
+    # Added after the CSR tables were built, without edges
+    assert reachable(graph, "lonely").node_ids == []
+    assert shortest_path(graph, "lonely", "net") is None
+
+def test_removal_compacts_edges_and_keeps_meta():
+    graph = Graph(project_id="p", project_name="p")
+    for node_id in ("a", "b", "c"):
+        graph.add_node(Node(node_id, "port", node_id, node_id))
+    graph.add_edge(Edge("a", "b", "x", {"n": 1}))
+    graph.add_edge(Edge("a", "b", "x", {"n": 2}))
+    graph.add_edge(Edge("b", "c", "y"))
+    graph.add_edge(Edge("c", "a", "z", {"n": 4}))
+
+    # One stored edge per edge given, the first one matching
+    graph.remove_edges([Edge("a", "b", "x")])
+    assert [(e.from_node, e.to_node, e.meta) for e in graph.edges] == [("a", "b", {"n": 2}), ("b", "c", {}), ("c", "a", {"n": 4})]
+
+    graph.remove_nodes(["b"])
+    assert list(graph.nodes) == ["a", "c"]
+    assert graph.to_dict()["edges"] == [{"from": "c", "to": "a", "type": "z", "meta": {"n": 4}}]
+    assert graph.neighbor_ids("a", direction=IN) == ["c"] and graph.neighbor_ids("a") == []
+    assert Graph.from_dict(graph.to_dict()).to_dict() == graph.to_dict()
+
+def test_removals_interleaved_with_lookups_keep_the_csr_tables():
+    graph, ids, edges = _graph(200, 2000, ["has_port", "has_sg"])
+    for edge in edges:
+        graph.add_edge(edge)
+    graph.neighbor_ids(ids[0])
+    table = graph.index.table
+    csr = table.csr(OUT)
+
+    live = list(edges)
+    removals = int(len(edges) * COMPACT_AT)
+    for step, edge in enumerate(edges[:removals]):
+        # As a delta refresh does: look up a node's edges, then drop some
+        assert sorted(graph.neighbor_ids(edge.from_node)) == _expected(live, edge.from_node, None, OUT)
+        graph.remove_edges([edge])
+        live.remove(edge)
+        assert sorted(graph.neighbor_ids(edge.to_node, direction=IN)) == _expected(live, edge.to_node, None, IN)
+        if step % 50 == 0:
+            assert sorted(e.to_node for e in graph.edges_of(edge.from_node)) == _expected(live, edge.from_node, None, OUT)
+    # Flagged only: no compaction or rebuild yet
+    assert table.csr(OUT) is csr and table.removed == removals
+    assert len(graph.edges) == len(live)
+    assert [(r["from"], r["to"], r["type"]) for r in graph.to_dict()["edges"]] == [(e.from_node, e.to_node, e.type) for e in live]
+
+    graph.remove_edges(edges[removals:removals + 1])
+    live.remove(edges[removals])
+    assert table.removed == 0 and len(table.types) == len(live)
+    for node_id in ids[:20]:
+        assert sorted(graph.neighbor_ids(node_id)) == _expected(live, node_id, None, OUT)
+
+def test_edge_list_is_a_read_only_sequence():
+    graph = Graph(project_id="p", project_name="p", edges=[Edge("a", "b", "x"), Edge("b", "c", "y")])
+    edges = graph.edges
+    assert len(edges) == 2
+    assert edges[0] == Edge("a", "b", "x") and edges[-1].to_node == "c"
+    assert [e.type for e in edges[::-1]] == ["y", "x"]
+    assert Edge("b", "c", "y") in edges
+    with pytest.raises(IndexError):
+        edges[2]
+    # Edges are created on access
+    edges[0].to_node = "z"
+    assert edges[0].to_node == "b"
@@ -0,0 +1,53 @@
+import threading
+from unittest.mock import MagicMock
+
+from os_explorer.config import Config, ConnectionPool
+
+def _pool():
+    connects = []
+
+    def connect(config):
+        conn = MagicMock()
+        conn.current_project.name = f"name-{config.project_id}"
+        connects.append(config.key)
+        return conn
+
+    return ConnectionPool(connect=connect, http_pool_size=16), connects
+
+def test_pool_reuses_connection_per_scope():
+    pool, connects = _pool()
+    first = pool.get(Config("c1", "r1", project_id="p1"))
+
+    assert pool.get(Config("c1", "r1", project_id="p1")) is first
+    assert pool.get(Config("c1", "r2", project_id="p1")) is not first
+    assert len(connects) == 2
+    assert pool.stats() == {"connections": 2, "hits": 1, "misses": 2, "hit_rate": 0.333}
+
+def test_pool_shares_one_http_pool_and_caches_project_name():
+    pool, _ = _pool()
+    config = Config("c1", project_id="p1")
+    conn = pool.get(config)
+
+    adapters = {call.args[0]: call.args[1] for call in conn.session.session.mount.call_args_list}
+    assert set(adapters) == {"https://", "http://"}
+    assert adapters["https://"]._pool_maxsize == 16
+    assert pool.project_name(config) == "name-p1"
+    # Looked up once, not once per request
+    conn.current_project.name = "renamed"
+    assert pool.project_name(config) == "name-p1"
+
+def test_pool_connects_once_under_concurrency_and_invalidates():
+    pool, connects = _pool()
+    config = Config("c1", project_id="p1")
+    threads = [threading.Thread(target=pool.get, args=(config,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(connects) == 1
+
+    conn = pool.get(config)
+    pool.invalidate(config)
+    conn.close.assert_called_once()
+    assert pool.get(config) is not conn
+    assert len(connects) == 2
@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from os_explorer.cache import DiscoveryCache
+from os_explorer.discovery.delta import Delta, DeltaRefresher, since_timestamp
+from os_explorer.discovery.image import ImageDiscovery
+from os_explorer.discovery.pushdown import images_cache_key
+from os_explorer.graph.builder import GraphBuilder
+from os_explorer.runner import discover_graph
+
+def _graph():
+    gb = GraphBuilder("p1", "proj1")
+    gb.add_resources("flavors", [])
+    gb.add_resources("images", [])
+    gb.add_resources("servers", [{"id": "s1", "name": "web"}, {"id": "s2", "name": "db"}])
+    gb.add_resources("volumes", [
+        {"id": "v1", "name": "data", "attachments": [{"server_id": "s1", "device": "/dev/vdb"}]},
+        {"id": "v2", "name": "logs", "attachments": [{"server_id": "s2", "device": "/dev/vdc"}]},
+    ])
+    gb.add_resources("ports", [{"id": "p1", "device_id": "s3"}])
+    gb.link_resources()
+    return gb.graph
+
+def test_since_timestamp_subtracts_skew():
+    assert since_timestamp("2024-01-01T00:01:30.5") == "2024-01-01T00:00:30Z"
+
+def test_graph_remove_nodes_drops_incident_edges():
+    graph = _graph()
+    graph.remove_nodes(["s2"])
+
+    assert "s2" not in graph.nodes
+    assert [(e.from_node, e.to_node) for e in graph.edges] == [("s1", "v1")]
+    assert graph.neighbor_ids("v2", "attached", direction="in") == []
+    assert [n.id for n in graph.nodes_of_type("server")] == ["s1"]
+
+def test_apply_patches_nodes_and_edges():
+    graph = _graph()
+    refresher = DeltaRefresher(graph, MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock())
+    refresher.compute.list_flavors.return_value = []
+    refresher.image.list_images.return_value = []
+
+    stats = refresher.apply({
+        # v2 was re-attached; s3 appears and the unchanged port p1 points at it
+        "volumes": Delta(changed=[{"id": "v2", "name": "logs", "attachments": [{"server_id": "s2", "device": "/dev/vdd"}]}]),
+        "servers": Delta(changed=[{"id": "s3", "name": "new"}], deleted={"s1"}),
+    })
+
+    edges = sorted((e.from_node, e.to_node, e.type) for e in graph.edges)
+    assert edges == [("s2", "v2", "attached"), ("s3", "p1", "has_port")]
+    assert graph.edges_of("s2", "attached")[0].meta == {"device": "/dev/vdd"}
+    assert graph.nodes["s3"].meta["flavor_name"] == "unknown"
+    assert "s1" not in graph.nodes
+    assert stats == {"changed": 2, "deleted": 1, "edges_rebuilt": 1}
+
+def test_member_change_under_unchanged_pool_is_relisted():
+    gb = GraphBuilder("p1", "proj1")
+    gb.add_resources("pools", [{"id": "pool1"}, {"id": "pool2"}])
+    gb.add_resources("members", [
+        {"id": "m1", "pool_id": "pool1", "updated_at": "t1"},
+        {"id": "m2", "pool_id": "pool1", "updated_at": "t1"},
+        {"id": "m3", "pool_id": "pool2", "updated_at": "t1"},
+    ])
+    gb.link_resources()
+    refresher = DeltaRefresher(gb.graph, MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock())
+    times = {"pool1": {"m1": "t2"}, "pool2": {"m3": "t1"}}
+    refresher.lb.list_child_update_times.side_effect = lambda key, parent_id: times[parent_id]
+    refresher.lb.list_all_members.return_value = [{"id": "m1", "pool_id": "pool1", "updated_at": "t2"}]
+
+    # Neither pool changed: m1 was updated and m2 removed under pool1
+    delta = refresher.children_delta("members", Delta())
+
+    refresher.lb.list_all_members.assert_called_once_with([{"id": "pool1"}])
+    assert [m["id"] for m in delta.changed] == ["m1"] and delta.deleted == {"m2"}
+
+def test_refresh_rejects_the_async_backend():
+    with pytest.raises(ValueError):
+        discover_graph("cloud", previous=_graph().to_dict(), backend="async")
+
+def test_changed_servers_list_only_their_images(tmp_path):
+    conn = MagicMock()
+    conn.image.images.side_effect = lambda **query: [{"id": i, "name": f"name-{i}"} for i in query["id"][3:].split(",")]
+    cache = DiscoveryCache("c", None, "p1", directory=tmp_path)
+    image = ImageDiscovery(conn, "p1", MagicMock())
+    refresher = DeltaRefresher(_graph(), MagicMock(), MagicMock(), MagicMock(), MagicMock(), image, MagicMock(), cache=cache)
+    refresher.compute.list_flavors.return_value = []
+    servers = [{"id": "s3", "name": "new", "image": {"id": "img-2"}}, {"id": "s4", "name": "vol", "image": {"id": "img-1"}}]
+
+    refresher.apply({"servers": Delta(changed=servers)})
+
+    conn.image.images.assert_called_once_with(id="in:img-1,img-2")
+    assert refresher.graph.nodes["s3"].meta["image_name"] == "name-img-2"
+    # Shared with full discoveries of the same servers
+    assert cache.get(images_cache_key(servers)) == [{"id": "img-1", "name": "name-img-1"}, {"id": "img-2", "name": "name-img-2"}]
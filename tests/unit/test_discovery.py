@@ -47,3 +47,96 @@ def test_compute_discovery_error_handling():
     servers = list(cd.list_servers())
     
     assert len(servers) == 0
+
+def test_executor_respects_dependencies():
+    from os_explorer.discovery.executor import DiscoveryExecutor, DiscoveryTask
+
+    tasks = [
+        DiscoveryTask("members", lambda pools: [f"m-{p}" for p in pools], depends_on=("pools",)),
+        DiscoveryTask("pools", lambda: ["p1", "p2"]),
+        DiscoveryTask("servers", lambda: ["s1"]),
+    ]
+    results = dict(DiscoveryExecutor(max_workers=4).run(tasks))
+
+    assert results == {"pools": ["p1", "p2"], "members": ["m-p1", "m-p2"], "servers": ["s1"]}
+
+def test_executor_isolates_task_errors():
+    from os_explorer.discovery.executor import DiscoveryExecutor, DiscoveryTask
+
+    def boom():
+        raise RuntimeError("boom")
+
+    results = dict(DiscoveryExecutor(max_workers=2).run([DiscoveryTask("a", boom), DiscoveryTask("b", lambda: [1])]))
+
+    assert results == {"a": [], "b": [1]}
+
+def test_executor_streams_chunks_to_the_consumer():
+    from os_explorer.discovery.executor import DiscoveryExecutor, DiscoveryTask
+
+    def ports():
+        yield from ("port1", "port2", "port3")
+        raise RuntimeError("connection reset")
+
+    tasks = [
+        DiscoveryTask("members", lambda pools: [f"m-{p}" for p in pools], depends_on=("pools",)),
+        DiscoveryTask("pools", lambda: iter(["p1", "p2"])),
+        DiscoveryTask("ports", ports),
+    ]
+    events = list(DiscoveryExecutor(max_workers=2).stream(tasks, chunk_size=2))
+
+    chunks = {}
+    for name, chunk, finished in events:
+        assert len(chunk) <= 2
+        chunks.setdefault(name, []).extend(chunk)
+    assert chunks == {"pools": ["p1", "p2"], "members": ["m-p1", "m-p2"], "ports": ["port1", "port2", "port3"]}
+    assert sorted(name for name, _, finished in events if finished) == ["members", "pools", "ports"]
+    assert [finished for name, _, finished in events if name == "ports"] == [False, True]
+
+def test_list_all_members_annotates_pool_and_isolates_errors():
+    from os_explorer.discovery.loadbalancer import LoadBalancerDiscovery
+
+    def members(pool_id):
+        if pool_id == "bad":
+            raise MockForbiddenException()
+        return [{"id": f"{pool_id}-m1"}, {"id": f"{pool_id}-m2"}]
+
+    mock_conn = MagicMock()
+    mock_conn.load_balancer.members.side_effect = members
+    mock_conn.load_balancer.members.__name__ = "members"
+
+    lb = LoadBalancerDiscovery(mock_conn, "p1", MagicMock(), max_workers=2)
+    result = lb.list_all_members([{"id": "pool1"}, {"id": "bad"}, {"id": "pool2"}])
+
+    assert [m["id"] for m in result] == ["pool1-m1", "pool1-m2", "pool2-m1", "pool2-m2"]
+    assert all(m["pool_id"] == m["id"].split("-")[0] for m in result)
+
+def test_async_backend_follows_pagination_and_annotates_members():
+    import asyncio
+    httpx = pytest.importorskip("httpx")
+    from os_explorer.discovery.aio import AsyncApiClient, AsyncLoadBalancerDiscovery
+
+    pages = {
+        "/v2/lbaas/pools": {"pools": [{"id": "pool1"}], "pools_links": [{"rel": "next", "href": "http://lb/v2/lbaas/pools?marker=pool1"}]},
+        "/v2/lbaas/pools?marker=pool1": {"pools": [{"id": "pool2"}], "pools_links": []},
+        "/v2/lbaas/pools/pool1/members": {"members": [{"id": "m1"}]},
+        "/v2/lbaas/pools/pool2/members": {"members": [{"id": "m2"}]},
+    }
+
+    def handler(request):
+        key = request.url.raw_path.decode().replace("?project_id=p1", "")
+        return httpx.Response(200, json=pages[key])
+
+    async def run():
+        client = AsyncApiClient(MagicMock())
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client._endpoints = {"load-balancer": "http://lb/v2"}
+        lb = AsyncLoadBalancerDiscovery(client, "p1", MagicMock())
+        pools = await lb.list_pools()
+        members = await lb.list_all_members(pools)
+        await client._client.aclose()
+        return pools, members
+
+    pools, members = asyncio.run(run())
+
+    assert [p["id"] for p in pools] == ["pool1", "pool2"]
+    assert members == [{"id": "m1", "pool_id": "pool1"}, {"id": "m2", "pool_id": "pool2"}]
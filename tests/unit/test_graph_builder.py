@@ -19,15 +19,91 @@ def test_add_edge():
 
 def test_link_server_volumes():
     gb = GraphBuilder("p1", "proj1")
-    server_id = "s1"
+    gb.add_node(Node(id="s1", type="server", name="s1", label="s1"))
     volumes = [
-        {"id": "v1", "attachments": [{"server_id": "s1", "device": "/dev/vda"}]},
-        {"id": "v2", "attachments": [{"server_id": "s2"}]} # Not attached to s1
+        {"id": "v1", "name": "v1", "attachments": [{"server_id": "s1", "device": "/dev/vda"}]},
+        {"id": "v2", "name": "v2", "attachments": [{"server_id": "s2"}]} # s2 is not a known server
     ]
-    gb.link_server_volumes(server_id, volumes)
+    gb.add_resources("volumes", volumes)
+    gb.link_resources()
     
     edges = gb.graph.edges
     assert len(edges) == 1
     assert edges[0].from_node == "s1"
-    assert edges[0].to_node == "volume:v1"
+    assert edges[0].to_node == "v1"
     assert edges[0].meta["device"] == "/dev/vda"
+
+def test_add_resources_defers_servers_until_lookups():
+    gb = GraphBuilder("p1", "proj1")
+    gb.add_resources("servers", [{"id": "s1", "name": "web", "flavor": {"id": "f1"}, "image": None}])
+    assert "s1" not in gb.graph.nodes
+
+    gb.add_resources("flavors", [{"id": "f1", "name": "m1.small"}])
+    gb.add_resources("images", [])
+    assert gb.graph.nodes["s1"].meta["flavor_name"] == "m1.small"
+    assert gb.graph.nodes["s1"].meta["image_name"] == "unknown"
+
+def test_link_resources():
+    gb = GraphBuilder("p1", "proj1")
+    gb.add_resources("servers", [{"id": "s1", "name": "web"}])
+    gb.add_resources("ports", [{"id": "port-0001-abc", "name": None, "device_id": "s1", "security_group_ids": []}])
+    gb.add_resources("pools", [{"id": "pool1", "name": "pool"}])
+    gb.add_resources("load_balancers", [{"id": "lb1", "name": "lb"}])
+    gb.add_resources("listeners", [{"id": "lis1", "name": "http", "load_balancers": [{"id": "lb1"}], "default_pool_id": "pool1"}])
+    gb.link_resources()
+
+    assert gb.graph.nodes["port-0001-abc"].name == "port-000"
+    edges = {(e.from_node, e.to_node, e.type) for e in gb.graph.edges}
+    assert ("s1", "port-0001-abc", "has_port") in edges
+    assert ("lb1", "lis1", "has_listener") in edges
+    assert ("lis1", "pool1", "has_pool") in edges
+
+def test_link_resources_uses_parent_annotations():
+    gb = GraphBuilder("p1", "proj1")
+    gb.add_resources("pools", [{"id": "pool1", "name": "pool"}])
+    gb.add_resources("members", [{"id": "m1", "name": "a", "pool_id": "pool1"}, {"id": "m2", "name": "b"}])
+    gb.add_resources("l7_policies", [{"id": "pol1", "name": "pol", "listener_id": "lis-unknown"}])
+    gb.add_resources("l7_rules", [{"id": "r1", "l7_policy_id": "pol1"}])
+    gb.link_resources()
+
+    edges = [(e.from_node, e.to_node, e.type) for e in gb.graph.edges]
+    assert sorted(edges) == [("pol1", "r1", "has_rule"), ("pool1", "m1", "has_member")]
+
+def test_add_resources_in_chunks_keeps_only_references():
+    gb = GraphBuilder("p1", "proj1", meta_profile="minimal")
+    gb.add_resources("ports", [{"id": "port1", "device_id": "s1", "security_group_ids": ["sg1"]}], complete=False)
+    gb.add_resources("ports", [{"id": "port2", "device_id": "s2", "security_group_ids": []}], complete=False)
+    assert not hasattr(gb, "resources")
+    gb.add_resources("ports", [])
+    gb.add_resources("servers", [{"id": "s1", "name": "web"}], complete=False)
+    gb.add_resources("security_groups", [{"id": "sg1", "name": "default"}])
+    gb.add_resources("flavors", [])
+    gb.add_resources("images", [])
+
+    # Servers are not complete yet, so only the port -> security group edges can be built
+    assert [(e.from_node, e.to_node) for e in gb.link_ready()] == [("port1", "sg1")]
+    assert "s1" in gb.graph.nodes
+    gb.add_resources("servers", [{"id": "s2", "name": "db"}])
+    edges = {(e.from_node, e.to_node, e.type) for e in gb.link_ready()}
+    assert edges == {("s1", "port1", "has_port"), ("s2", "port2", "has_port")}
+    assert gb.link_resources() == []
+
+def test_mark_partial_flags_what_depends_on_the_failed_listing():
+    gb = GraphBuilder("p1", "proj1")
+    gb.add_resources("flavors", [{"id": "f1", "name": "small"}])
+    gb.add_resources("images", [])
+    gb.add_resources("servers", [
+        {"id": "s1", "name": "web", "flavor": {"id": "f1"}, "image": {"id": "img-1"}},
+        {"id": "s2", "name": "db", "flavor": {"id": "f1"}, "image": ""},
+    ])
+    gb.add_resources("ports", [{"id": "p1", "device_id": "s1", "network_id": "n1"}])
+    gb.add_resources("networks", [{"id": "n1"}])
+    gb.add_resources("floating_ips", [{"id": "fip1", "floating_ip_address": "1.2.3.4", "port_id": "p1"}])
+    gb.link_resources()
+
+    # Only the server whose image name could not be looked up
+    assert [n.id for n in gb.mark_partial("images", [None])] == ["s1"]
+    assert gb.mark_partial("flavors", [None]) == []
+    # Ports and the floating IPs referencing them; not the servers or networks ports point at
+    assert sorted(n.id for n in gb.mark_partial("ports", [None])) == ["fip1", "p1"]
+    assert not gb.graph.nodes["n1"].partial and not gb.graph.nodes["s2"].partial
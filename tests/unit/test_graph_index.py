@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from os_explorer.graph.index import GraphIndex, GraphQueries
+from os_explorer.graph.model import Edge, Graph, Node
+
+FIXTURE = Path(__file__).parent.parent / "fixtures" / "sample_graph.json"
+
+def test_graph_maintains_indexes():
+    g = Graph(project_id="p1", project_name="proj1")
+    g.add_node(Node(id="s1", type="server", name="s1", label="s1"))
+    g.add_node(Node(id="v1", type="volume", name="v1", label="v1"))
+    g.add_edge(Edge(from_node="s1", to_node="v1", type="attached", meta={"device": "/dev/vdb"}))
+    g.add_edge(Edge(from_node="s1", to_node="missing", type="has_port"))
+
+    assert g.get_node("v1").type == "volume"
+    assert [n.id for n in g.nodes_of_type("server")] == ["s1"]
+    assert g.neighbor_ids("s1") == ["v1", "missing"]
+    assert [n.id for n in g.neighbors("s1")] == ["v1"]
+    assert g.neighbor_ids("v1", "attached", direction="in") == ["s1"]
+    assert g.edges_of("s1", "attached")[0].meta == {"device": "/dev/vdb"}
+
+def test_graph_index_from_json_matches_edges():
+    graph_json = json.loads(FIXTURE.read_text())
+    index = GraphIndex.from_dict(graph_json)
+
+    for edge in graph_json["edges"]:
+        assert edge["to"] in index.neighbor_ids(edge["from"], edge["type"])
+        assert edge["from"] in index.neighbor_ids(edge["to"], edge["type"], direction="in")
+    servers = [n["id"] for n in graph_json["nodes"] if n["type"] == "server"]
+    assert [n["id"] for n in index.nodes_of_type("server")] == servers
+
+def test_graph_queries_require_get_node():
+    class NoLookup(GraphQueries):
+        index = None
+
+    with pytest.raises(TypeError):
+        NoLookup()
@@ -0,0 +1,95 @@
+import asyncio
+
+from os_explorer.web.store import GraphStore
+
+KEY = ("cloud", None, None, "full")
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _store(clock):
+    calls = []
+
+    async def discover(key):
+        calls.append(key)
+        number = len(calls)
+        await asyncio.sleep(0.01)
+        return {"generated_at": str(number), "nodes": [], "edges": []}
+
+    return GraphStore(discover=discover, ttl=10, stale_ttl=100, hot_for=50, clock=clock), calls
+
+def test_concurrent_fetches_share_one_discovery():
+    store, calls = _store(Clock())
+
+    async def main():
+        return await asyncio.gather(*(store.fetch(KEY) for _ in range(5)))
+
+    views = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(view is views[0] for view in views)
+    assert store.stats["joined"] == 4
+
+def test_forced_fetches_do_not_join_cached_discoveries():
+    store, calls = _store(Clock())
+
+    async def main():
+        cached = asyncio.ensure_future(store.fetch(KEY))
+        await asyncio.sleep(0)
+        forced = [asyncio.ensure_future(store.fetch(KEY, force=True)) for _ in range(2)]
+        await asyncio.sleep(0)
+        # Later requests join the newest discovery
+        joined = asyncio.ensure_future(store.fetch(KEY, max_age=0))
+        return await cached, await asyncio.gather(*forced), await joined
+
+    cached, (forced, forced_again), joined = asyncio.run(main())
+    assert len(calls) == 2
+    assert cached.version == "1"
+    assert forced is forced_again is joined
+    assert forced.version == "2"
+    # The superseded discovery must not replace the forced one
+    assert store.get(KEY) is forced
+
+def test_stale_graphs_are_served_while_refreshing():
+    clock = Clock()
+    store, calls = _store(clock)
+
+    async def main():
+        first = await store.fetch(KEY)
+        clock.now = 5
+        assert await store.fetch(KEY) is first
+        clock.now = 20
+        # Stale: returned immediately, replaced in the background
+        assert await store.fetch(KEY) is first
+        await store._inflight[KEY]
+        assert store.get(KEY).version == "2"
+        clock.now = 200
+        # Too old to serve stale
+        assert (await store.fetch(KEY)).version == "3"
+
+    asyncio.run(main())
+    assert store.stats["stale_hits"] == 1
+
+def test_hot_keys_are_refreshed_ahead_and_cold_ones_dropped():
+    clock = Clock()
+    store, calls = _store(clock)
+    store.hot_for = 5
+    other = ("other", None, None, "full")
+
+    async def main():
+        await store.fetch(KEY)
+        await store.fetch(other)
+        clock.now = 9
+        await store.fetch(KEY)
+        assert store.refresh_hot_keys() == [KEY]
+        await store._inflight[KEY]
+        clock.now = 150
+        await store.fetch(KEY)
+        store.refresh_hot_keys()
+
+    asyncio.run(main())
+    assert calls == [KEY, other, KEY, KEY]
+    assert list(store.keys()) == [KEY]
@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from os_explorer.discovery import registry
+from os_explorer.discovery.registry import DiscoveryPlugin
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+# Seconds importing the CLI may take; offline commands must start well under a second
+IMPORT_BUDGET = 0.5
+
+HEAVY_MODULES = ("openstack", "keystoneauth1", "httpx", "fastapi", "rich", "os_explorer.discovery.base")
+
+def _import_fresh(module, watched):
+    """Seconds importing ``module`` took and which of ``watched`` it loaded."""
+    script = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(json.dumps([elapsed, [m for m in {watched!r} if m in sys.modules]]))\n"
+    )
+    # A fresh interpreter: this one has the test suite's imports loaded already
+    output = subprocess.run([sys.executable, "-c", script], cwd=SRC, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def test_cli_imports_within_budget_without_heavy_dependencies():
+    elapsed, loaded = _import_fresh("os_explorer.cli", HEAVY_MODULES)
+    assert loaded == []
+    assert elapsed < IMPORT_BUDGET, f"importing os_explorer.cli took {elapsed:.2f}s"
+
+def test_web_app_imports_discovery_only_when_discovering():
+    pytest.importorskip("fastapi")
+    watched = tuple(m for m in HEAVY_MODULES if m != "fastapi") + ("os_explorer.runner", "os_explorer.discovery.aio")
+    _, loaded = _import_fresh("os_explorer.web.main", watched)
+    assert loaded == []
+
+@pytest.fixture
+def entry_points(monkeypatch):
+    found = []
+    monkeypatch.setattr(registry, "_entry_points", lambda: found)
+    monkeypatch.setattr(registry, "_plugins", None)
+    return found
+
+def test_registry_loads_builtin_and_installed_plugins(entry_points):
+    manila = DiscoveryPlugin("manila", f"{__name__}:FakeDiscovery")
+    entry_points.extend([
+        SimpleNamespace(name="manila", load=lambda: manila),
+        SimpleNamespace(name="broken", load=lambda: (_ for _ in ()).throw(ImportError("no module"))),
+        SimpleNamespace(name="bogus", load=lambda: object()),
+    ])
+
+    plugins = registry.plugins()
+    assert {"compute", "network", "block_storage", "load_balancer", "image", "manila"} <= set(plugins)
+    assert "broken" not in plugins and "bogus" not in plugins
+    assert registry.discoverer("manila") is FakeDiscovery
+    assert registry.discoverer("network").__name__ == "NetworkDiscovery"
+    assert registry.discoverer("network", "async").__name__ == "AsyncNetworkDiscovery"
+    with pytest.raises(ValueError):
+        registry.discoverer("manila", "async")
+    with pytest.raises(ValueError):
+        registry.discoverer("trove")
+
+class FakeDiscovery:
+    pass
@@ -0,0 +1,68 @@
+import logging
+from unittest.mock import MagicMock
+
+import requests
+
+from os_explorer import metrics
+from os_explorer.discovery.base import DiscoveryBase
+from os_explorer.metrics import Metrics, instrument_connection, render_prometheus
+
+class FakeDiscovery(DiscoveryBase):
+    service_type = "network"
+
+def _response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response._content = body
+    response.headers["Content-Length"] = str(len(body))
+    return response
+
+def test_safe_list_records_calls_pages_and_errors(monkeypatch):
+    registry = Metrics()
+    monkeypatch.setattr("os_explorer.discovery.base.METRICS", registry)
+    session = requests.Session()
+    conn = MagicMock()
+    conn.session.session = session
+    instrument_connection(conn)
+    instrument_connection(conn)
+    assert session.hooks["response"].count(metrics._on_response) == 1
+
+    def ports(**kwargs):
+        # Two pages, seen through the session's response hook
+        for hook in session.hooks["response"]:
+            hook(_response(b'{"ports": [1, 2]}'))
+            hook(_response(b'{"ports": [3]}'))
+        return iter([1, 2, 3])
+
+    def routers(**kwargs):
+        raise ValueError("boom")
+
+    discovery = FakeDiscovery(conn, "p1", logging.getLogger("test"))
+    assert discovery._safe_list(ports) == [1, 2, 3]
+    assert discovery._safe_list(routers) == []
+
+    stats = registry.calls[("network", "ports")]
+    assert (stats.calls, stats.items, stats.pages, stats.bytes) == (1, 3, 2, 31)
+    assert registry.calls[("network", "routers")].errors == {"ValueError": 1}
+
+def test_render_prometheus():
+    registry = Metrics()
+    with registry.call("compute", "servers") as call:
+        call.items = 5
+    with registry.stage("serialize"):
+        pass
+    text = render_prometheus(registry, extra=[("os_explorer_pool", "gauge", "Pool", [({"result": 'h"it'}, 1)])])
+
+    assert 'os_explorer_api_call_duration_seconds_bucket{service="compute",call="servers",le="+Inf"} 1' in text
+    assert 'os_explorer_api_call_items_total{service="compute",call="servers"} 5' in text
+    assert 'os_explorer_stage_duration_seconds_count{stage="serialize"} 1' in text
+    assert 'os_explorer_pool{result="h\\"it"} 1' in text
+
+def test_merge_worker_metrics():
+    worker = Metrics()
+    with worker.call("image", "images") as call:
+        call.items = 2
+    parent = Metrics()
+    parent.merge(worker.export())
+    parent.merge(worker.export())
+    stats = parent.calls[("image", "images")]
+    assert (stats.calls, stats.items, sum(stats.buckets)) == (2, 4, 2)
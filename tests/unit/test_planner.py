@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks.synthetic import FakeConnection, ProjectSpec, generate
+from os_explorer.discovery.planner import plan_tasks, plan_types
+from os_explorer.runner import build_tasks, discover_graph
+
+def test_plan_follows_edges_down_and_one_step_up():
+    assert plan_types(["network"]) == {"network", "subnet"}
+    assert plan_types(["server"]) == {"server", "volume", "snapshot", "port", "security_group"}
+    # Attached volumes need their servers, not the servers' ports
+    assert plan_types(["volume"]) == {"volume", "snapshot", "server"}
+    assert plan_types(["pool"]) == {"pool", "member", "health_monitor", "listener"}
+    with pytest.raises(ValueError):
+        plan_types(["server", "dns_zone"])
+
+def test_type_selective_discovery_lists_only_what_is_needed():
+    resources = generate(ProjectSpec.scaled(200))
+    conn = FakeConnection(resources)
+    calls = []
+    for proxy in (conn.compute, conn.network, conn.block_storage, conn.load_balancer, conn.image):
+        listed = proxy._list
+        proxy._list = lambda key, parent=None, listed=listed: calls.append(key) or listed(key, parent)
+
+    graph = discover_graph("bench", conn=conn, use_cache=False, types=["server"])
+
+    assert set(calls) == {"servers", "flavors", "images", "volumes", "snapshots", "ports", "security_groups"}
+    assert {node.type for node in graph.nodes.values()} == {"server", "volume", "snapshot", "port", "security_group"}
+    server = graph.nodes[resources["servers"][0]["id"]]
+    # Flavor and image lookups are still listed to enrich servers
+    assert server.meta["flavor_name"] == "m1.size0" and server.meta["image_name"] == "image-0"
+    assert {edge.type for edge in graph.edges} == {"attached", "has_snapshot", "has_port", "has_sg"}
+
+def test_plan_tasks_without_types_keeps_every_task():
+    discoverer = type("Discoverer", (), {"__getattr__": lambda self, name: name})()
+    tasks = build_tasks(discoverer, discoverer, discoverer, discoverer, discoverer)
+    assert plan_tasks(tasks, None) == tasks
+    # Members can only be listed per pool
+    assert [t.name for t in plan_tasks(tasks, ["member"])] == ["pools", "members"]
@@ -0,0 +1,38 @@
+import copy
+import json
+from pathlib import Path
+
+from os_explorer.graph.builder import GraphBuilder
+from os_explorer.graph.projection import profile_fields, project
+from os_explorer.ui.tree import render_tree
+
+FIXTURE = Path(__file__).parent.parent / "fixtures" / "sample_graph.json"
+
+def test_minimal_profile_keeps_everything_the_tree_renders(capsys):
+    graph_json = json.loads(FIXTURE.read_text())
+    render_tree(graph_json)
+    full = capsys.readouterr().out
+
+    minimal = copy.deepcopy(graph_json)
+    for node in minimal["nodes"]:
+        node["meta"] = project(node.get("meta", {}), profile_fields("minimal", node["type"]))
+    render_tree(minimal)
+    assert capsys.readouterr().out == full
+
+def test_project_nested_and_relation_fields():
+    volume = {"id": "v1", "size": 10, "status": "in-use", "metadata": {"big": "x" * 100},
+              "attachments": [{"server_id": "s1", "device": "/dev/vdb", "attached_at": "t"}]}
+    assert project(volume, profile_fields("minimal", "volume")) == {
+        "size": 10, "status": "in-use", "attachments": [{"server_id": "s1", "device": "/dev/vdb"}]}
+
+def test_builder_applies_profile():
+    gb = GraphBuilder("p1", "proj1", meta_profile="minimal")
+    gb.add_resources("flavors", [{"id": "f1", "name": "small"}])
+    gb.add_resources("images", [])
+    gb.add_resources("servers", [{"id": "s1", "name": "web", "flavor": {"id": "f1"}, "status": "ACTIVE", "addresses": {"net": []}}])
+    gb.add_resources("ports", [{"id": "p1", "device_id": "s1", "mac_address": "fa:16", "binding:profile": {}}])
+    gb.link_resources()
+
+    assert gb.graph.nodes["s1"].meta == {"status": "ACTIVE", "flavor_name": "small", "image_name": "unknown"}
+    assert gb.graph.nodes["p1"].meta == {"mac_address": "fa:16", "device_id": "s1"}
+    assert [(e.from_node, e.to_node) for e in gb.graph.edges] == [("s1", "p1")]
@@ -0,0 +1,104 @@
+import logging
+from unittest.mock import MagicMock
+
+from os_explorer.cache import DiscoveryCache
+from os_explorer.discovery.executor import DiscoveryTask
+from os_explorer.discovery.image import ImageDiscovery
+from os_explorer.discovery.loadbalancer import LoadBalancerDiscovery
+from os_explorer.discovery.network import NetworkDiscovery
+from os_explorer.discovery.pushdown import IMAGE_ID_BATCH, DiscoveryQuery, ResourceFilter, image_ids, images_cache_key, status_keys
+
+logger = logging.getLogger("test")
+
+def test_fields_follow_meta_profile_and_api_names():
+    minimal = DiscoveryQuery("minimal")
+    fields = minimal.fields("ports")
+    # Foreign keys for edges, projected meta and node identity, under their API names
+    assert {"id", "name", "device_id", "security_groups", "fixed_ips", "mac_address"} <= set(fields)
+    assert "security_group_ids" not in fields
+    assert "loadbalancers" in minimal.fields("listeners")
+    assert "floating_ip_address" in minimal.fields("floating_ips")
+    # Nova has no field selection; full keeps whole resources
+    assert minimal.fields("servers") is None
+    assert DiscoveryQuery("full").fields("ports") is None
+    assert DiscoveryQuery().signature() == ""
+
+def test_filters_only_where_supported():
+    query = DiscoveryQuery(filter=ResourceFilter(name="web.1", status="ACTIVE", tags=("prod", "eu"), types=("server", "port", "subnet")))
+    assert query.filters("servers") == {"name": "^web\\.1$", "status": "ACTIVE", "tags": "prod,eu"}
+    assert query.filters("ports") == {"name": "web.1", "status": "ACTIVE", "tags": "prod,eu"}
+    # Subnets have no status; volumes are not among the filtered types
+    assert query.filters("subnets") == {"name": "web.1", "tags": "prod,eu"}
+    assert query.filters("volumes") == {}
+    assert query.signature() != DiscoveryQuery().signature()
+
+def test_discovery_pushes_fields_and_filters_into_list_calls():
+    conn = MagicMock()
+    query = DiscoveryQuery("minimal", ResourceFilter(tags=("prod",)))
+    list(NetworkDiscovery(conn, "p1", logger, query=query).list_ports())
+    kwargs = conn.network.ports.call_args.kwargs
+    assert (kwargs["project_id"], kwargs["tags"]) == ("p1", "prod")
+    assert "device_id" in kwargs["fields"]
+
+def test_load_balancers_with_fields_use_the_raw_api():
+    conn = MagicMock()
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"listeners": [{"id": "l1", "loadbalancers": [{"id": "lb1"}]}]}
+    conn.load_balancer.get.return_value = response
+    conn.load_balancer.get_endpoint.return_value = "http://octavia/v2"
+
+    listeners = list(LoadBalancerDiscovery(conn, "p1", logger, query=DiscoveryQuery("minimal")).list_listeners())
+
+    assert listeners == [{"id": "l1", "load_balancers": [{"id": "lb1"}]}]
+    path, = conn.load_balancer.get.call_args.args
+    assert path == "/lbaas/listeners"
+    assert "default_pool_id" in conn.load_balancer.get.call_args.kwargs["params"]["fields"]
+    conn.load_balancer.listeners.assert_not_called()
+
+def test_images_are_scoped_to_server_images():
+    conn = MagicMock()
+    conn.image.images.side_effect = lambda **query: [{"id": i} for i in query["id"][3:].split(",")]
+    servers = [{"id": f"s{i}", "image": {"id": f"img-{i:03d}"}} for i in range(IMAGE_ID_BATCH + 1)]
+    servers.append({"id": "boot-from-volume", "image": ""})
+
+    images = ImageDiscovery(conn, "p1", logger).list_images(servers)
+
+    assert len(images) == IMAGE_ID_BATCH + 1
+    assert conn.image.images.call_count == 2
+    assert conn.image.images.call_args_list[0].kwargs["id"].startswith("in:img-000,img-001")
+
+def test_cache_keeps_query_variants_apart(tmp_path):
+    default = DiscoveryCache("c", None, "p1", directory=tmp_path)
+    filtered = DiscoveryCache("c", None, "p1", directory=tmp_path, variant=DiscoveryQuery("minimal").signature())
+    default.put("ports", [{"id": "a"}])
+    assert filtered.get("ports") is None
+    assert default.get("ports") == [{"id": "a"}]
+
+def test_server_scoped_images_are_cached_per_image_set(tmp_path):
+    calls = []
+
+    def list_images(servers):
+        calls.append(image_ids(servers))
+        return [{"id": image_id} for image_id in image_ids(servers)]
+
+    task = DiscoveryTask("images", list_images, depends_on=("servers",), cache_key=images_cache_key)
+    cache = DiscoveryCache("c", None, "p1", directory=tmp_path, ttls={"images": 3600})
+    for servers in ([{"image": {"id": "img-a"}}], [{"image": {"id": "img-a"}}, {"image": {"id": "img-new"}}],
+                    [{"image": {"id": "img-a"}}]):
+        images = list(cache.wrap(task).func(servers))
+        assert images == [{"id": i} for i in image_ids(servers)]
+    # A server booted from a new image is not served the old image list
+    assert calls == [["img-a"], ["img-a", "img-new"]]
+    assert cache.ttl(images_cache_key([])) == 3600
+
+def test_status_without_filter_types_only_reaches_matching_services():
+    active = DiscoveryQuery(filter=ResourceFilter(status="ACTIVE"))
+    assert active.filters("servers") == {"status": "ACTIVE"} and active.filters("ports") == {"status": "ACTIVE"}
+    # Cinder statuses are "available"/"in-use": volumes and snapshots stay unfiltered
+    assert active.filters("volumes") == {} and active.filters("snapshots") == {}
+    in_use = DiscoveryQuery(filter=ResourceFilter(status="in-use"))
+    assert in_use.filters("volumes") == {"status": "in-use"} and in_use.filters("servers") == {}
+    # Named types are filtered as asked
+    explicit = DiscoveryQuery(filter=ResourceFilter(status="ACTIVE", types=("volume",)))
+    assert explicit.filters("volumes") == {"status": "ACTIVE"}
+    assert status_keys("bogus") == []
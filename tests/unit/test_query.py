@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from os_explorer.graph.index import GraphIndex
+from os_explorer.graph.model import Edge, Graph, Node
+from os_explorer.graph.query import impact, reachable, run_query, shortest_path
+
+FIXTURE = Path(__file__).parent.parent / "fixtures" / "sample_graph.json"
+
+@pytest.fixture
+def graph():
+    return GraphIndex.from_dict(json.loads(FIXTURE.read_text()))
+
+def test_reachable_with_depth_and_type_filters(graph):
+    assert reachable(graph, "server-1").node_ids == ["vol-3321", "port-ab12", "snap-1", "sg-1"]
+    assert reachable(graph, "server-1", depth=1).node_ids == ["vol-3321", "port-ab12"]
+    # Filtered nodes are still walked through
+    found = reachable(graph, "server-1", node_types=["security_group"])
+    assert found.node_ids == ["sg-1"] and found.depths == {"sg-1": 2}
+    assert reachable(graph, "lb-1", edge_types=["has_listener", "has_policy"]).node_ids == ["listener-1", "policy-1"]
+    with pytest.raises(KeyError):
+        reachable(graph, "missing")
+
+def test_impact_walks_edges_backwards(graph):
+    assert impact(graph, "sg-1", node_types=["server"]).node_ids == ["server-1"]
+    assert impact(graph, "rule-1").node_ids == ["policy-1", "listener-1", "lb-1"]
+    with pytest.raises(ValueError):
+        run_query(graph, "impact", "sg-1", direction="out")
+
+def test_shortest_path_on_graph_objects():
+    graph = Graph(project_id="p", project_name="p")
+    for node_id, node_type in (("fip", "floating_ip"), ("port", "port"), ("net", "network"), ("srv", "server")):
+        graph.add_node(Node(node_id, node_type, node_id, node_id))
+    graph.add_edge(Edge("fip", "port", "associated"))
+    graph.add_edge(Edge("port", "net", "on_network"))
+    graph.add_edge(Edge("srv", "port", "has_port"))
+    # Points at a resource that was not discovered
+    graph.add_edge(Edge("port", "sg-gone", "has_sg"))
+
+    path = shortest_path(graph, "fip", "srv")
+    assert path.node_ids == ["fip", "port", "srv"]
+    assert [edge.type for edge in path.edges] == ["associated", "has_port"]
+    assert shortest_path(graph, "fip", "srv", direction="out") is None
+    # The server behind a floating IP, though has_port points server -> port
+    found = reachable(graph, "fip")
+    assert found.node_ids == ["port", "net", "srv"] and found.depths["srv"] == 2
+    assert [edge.type for edge in found.edges] == ["associated", "on_network", "has_port"]
+    assert impact(graph, "port").node_ids == ["fip", "srv"]
+    assert run_query(graph, "path", "net", "net").node_ids == ["net"]
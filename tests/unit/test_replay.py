@@ -0,0 +1,80 @@
+import json
+
+import pytest
+import requests
+
+from benchmarks import replay
+
+ORIGIN = "https://cloud.example:5000"
+
+def _entry(method, path, body, query="", status=200, headers=None):
+    return {"method": method, "origin": 0, "path": path, "query": query, "status": status,
+            "headers": headers or {"Content-Type": "application/json"}, "body": json.dumps(body)}
+
+def _endpoint(service_type, path):
+    return {"type": service_type, "endpoints": [{"interface": "public", "region": "RegionOne", "region_id": "RegionOne", "url": ORIGIN + path, "id": service_type}]}
+
+def _recording():
+    version = {"version": {"id": "v3.14", "status": "stable", "links": [{"rel": "self", "href": ORIGIN + "/v3/"}]}}
+    token = {"token": {
+        "expires_at": "2020-01-01T00:00:00.000000Z", "issued_at": "2020-01-01T00:00:00.000000Z", "methods": ["password"],
+        "user": {"id": "u1", "name": "replay", "domain": {"id": "default", "name": "Default"}},
+        "project": {"id": "p1", "name": "demo", "domain": {"id": "default", "name": "Default"}},
+        "catalog": [_endpoint("identity", ""), _endpoint("compute", "/compute/v2.1"), _endpoint("network", "/network")],
+    }}
+    ports = [{"id": f"port{i}", "device_id": "s1", "network_id": "n1", "fixed_ips": []} for i in range(5)]
+    return {"version": replay.RECORDING_VERSION, "origins": [ORIGIN], "entries": [
+        _entry("GET", "/v3", version),
+        _entry("POST", "/v3/auth/tokens", token, status=201, headers={"X-Subject-Token": replay.REPLAY_TOKEN}),
+        _entry("GET", "/network/v2.0/ports", {"ports": ports[:3], "ports_links": [
+            {"rel": "next", "href": ORIGIN + "/network/v2.0/ports?project_id=p1&marker=port2"}]}, "project_id=p1"),
+        _entry("GET", "/network/v2.0/ports", {"ports": ports[3:]}, "marker=port2&project_id=p1"),
+        _entry("GET", "/network/v2.0/networks", {"networks": [{"id": "n1", "name": "net"}]}, "project_id=p1"),
+        _entry("GET", "/compute/v2.1/servers/detail", {"servers": [{"id": "s1", "name": "vm"}]}, "project_id=p1"),
+    ]}
+
+def test_replay_rewrites_catalog_and_extends_token():
+    with replay.ReplayServer(_recording()) as server:
+        response = requests.post(server.auth_url() + "/auth/tokens", json={})
+    token = response.json()["token"]
+    assert response.headers[replay.TOKEN_HEADER] == replay.REPLAY_TOKEN
+    assert token["catalog"][1]["endpoints"][0]["url"] == f"{server.url}/0/compute/v2.1"
+    assert token["expires_at"] > "2025"
+
+def test_replay_repaginates_recorded_pages():
+    with replay.ReplayServer(_recording(), page_size=2) as server:
+        url, ids = f"{server.url}/0/network/v2.0/ports?project_id=p1", []
+        while url:
+            body = requests.get(url).json()
+            ids += [port["id"] for port in body["ports"]]
+            url = next((link["href"] for link in body.get("ports_links", []) if link["rel"] == "next"), None)
+        assert server.requests == 3
+    assert ids == [f"port{i}" for i in range(5)]
+
+def test_replay_injects_errors_but_not_into_authentication():
+    with replay.ReplayServer(_recording(), error_rate=1.0, error_codes=[429]) as server:
+        assert requests.post(server.auth_url() + "/auth/tokens", json={}).status_code == 201
+        response = requests.get(f"{server.url}/0/network/v2.0/networks?project_id=p1")
+        assert (response.status_code, response.headers["Retry-After"]) == (429, "1")
+        assert server.errors == 1
+
+def test_recorder_round_trip(tmp_path):
+    recorder = replay.Recorder()
+    with replay.ReplayServer(_recording()) as server:
+        session = requests.Session()
+        session.hooks["response"].append(recorder)
+        session.get(f"{server.url}/0/compute/v2.1/servers/detail?project_id=p1")
+    recorder.save(tmp_path / "recording.json.gz")
+
+    recording = replay.load_recording(tmp_path / "recording.json.gz")
+    assert recording["origins"] == [server.url]
+    assert json.loads(recording["entries"][0]["body"])["servers"][0]["id"] == "s1"
+
+@pytest.mark.parametrize("backend", ["sdk", "async"])
+def test_benchmark_discovers_through_replay(backend):
+    if backend == "async":
+        pytest.importorskip("httpx")
+    results = replay.benchmark(_recording(), backends=[backend], page_size=2)
+    # The server, the network and all five ports across three pages
+    assert results[backend]["nodes"] == 7
+    assert results[backend]["requests"] >= 5
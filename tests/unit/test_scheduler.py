@@ -0,0 +1,115 @@
+import logging
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from os_explorer.discovery.executor import DiscoveryExecutor, DiscoveryTask
+from os_explorer.discovery.network import NetworkDiscovery
+from os_explorer.discovery.scheduler import AimdLimit, Scheduler, retry_after
+from os_explorer.graph.builder import GraphBuilder
+
+logger = logging.getLogger(__name__)
+
+class HttpError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock(status_code=status_code, headers=headers or {})
+
+def test_aimd_limit_halves_on_throttle_and_grows_back():
+    limit = AimdLimit(8, latency_target=1.0)
+    limit.on_throttle()
+    assert limit.limit == 4
+    # Throttles seen by calls in flight at the same time count once
+    limit.on_throttle()
+    assert limit.limit == 4
+
+    for _ in range(4):
+        limit.on_success(0.1)
+    assert 4.9 < limit.limit < 5
+    limit._last_decrease = float("-inf")
+    limit.on_success(2.5)
+    assert limit.limit < 2.5
+
+def test_call_retries_throttled_calls_honouring_retry_after():
+    sleeps = []
+    scheduler = Scheduler(concurrency=2, attempts=3, backoff=0.01, sleep=sleeps.append)
+    responses = [HttpError(429, {"Retry-After": "3"}), HttpError(503), ["port1"]]
+
+    def list_ports():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert scheduler.call("network", list_ports) == ["port1"]
+    assert sleeps[0] == 3.0 and sleeps[1] <= 0.02
+    assert scheduler.retries == 2
+    assert scheduler.limits["network"].throttled == 2
+
+    with pytest.raises(HttpError):
+        scheduler.call("network", lambda: (_ for _ in ()).throw(HttpError(404)))
+    assert scheduler.retries == 2
+    assert retry_after(HttpError(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+
+def test_streamed_listing_resumes_without_duplicates_and_failures_mark_nodes_partial():
+    conn = MagicMock()
+    attempts = []
+
+    def ports(**query):
+        attempts.append(query)
+        yield {"id": "port1", "device_id": "s1"}
+        if len(attempts) == 1:
+            raise HttpError(503)
+        yield {"id": "port2", "device_id": "s1"}
+
+    def security_groups(**query):
+        raise HttpError(503)
+        yield
+
+    conn.network.ports.side_effect = ports
+    conn.network.ports.__name__ = "ports"
+    conn.network.security_groups.side_effect = security_groups
+    conn.network.security_groups.__name__ = "security_groups"
+    network = NetworkDiscovery(conn, "p1", logger, scheduler=Scheduler(attempts=2, sleep=lambda _: None))
+
+    executor = DiscoveryExecutor()
+    tasks = [DiscoveryTask("ports", network.list_ports), DiscoveryTask("security_groups", network.list_security_groups),
+             DiscoveryTask("servers", lambda: [{"id": "s1", "name": "web"}, {"id": "s2", "name": "db"}])]
+    results = {}
+    for name, chunk, _ in executor.stream(tasks):
+        results.setdefault(name, []).extend(chunk)
+
+    assert [p["id"] for p in results["ports"]] == ["port1", "port2"]
+    assert results["security_groups"] == []
+    assert executor.incomplete == {"security_groups": [None]}
+
+    builder = GraphBuilder("p1", "proj1")
+    for key, items in results.items():
+        builder.add_resources(key, items)
+    builder.link_resources()
+    marked = builder.mark_partial("security_groups", executor.incomplete["security_groups"])
+    # Ports may miss their security group edges; servers are unaffected
+    assert sorted(n.id for n in marked) == ["port1", "port2"]
+    assert not builder.graph.nodes["s1"].partial
+
+def test_stream_finishes_when_a_dependent_task_escapes_the_error_guard():
+    class Aborted(BaseException):
+        pass
+
+    def abort(servers):
+        raise Aborted()
+
+    executor = DiscoveryExecutor()
+    tasks = [DiscoveryTask("servers", lambda: [{"id": "s1"}]), DiscoveryTask("ports", abort, depends_on=("servers",)),
+             DiscoveryTask("volumes", lambda: [{"id": "v1"}])]
+    events = []
+    # Run aside: a lost end-of-task event would block the consumer forever
+    consumer = threading.Thread(target=lambda: events.extend(executor.stream(tasks)), daemon=True)
+    consumer.start()
+    consumer.join(timeout=5)
+
+    assert not consumer.is_alive()
+    assert sorted((name, done) for name, _, done in events if done) == [("ports", True), ("servers", True), ("volumes", True)]
+    assert executor.incomplete == {"ports": [None]}
@@ -0,0 +1,46 @@
+import gzip
+import json
+
+import pytest
+
+from os_explorer.graph.model import Edge, Graph, Node
+from os_explorer.graph.serialize import read_graph, write_graph
+
+class FakeResource(dict):
+    """Stands in for an SDK resource: a dict subclass converted via to_dict()."""
+    def to_dict(self):
+        return {"id": "v1", "size": 20}
+
+def _graph():
+    g = Graph(project_id="p1", project_name="proj1", generated_at="2024-01-01T00:00:00")
+    g.add_node(Node(id="s1", type="server", name="web", label="web", meta={"tags": {"a"}}))
+    g.add_node(Node(id="v1", type="volume", name="data", label="data", meta=FakeResource()))
+    g.add_edge(Edge(from_node="s1", to_node="v1", type="attached", meta={"device": "/dev/vdb"}))
+    return g
+
+@pytest.mark.parametrize("name", ["graph.json", "graph.ndjson", "graph.json.gz", "graph.ndjson.gz"])
+def test_write_and_read_graph_roundtrip(tmp_path, name):
+    path = tmp_path / name
+    write_graph(_graph(), path)
+
+    graph = read_graph(path)
+    assert graph["project_id"] == "p1"
+    assert graph["generated_at"] == "2024-01-01T00:00:00"
+    assert [n["id"] for n in graph["nodes"]] == ["s1", "v1"]
+    assert graph["nodes"][1]["meta"] == {"id": "v1", "size": 20}
+    assert graph["nodes"][0]["meta"] == {"tags": ["a"]}
+    assert graph["edges"] == [{"from": "s1", "to": "v1", "type": "attached", "meta": {"device": "/dev/vdb"}}]
+
+def test_json_output_is_a_regular_document(tmp_path):
+    path = tmp_path / "graph.json.gz"
+    write_graph(_graph(), path)
+    with gzip.open(path, "rt") as f:
+        assert json.load(f)["nodes"][0]["id"] == "s1"
+
+def test_read_graph_accepts_plain_json_dump(tmp_path):
+    path = tmp_path / "graph.json"
+    for indent in (2, None):
+        path.write_text(json.dumps(_graph().to_dict(), indent=indent, default=str))
+        graph = read_graph(path)
+        assert [e["type"] for e in graph["edges"]] == ["attached"]
+        assert graph["project_name"] == "proj1"
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from os_explorer.graph.builder import GraphBuilder
+from os_explorer.graph.serialize import read_graph
+from os_explorer.graph.snapshot import Snapshot, write_snapshot
+from os_explorer.sharding import Shard, merge_graphs, plan_shards, run_shards, shard_path
+
+def fake_discover(cloud, region, config_file, project_id, **options):
+    if project_id == "broken":
+        raise RuntimeError("401 Unauthorized")
+    gb = GraphBuilder(project_id, f"name-{project_id}")
+    gb.add_resources("flavors", [])
+    gb.add_resources("images", [])
+    gb.add_resources("networks", [{"id": "public", "name": "public"}])
+    gb.add_resources("subnets", [{"id": f"subnet-{project_id}", "network_id": "public"}])
+    gb.add_resources("servers", [{"id": "srv-1", "name": f"web-{region}"}])
+    gb.link_resources()
+    return gb.graph
+
+def _merged(shards):
+    return merge_graphs((r.shard, r.graph) for r in run_shards(fake_discover, "c1", None, shards, {}, processes=1))
+
+def test_merge_shares_resources_and_separates_regions():
+    graph = _merged(plan_shards(["r1", "r2"], ["p1", "p2"]))
+
+    # "public" is shared within a region; srv-1 is a different server per region
+    assert sorted(graph.nodes) == ["public", "r2/public", "r2/srv-1", "r2/subnet-p1", "r2/subnet-p2", "srv-1", "subnet-p1", "subnet-p2"]
+    assert graph.nodes["r2/srv-1"].name == "web-r2"
+    assert (graph.nodes["subnet-p2"].region, graph.nodes["subnet-p2"].project_id) == ("r1", "p2")
+    assert graph.neighbor_ids("r2/public", "has_subnet") == ["r2/subnet-p1", "r2/subnet-p2"]
+    assert graph.project_id is None
+
+def test_merged_scope_survives_serialization(tmp_path):
+    graph = _merged(plan_shards(["r1", "r2"], ["p1"]))
+    path = tmp_path / "graph.snap"
+    write_snapshot(graph, path)
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.get_node("r2/public")["region"] == "r2"
+        assert snapshot.get_node("subnet-p1")["project_id"] == "p1"
+
+def test_split_writes_one_file_per_shard_and_reports_failures(tmp_path):
+    out = tmp_path / "graph.json.gz"
+    results = list(run_shards(fake_discover, "c1", None, plan_shards(["r1"], ["p1", "broken"]), {}, processes=1, out=out))
+
+    assert shard_path(out, Shard("r1", "p1")) == Path(tmp_path / "graph.r1.p1.json.gz")
+    assert read_graph(results[0].path)["project_id"] == "p1"
+    assert results[1].error == "401 Unauthorized" and results[1].path is None
+
+def test_process_pool_runs_shards():
+    results = list(run_shards(fake_discover, "c1", None, plan_shards(["r1", "r2"], ["p1"]), {}, processes=2))
+    assert sorted((r.shard.region, r.nodes) for r in results) == [("r1", 3), ("r2", 3)]
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+import os
+
+from os_explorer.graph.index import GraphIndex
+from os_explorer.graph.model import Graph
+from os_explorer.graph.serialize import read_graph, write_graph
+from os_explorer.graph.snapshot import Snapshot, is_snapshot, write_snapshot
+
+FIXTURE = Path(__file__).parent.parent / "fixtures" / "sample_graph.json"
+
+def _by_id(items):
+    return {item["id"]: item for item in items}
+
+def test_snapshot_roundtrip_and_queries(tmp_path):
+    graph_json = json.loads(FIXTURE.read_text())
+    path = tmp_path / "graph.snap"
+    write_snapshot(graph_json, path)
+    assert is_snapshot(path)
+
+    index = GraphIndex.from_dict(graph_json)
+    with Snapshot(path) as snapshot:
+        assert snapshot.project_name == graph_json["project_name"]
+        assert len(snapshot) == len(graph_json["nodes"])
+        for node in graph_json["nodes"]:
+            decoded = snapshot.get_node(node["id"])
+            assert {k: decoded[k] for k in node} == node
+            assert snapshot.neighbor_ids(node["id"]) == index.neighbor_ids(node["id"])
+            assert snapshot.neighbor_ids(node["id"], direction="in") == index.neighbor_ids(node["id"], direction="in")
+        for node_type in index.index.types():
+            assert [n["id"] for n in snapshot.nodes_of_type(node_type)] == index.index.node_ids(node_type)
+        assert snapshot.get_node("missing") is None
+        assert [(e["from"], e["to"], e["type"]) for e in snapshot.edges] == [(e["from"], e["to"], e["type"]) for e in graph_json["edges"]]
+
+def test_write_graph_dispatches_snapshots_by_suffix(tmp_path):
+    graph_json = json.loads(FIXTURE.read_text())
+    path = tmp_path / "graph.snap"
+    write_graph(Graph.from_dict(graph_json), path)
+    assert is_snapshot(path)
+    loaded = read_graph(path)
+    assert _by_id(loaded["nodes"]).keys() == _by_id(graph_json["nodes"]).keys()
+    assert loaded["generated_at"] == graph_json["generated_at"]
+
+def test_mock_graph_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    from os_explorer.web import api
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api, "_mock_graph", {})
+    monkeypatch.setattr(api, "_retired_snapshots", [])
+    assert api.load_mock_graph() is None
+
+    graph_json = json.loads(FIXTURE.read_text())
+    write_snapshot(graph_json, "graph.snap")
+    first = api.load_mock_graph()
+    assert api.load_mock_graph() is first
+
+    graph_json["project_name"] = "renamed"
+    write_snapshot(graph_json, "graph.snap")
+    os.utime("graph.snap", ns=(0, 1))
+    assert api.load_mock_graph().project_name == "renamed"
+    # Replaced, not overwritten: the first mapping stays readable
+    assert first.get_node("server-1")["name"] == _by_id(graph_json["nodes"])["server-1"]["name"]
+
+def test_decoded_nodes_and_edges_are_bounded(tmp_path):
+    graph_json = json.loads(FIXTURE.read_text())
+    path = tmp_path / "graph.snap"
+    write_snapshot(graph_json, path)
+
+    with Snapshot(path, decoded_limit=3) as snapshot:
+        first = snapshot.get_node("server-1")
+        assert snapshot.get_node("server-1") is first
+        all_nodes = list(snapshot.nodes)
+        all_edges = list(snapshot.edges)
+        assert len(snapshot._decoded) == 3 and len(snapshot._decoded_edges) == 3
+        # Evicted entries are decoded again, equal but not the same object
+        assert snapshot.get_node("server-1") == first and snapshot.get_node("server-1") is not first
+        assert len(all_nodes) == len(graph_json["nodes"]) and len(all_edges) == len(graph_json["edges"])
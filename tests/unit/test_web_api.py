@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+from os_explorer import runner
+from os_explorer.discovery import aio
+from os_explorer.graph.builder import GraphBuilder
+from os_explorer.graph.snapshot import Snapshot, write_snapshot
+from os_explorer.web import api
+from os_explorer.web.main import app
+from os_explorer.web.store import GraphStore
+
+FIXTURE = Path(__file__).parent.parent / "fixtures" / "sample_graph.json"
+MOCK = {"cloud": "Mock Cloud"}
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    shutil.copy(FIXTURE, tmp_path / "graph.json")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api, "_mock_graph", {})
+    monkeypatch.setattr(api, "_retired_snapshots", [])
+    monkeypatch.setattr(api, "store", GraphStore(discover=api.discover))
+    return TestClient(app)
+
+def test_nodes_are_paged_with_cursors(client):
+    graph_json = json.loads(FIXTURE.read_text())
+    seen = []
+    params = dict(MOCK, limit=4, fields="id")
+    while True:
+        page = client.get("/api/nodes", params=params).json()
+        assert all(item.keys() == {"id"} for item in page["items"])
+        seen.extend(item["id"] for item in page["items"])
+        if not page["next_cursor"]:
+            break
+        params["cursor"] = page["next_cursor"]
+    assert seen == [n["id"] for n in graph_json["nodes"]]
+
+def test_nodes_filter_by_type_and_query(client):
+    page = client.get("/api/nodes", params=dict(MOCK, type="server", q="DB", fields="id,name,meta.status")).json()
+    assert page["items"] == [{"id": "server-2", "name": "db-01", "meta": {"status": "ACTIVE"}}]
+    assert client.get("/api/nodes", params=dict(MOCK, cursor="garbage")).status_code == 400
+
+def test_node_and_neighbors(client):
+    assert client.get("/api/nodes/server-1", params=dict(MOCK, fields="type")).json() == {"type": "server"}
+    assert client.get("/api/nodes/nope", params=MOCK).status_code == 404
+
+    one_hop = client.get("/api/nodes/server-1/neighbors", params=dict(MOCK, fields="id")).json()
+    assert {n["id"] for n in one_hop["nodes"]} == {"vol-3321", "port-ab12"}
+    two_hops = client.get("/api/nodes/server-1/neighbors", params=dict(MOCK, depth=2, direction="out", fields="id")).json()
+    assert {n["id"] for n in two_hops["nodes"]} == {"vol-3321", "port-ab12", "snap-1", "sg-1"}
+    assert all(e["from"] != "server-2" for e in two_hops["edges"])
+
+def _events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_stream_replays_mock_graph(client):
+    graph_json = json.loads(FIXTURE.read_text())
+    events = _events(client.get("/api/graph/stream", params=MOCK))
+
+    assert events[0][0] == "start" and events[-1] == ("done", {"generated_at": graph_json["generated_at"], "nodes": len(graph_json["nodes"]), "edges": len(graph_json["edges"])})
+    batches = [data for event, data in events if event == "batch"]
+    assert sorted(n["id"] for b in batches for n in b["nodes"]) == sorted(n["id"] for n in graph_json["nodes"])
+    assert sum(len(b["edges"]) for b in batches) == len(graph_json["edges"])
+
+def test_stream_sends_batches_as_discovery_progresses(client, monkeypatch):
+    def fake_discover(cloud, on_batch=None, **options):
+        builder = GraphBuilder("p1", "proj1")
+        results = [("networks", [{"id": "net-1", "name": "private"}]), ("subnets", [{"id": "sub-1", "network_id": "net-1"}])]
+        for done, (name, items) in enumerate(results, 1):
+            runner._add_batch(builder, name, items, done, len(results), on_batch)
+        runner._link_rest(builder, len(results), on_batch)
+        return builder.graph
+
+    monkeypatch.setattr(aio, "is_available", lambda: False)
+    monkeypatch.setattr(runner, "discover_graph", fake_discover)
+    events = _events(client.get("/api/graph/stream", params={"cloud": "c1"}))
+
+    assert [event for event, _ in events] == ["start", "progress", "batch", "progress", "batch", "done"]
+    assert events[2][1]["nodes"][0]["id"] == "net-1"
+    # The subnet -> network edge is sent as soon as both types are complete
+    assert events[4][1]["edges"] == [{"from": "net-1", "to": "sub-1", "type": "has_subnet", "meta": {}}]
+    assert events[3][1] == {"resource": "subnets", "count": 1, "done": 2, "total": 2}
+    # The streamed graph is shared with the other endpoints
+    assert client.get("/api/nodes/sub-1", params={"cloud": "c1", "fields": "type"}).json() == {"type": "subnet"}
+
+def test_metrics_endpoint(client):
+    client.get("/api/graph", params=MOCK)
+    text = client.get("/metrics").text
+    assert 'os_explorer_stage_duration_seconds_count{stage="serialize"}' in text
+    assert "# TYPE os_explorer_connection_pool_connections gauge" in text
+
+def test_query_endpoint(client):
+    impact = client.get("/api/query", params=dict(MOCK, kind="impact", types="server", fields="id", **{"from": "sg-1"})).json()
+    assert impact["nodes"] == [{"id": "server-1", "depth": 2}]
+    path = client.get("/api/query", params=dict(MOCK, kind="path", **{"from": "snap-1", "to": "sg-1"})).json()
+    assert [n["id"] for n in path["nodes"]] == ["snap-1", "vol-3321", "server-1", "port-ab12", "sg-1"]
+    assert client.get("/api/query", params=dict(MOCK, kind="path", **{"from": "snap-1", "to": "lb-1"})).status_code == 404
+    assert client.get("/api/query", params=dict(MOCK, kind="nearest", **{"from": "snap-1"})).status_code == 400
+
+def test_concurrent_streams_share_one_discovery(client, monkeypatch):
+    calls = []
+
+    async def fake_discover(cloud, on_batch=None, **options):
+        calls.append(cloud)
+        await asyncio.sleep(0.01)
+        builder = GraphBuilder("p1", "proj1")
+        runner._add_batch(builder, "networks", [{"id": "net-1", "name": "private"}], 1, 1, on_batch)
+        runner._link_rest(builder, 1, on_batch)
+        return builder.graph
+
+    async def collect(stream):
+        return [chunk async for chunk in stream]
+
+    async def main():
+        key = ("c1", None, None, "full")
+        streams = [api._stream_discovery(key, None, False) for _ in range(3)]
+        results = await asyncio.gather(*(collect(s) for s in streams))
+        assert api.store.get(key).index.get_node("net-1")["name"] == "private"
+        return results
+
+    monkeypatch.setattr(aio, "is_available", lambda: True)
+    monkeypatch.setattr(runner, "discover_graph_async", fake_discover)
+    results = asyncio.run(main())
+
+    # The first stream discovers; the others wait for it and replay the graph
+    assert calls == ["c1"]
+    for chunks in results:
+        assert chunks[-1].startswith(b"event: done") and any(b'"net-1"' in chunk for chunk in chunks)
+
+def test_mock_snapshot_is_served_without_decoding_it(client):
+    graph_json = json.loads(FIXTURE.read_text())
+    write_snapshot(graph_json, "graph.snap")
+
+    page = client.get("/api/nodes", params=dict(MOCK, limit=1000, fields="id")).json()
+    assert sorted(item["id"] for item in page["items"]) == sorted(n["id"] for n in graph_json["nodes"])
+    assert client.get("/api/nodes", params=dict(MOCK, type="server", q="DB", fields="id")).json()["items"] == [{"id": "server-2"}]
+    two_hops = client.get("/api/nodes/server-1/neighbors", params=dict(MOCK, depth=2, direction="out", fields="id")).json()
+    assert {n["id"] for n in two_hops["nodes"]} == {"vol-3321", "port-ab12", "snap-1", "sg-1"}
+    assert len(two_hops["edges"]) == len({(e["from"], e["to"], e["type"]) for e in two_hops["edges"]})
+    path = client.get("/api/query", params=dict(MOCK, kind="path", **{"from": "snap-1", "to": "sg-1"})).json()
+    assert [n["id"] for n in path["nodes"]] == ["snap-1", "vol-3321", "server-1", "port-ab12", "sg-1"]
+
+    view = api.store.get(("Mock Cloud", None, None, "full"))
+    assert isinstance(view.index, Snapshot) and view._graph_json is None
+    edges = client.get("/api/graph", params=MOCK).json()["edges"]
+    assert [(e["from"], e["to"], e["type"]) for e in edges] == [(e["from"], e["to"], e["type"]) for e in graph_json["edges"]]
+
+def test_replaced_mock_snapshot_is_closed_once_no_longer_served(client):
+    graph_json = json.loads(FIXTURE.read_text())
+    write_snapshot(graph_json, "graph.snap")
+    client.get("/api/nodes", params=dict(MOCK, fields="id"))
+    other_profile = dict(MOCK, meta_profile="minimal", fields="id")
+    client.get("/api/nodes", params=other_profile)
+    first = api.load_mock_graph()
+
+    graph_json["project_name"] = "renamed"
+    write_snapshot(graph_json, "graph.snap")
+    os.utime("graph.snap", ns=(0, 1))
+    assert client.get("/api/nodes/server-1", params=dict(MOCK, fields="id")).json() == {"id": "server-1"}
+    # Still served for the other meta profile
+    assert not first._mmap.closed
+    client.get("/api/nodes", params=other_profile)
+    assert first._mmap.closed and api._retired_snapshots == []
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { Cloud, RefreshCw, AlertCircle } from 'lucide-react';
 import ResourceTree from './components/ResourceTree';
@@ -9,13 +9,18 @@ const API_BASE = 'http://localhost:8000/api';
 function App() {
   const [clouds, setClouds] = useState([]);
   const [selectedCloud, setSelectedCloud] = useState('');
-  const [graph, setGraph] = useState(null);
+  // Node count per type from the stream; the tree and relations query the API
+  const [types, setTypes] = useState(null);
+  const [version, setVersion] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [selectedNode, setSelectedNode] = useState(null);
+  const [progress, setProgress] = useState(null);
+  const streamRef = useRef(null);
 
   useEffect(() => {
     fetchClouds();
+    return () => streamRef.current?.close();
   }, []);
 
   const fetchClouds = async () => {
@@ -31,21 +36,48 @@ function App() {
     }
   };
 
-  const fetchGraph = async () => {
+  // Streams discovery: type counts grow as each call finishes, and once it is
+  // done the components page through the stored graph
+  const fetchGraph = () => {
     if (!selectedCloud) return;
+    streamRef.current?.close();
     setLoading(true);
     setError(null);
-    try {
-      const res = await axios.get(`${API_BASE}/graph`, {
-        params: { cloud: selectedCloud }
+    setProgress(null);
+    setTypes({});
+    setVersion(null);
+    setSelectedNode(null);
+
+    const params = new URLSearchParams({ cloud: selectedCloud });
+    const source = new EventSource(`${API_BASE}/graph/stream?${params}`);
+    streamRef.current = source;
+    const finish = () => {
+      source.close();
+      setLoading(false);
+      setProgress(null);
+    };
+
+    source.addEventListener('progress', (e) => setProgress(JSON.parse(e.data)));
+    source.addEventListener('batch', (e) => {
+      const batch = JSON.parse(e.data);
+      setTypes(prev => {
+        const next = { ...prev };
+        batch.nodes.forEach(n => { next[n.type] = (next[n.type] || 0) + 1; });
+        return next;
       });
-      setGraph(res.data);
-    } catch (err) {
-      console.error(err);
+    });
+    source.addEventListener('done', (e) => {
+      const { generated_at } = JSON.parse(e.data);
+      // Any token that changes per discovery; a mock graph may have no timestamp
+      setVersion(generated_at || Date.now());
+      finish();
+    });
+    // Both "error" events sent by the server and connection failures
+    source.addEventListener('error', (e) => {
+      console.error(e.data || e);
       setError(`Failed to load resources for ${selectedCloud}`);
-    } finally {
-      setLoading(false);
-    }
+      finish();
+    });
   };
 
   useEffect(() => {
@@ -88,6 +120,12 @@ function App() {
           </div>
         </div>
 
+        {progress && (
+          <div className="px-4 py-2 text-xs text-gray-500 border-b border-gray-200">
+            Discovering {progress.resource}... ({progress.done}/{progress.total})
+          </div>
+        )}
+
         <div className="flex-1 overflow-y-auto">
           {error ? (
             <div className="p-4 text-red-600 text-sm flex items-start bg-red-50 m-4 rounded-md">
@@ -96,7 +134,10 @@ function App() {
             </div>
           ) : (
             <ResourceTree 
-              graph={graph} 
+              apiBase={API_BASE}
+              cloud={selectedCloud}
+              types={types}
+              version={version}
               onSelect={setSelectedNode} 
               selectedId={selectedNode?.id}
             />
@@ -108,8 +149,9 @@ function App() {
       <div className="flex-1 flex flex-col min-w-0 bg-gray-50 relative overflow-y-auto">
         {selectedNode ? (
           <ResourceRelations 
+            apiBase={API_BASE}
+            cloud={selectedCloud}
             node={selectedNode} 
-            graph={graph} 
           />
         ) : (
           <div className="flex items-center justify-center h-full text-gray-400 flex-col">
@@ -1,4 +1,5 @@
-import React, { useMemo, useState } from 'react';
+import React, { useEffect, useState } from 'react';
+import axios from 'axios';
 import { HardDrive, Network, Shield, Globe, Server, Box, ChevronDown, ChevronRight } from 'lucide-react';
 
 const RelationCard = ({ title, icon: Icon, children }) => (
@@ -89,61 +90,66 @@ const SecurityGroupRules = ({ node }) => {
   );
 };
 
-const ResourceRelations = ({ node, graph }) => {
-  const relations = useMemo(() => {
-    if (!node || !graph) return null;
+// Past this many ports (e.g. on a network) only the ports themselves are listed
+const PORT_DETAIL_LIMIT = 25;
 
-    const result = {
-      volumes: [],
-      ports: [],
-      others: []
+const neighborsOf = (nodeId, { nodes, edges }) => {
+  const byId = new Map(nodes.map(n => [n.id, n]));
+  const found = new Map();
+  edges.forEach(e => {
+    const otherId = e.from === nodeId ? e.to : e.to === nodeId ? e.from : null;
+    if (otherId && byId.has(otherId)) found.set(otherId, byId.get(otherId));
+  });
+  return [...found.values()];
+};
+
+// Loads the selected node's neighbours, and its ports' neighbours, from /neighbors
+const ResourceRelations = ({ apiBase, cloud, node }) => {
+  const [relations, setRelations] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    if (!node) return undefined;
+    let cancelled = false;
+    const neighbors = async (nodeId) => {
+      const res = await axios.get(`${apiBase}/nodes/${encodeURIComponent(nodeId)}/neighbors`, { params: { cloud } });
+      return neighborsOf(nodeId, res.data);
     };
 
-    // Find direct neighbors
-    const directNeighbors = [];
-    graph.edges.forEach(e => {
-      if (e.from === node.id) directNeighbors.push({ id: e.to, type: e.type });
-      else if (e.to === node.id) directNeighbors.push({ id: e.from, type: e.type });
-    });
-
-    directNeighbors.forEach(neighbor => {
-      const neighborNode = graph.nodes.find(n => n.id === neighbor.id);
-      if (!neighborNode) return;
-
-      if (neighborNode.type === 'volume') {
-        result.volumes.push(neighborNode);
-      } else if (neighborNode.type === 'port') {
-        // Find things attached to this port (SGs, IPs)
-        const portRelations = {
-          node: neighborNode,
-          securityGroups: [],
-          ips: []
-        };
-        
-        graph.edges.forEach(e => {
-            let subNeighborId = null;
-            if (e.from === neighborNode.id && e.to !== node.id) subNeighborId = e.to;
-            else if (e.to === neighborNode.id && e.from !== node.id) subNeighborId = e.from;
-            
-            if (subNeighborId) {
-                const subNode = graph.nodes.find(n => n.id === subNeighborId);
-                if (subNode) {
-                    if (subNode.type === 'security_group') {
-                        portRelations.securityGroups.push(subNode);
-                    } else if (subNode.type === 'floating_ip') {
-                        portRelations.ips.push(subNode);
-                    }
-                }
-            }
+    const load = async () => {
+      setRelations(null);
+      setError(null);
+      try {
+        const direct = await neighbors(node.id);
+        const result = { volumes: [], ports: [], others: [] };
+        const ports = direct.filter(n => n.type === 'port');
+        const portNeighbors = ports.length <= PORT_DETAIL_LIMIT
+          ? await Promise.all(ports.map(port => neighbors(port.id)))
+          : ports.map(() => []);
+
+        direct.forEach(neighborNode => {
+          if (neighborNode.type === 'volume') result.volumes.push(neighborNode);
+          else if (neighborNode.type !== 'port') result.others.push(neighborNode);
+        });
+        ports.forEach((port, idx) => {
+          // Things attached to this port (SGs, IPs)
+          const attached = portNeighbors[idx].filter(n => n.id !== node.id);
+          result.ports.push({
+            node: port,
+            securityGroups: attached.filter(n => n.type === 'security_group'),
+            ips: attached.filter(n => n.type === 'floating_ip')
+          });
         });
-        result.ports.push(portRelations);
-      } else {
-        result.others.push(neighborNode);
+        if (!cancelled) setRelations(result);
+      } catch (err) {
+        console.error(err);
+        if (!cancelled) setError(`Failed to load relations of ${node.label || node.id}`);
       }
-    });
+    };
 
-    return result;
-  }, [node, graph]);
+    load();
+    return () => { cancelled = true; };
+  }, [apiBase, cloud, node]);
 
   if (!node) return null;
 
@@ -157,6 +163,16 @@ const ResourceRelations = ({ node, graph }) => {
         <p className="text-gray-500 font-mono text-sm mt-1">{node.id}</p>
       </div>
 
+      {error && (
+        <div className="p-4 text-red-600 text-sm bg-red-50 rounded-md">{error}</div>
+      )}
+
+      {!relations && !error && (
+        <div className="text-center py-8 text-gray-500">Loading relations...</div>
+      )}
+
+      {relations && (<>
+
       {relations.volumes.length > 0 && (
         <RelationCard title="Attached Volumes" icon={HardDrive}>
           <div className="divide-y divide-gray-100">
@@ -235,6 +251,7 @@ const ResourceRelations = ({ node, graph }) => {
               No related resources found.
           </div>
       )}
+      </>)}
     </div>
   );
 };
@@ -1,4 +1,5 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 import { ChevronRight, ChevronDown, Server, HardDrive, Network, Globe, Box, Activity } from 'lucide-react';
 
 const TypeIcon = ({ type }) => {
@@ -12,8 +13,41 @@ const TypeIcon = ({ type }) => {
   }
 };
 
-const ResourceGroup = ({ type, nodes, onSelect, selectedId }) => {
+const PAGE_SIZE = 100;
+const TREE_FIELDS = 'id,type,name,label';
+
+// Loads the group's nodes one /nodes page at a time, only while it is expanded
+const ResourceGroup = ({ apiBase, cloud, version, type, count, onSelect, selectedId }) => {
   const [expanded, setExpanded] = useState(true);
+  const [nodes, setNodes] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loaded, setLoaded] = useState(false);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+
+  const loadPage = async (pageCursor) => {
+    setLoading(true);
+    setError(null);
+    try {
+      const params = { cloud, type, limit: PAGE_SIZE, fields: TREE_FIELDS };
+      if (pageCursor) params.cursor = pageCursor;
+      const res = await axios.get(`${apiBase}/nodes`, { params });
+      setNodes(prev => (pageCursor ? [...prev, ...res.data.items] : res.data.items));
+      setCursor(res.data.next_cursor);
+      setLoaded(true);
+    } catch (err) {
+      console.error(err);
+      setError(`Failed to load ${type.replace('_', ' ')} resources`);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    if (expanded && version && !loaded && !loading && !error) {
+      loadPage(null);
+    }
+  }, [expanded, version]);
 
   return (
     <div className="mb-2">
@@ -23,7 +57,7 @@ const ResourceGroup = ({ type, nodes, onSelect, selectedId }) => {
       >
         {expanded ? <ChevronDown className="w-4 h-4 mr-1 text-gray-400" /> : <ChevronRight className="w-4 h-4 mr-1 text-gray-400" />}
         <span className="capitalize">{type.replace('_', ' ')}</span>
-        <span className="ml-auto text-xs text-gray-400 bg-gray-100 px-1.5 py-0.5 rounded-full">{nodes.length}</span>
+        <span className="ml-auto text-xs text-gray-400 bg-gray-100 px-1.5 py-0.5 rounded-full">{count}</span>
       </button>
       
       {expanded && (
@@ -44,31 +78,43 @@ const ResourceGroup = ({ type, nodes, onSelect, selectedId }) => {
               <span className="truncate">{node.label}</span>
             </button>
           ))}
+          {!version && (
+            <p className="px-2 py-1.5 text-xs text-gray-400">Waiting for discovery...</p>
+          )}
+          {error && (
+            <p className="px-2 py-1.5 text-xs text-red-600">{error}</p>
+          )}
+          {cursor && (
+            <button
+              onClick={() => loadPage(cursor)}
+              disabled={loading}
+              className="w-full px-2 py-1.5 text-xs text-blue-600 hover:bg-blue-50 rounded-md text-left"
+            >
+              {loading ? 'Loading...' : `Load more (${nodes.length} of ${count})`}
+            </button>
+          )}
         </div>
       )}
     </div>
   );
 };
 
-const ResourceTree = ({ graph, onSelect, selectedId }) => {
-  const groupedNodes = useMemo(() => {
-    if (!graph || !graph.nodes) return {};
-    return graph.nodes.reduce((acc, node) => {
-      if (!acc[node.type]) acc[node.type] = [];
-      acc[node.type].push(node);
-      return acc;
-    }, {});
-  }, [graph]);
-
-  if (!graph) return <div className="p-4 text-gray-500 text-sm">No data available</div>;
+// types maps each node type to its count; version is the graph's generated_at
+// once discovery is done. Groups only query /nodes after that, and are remounted
+// for each cloud and version so pages and cursors never mix graphs
+const ResourceTree = ({ apiBase, cloud, types, version, onSelect, selectedId }) => {
+  if (!types) return <div className="p-4 text-gray-500 text-sm">No data available</div>;
 
   return (
     <div className="p-4 space-y-4">
-      {Object.entries(groupedNodes).map(([type, nodes]) => (
+      {Object.entries(types).map(([type, count]) => (
         <ResourceGroup 
-          key={type} 
+          key={`${cloud}:${version}:${type}`} 
+          apiBase={apiBase}
+          cloud={cloud}
+          version={version}
           type={type} 
-          nodes={nodes} 
+          count={count} 
           onSelect={onSelect}
           selectedId={selectedId}
         />